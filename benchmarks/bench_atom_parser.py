@@ -0,0 +1,76 @@
+"""
+Benchmark the streaming Atom parser against feedparser on recorded arXiv feed pages.
+
+Usage:
+    python benchmarks/bench_atom_parser.py [page.xml ...]
+
+Without arguments the entries of `test/data/arxiv_feed.xml` are replicated into
+a 100-entry page.
+"""
+import gc
+import sys
+import time
+import tracemalloc
+from pathlib import Path
+
+import feedparser
+
+from chat_research.provider.async_arxiv import Result
+from chat_research.provider.atom import parse_page
+
+DEFAULT_FEED = Path(__file__).parents[1] / "test" / "data" / "arxiv_feed.xml"
+
+
+def synthetic_page(path: Path, size: int = 100) -> bytes:
+    body = path.read_bytes()
+    head, _, rest = body.partition(b"<entry>")
+    entries, _, tail = rest.rpartition(b"</entry>")
+    entries = (b"<entry>" + entries + b"</entry>").split(b"</entry>")
+    entries = [e + b"</entry>" for e in entries if e.strip()]
+    page = [entries[i % len(entries)] for i in range(size)]
+    return head + b"\n".join(page) + tail
+
+
+def with_feedparser(body: bytes):
+    return [Result._from_feed_entry(e) for e in feedparser.parse(body).entries]
+
+
+def with_atom(body: bytes):
+    return parse_page(body)[1]
+
+
+def measure(parse, pages, repeat):
+    gc.collect()
+    start = time.perf_counter()
+    for _ in range(repeat):
+        for page in pages:
+            parse(page)
+    elapsed = (time.perf_counter() - start) / repeat
+
+    tracemalloc.start()
+    kept = [parse(page) for page in pages]
+    retained, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    count = sum(len(results) for results in kept)
+    return elapsed, peak, retained, count
+
+
+def main(argv):
+    if argv:
+        pages = [Path(p).read_bytes() for p in argv]
+    else:
+        pages = [synthetic_page(DEFAULT_FEED)]
+
+    print(
+        f"{'parser':<12}{'results':>9}{'time/run':>12}{'peak MiB':>11}{'kept MiB':>11}"
+    )
+    for name, parse in (("feedparser", with_feedparser), ("atom", with_atom)):
+        elapsed, peak, retained, count = measure(parse, pages, repeat=5)
+        print(
+            f"{name:<12}{count:>9}{elapsed * 1000:>10.1f}ms"
+            f"{peak / 2**20:>11.2f}{retained / 2**20:>11.2f}"
+        )
+
+
+if __name__ == "__main__":
+    main(sys.argv[1:])
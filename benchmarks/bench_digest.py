@@ -0,0 +1,80 @@
+"""
+Benchmark the digest exporters against rendering one PDF per paper.
+
+Usage:
+    python benchmarks/bench_digest.py [papers]
+
+Each paper is a synthetic summary of about the size the reader writes. The
+per-paper and merge runs render on the export pool; the single run renders
+the whole batch with one pandoc call. Needs pandoc and a LaTeX engine.
+"""
+import asyncio
+import shutil
+import sys
+import tempfile
+import time
+from pathlib import Path
+
+from chat_research.aexport import (
+    DigestEntry,
+    adigest,
+    aexport,
+    aexport_to_markdown,
+    amerge_pdfs,
+)
+
+SUMMARY = (
+    "## Paper:{index}\n\n"
+    "1. Title: Paper {index}\n\n"
+    "2. Authors: Jane Doe, Richard Roe\n\n"
+    "8. Summary:\n\n"
+    + "- (1): The paper studies a problem and proposes a method. " * 20
+    + "\n\n7. Methods:\n\n"
+    + "- (1): The method is evaluated on three data sets. " * 20
+    + "\n\n8. Conclusion:\n\n"
+    + "- (1): The results support the hypothesis. " * 10
+)
+
+
+async def per_paper(folder: Path, count: int):
+    await asyncio.gather(
+        *(
+            aexport(SUMMARY.format(index=i), folder / f"paper-{i}.pdf")
+            for i in range(count)
+        )
+    )
+
+
+async def single(folder: Path, count: int):
+    entries = []
+    for i in range(count):
+        path = folder / f"paper-{i}.md"
+        await aexport_to_markdown(SUMMARY.format(index=i), path)
+        entries.append(DigestEntry(f"Paper {i}", path))
+    await adigest(entries, folder / "digest.pdf", "Digest")
+
+
+async def merge(folder: Path, count: int):
+    await per_paper(folder, count)
+    entries = [
+        DigestEntry(f"Paper {i}", folder / f"paper-{i}.pdf") for i in range(count)
+    ]
+    await amerge_pdfs(entries, folder / "digest.pdf")
+
+
+def main(argv):
+    if shutil.which("pandoc") is None:
+        sys.exit("pandoc not found")
+    count = int(argv[0]) if argv else 20
+
+    print(f"{'export':<12}{'papers':>8}{'time':>10}")
+    for name, run in (("per-paper", per_paper), ("single", single), ("merge", merge)):
+        with tempfile.TemporaryDirectory() as folder:
+            start = time.perf_counter()
+            asyncio.run(run(Path(folder), count))
+            elapsed = time.perf_counter() - start
+        print(f"{name:<12}{count:>8}{elapsed:>9.1f}s")
+
+
+if __name__ == "__main__":
+    main(sys.argv[1:])
@@ -0,0 +1,77 @@
+"""
+Measure the memory held per search result.
+
+Usage:
+    python benchmarks/bench_result_memory.py [count]
+"""
+import gc
+import sys
+import tracemalloc
+
+from bench_atom_parser import DEFAULT_FEED, synthetic_page
+
+from chat_research.provider import async_biorxiv
+from chat_research.provider.atom import parse_page
+
+BIORXIV_ENTRY = {
+    "doi": "10.1101/2023.04.28.538722",
+    "title": "Single-cell atlas of the developing human retina",
+    "authors": "Zhang, A.; Smith, B.; Li, C.",
+    "author_corresponding": "Alice Zhang",
+    "author_corresponding_institution": "Northwestern University",
+    "date": "2023-05-01",
+    "version": "1",
+    "type": "new results",
+    "license": "cc_by",
+    "category": "bioinformatics",
+    "jatsxml": "https://www.biorxiv.org/content/early/2023/05/01/2023.04.28.538722.source.xml",
+    "abstract": "We profiled retinal development with single-cell RNA-seq. " * 8,
+    "published": "NA",
+    "server": "biorxiv",
+}
+
+
+def per_result(build, count):
+    gc.collect()
+    tracemalloc.start()
+    before = tracemalloc.get_traced_memory()[0]
+    results = build(count)
+    gc.collect()
+    after = tracemalloc.get_traced_memory()[0]
+    tracemalloc.stop()
+    return (after - before) / len(results)
+
+
+def arxiv_results(metadata_only):
+    page = synthetic_page(DEFAULT_FEED)
+
+    def build(count):
+        results = []
+        while len(results) < count:
+            # distinct bytes per page so strings are not shared across pages
+            body = page.replace(b"<title>", f"<title>{len(results)} ".encode())
+            results.extend(parse_page(body, metadata_only=metadata_only)[1])
+        return results
+
+    return build
+
+
+def biorxiv_results(count):
+    return [
+        async_biorxiv.Result.from_api_entry(
+            dict(BIORXIV_ENTRY, title=f"{i} {BIORXIV_ENTRY['title']}")
+        )
+        for i in range(count)
+    ]
+
+
+def main(argv):
+    count = int(argv[0]) if argv else 5000
+    print(f"bytes per result over {count} results")
+    print(f"arxiv              {per_result(arxiv_results(False), count):>9.0f}")
+    print(f"arxiv (metadata)   {per_result(arxiv_results(True), count):>9.0f}")
+    print(f"biorxiv            {per_result(biorxiv_results, count):>9.0f}")
+
+
+if __name__ == "__main__":
+    main(sys.argv[1:])
@@ -5,11 +5,16 @@ from typing import Any, Optional
 from loguru import logger
 
 from .commands import (
+    chat_async_arxiv,
     chat_async_biorxiv,
     chat_async_paper,
     chat_config,
+    chat_ingest,
+    chat_multi,
     chat_response,
     chat_reviewer,
+    chat_search,
+    chat_watch,
 )
 
 
@@ -55,6 +60,8 @@ def _cli():
         chatre paper --pdf example.pdf --file-format pdf
     Reader papers from local directory recursively
         chatre paper --pdf example/
+    Search the papers fetched so far without network access
+        chatre search --offline protein folding
     """,
     )
 
@@ -79,6 +86,11 @@ def _cli():
     chat_config_command = chat_config.add_subcommand(subparser)
     chat_async_biorxiv_command = chat_async_biorxiv.add_subcommand(subparser)
     chat_async_paper_command = chat_async_paper.add_subcommand(subparser)
+    chat_search_command = chat_search.add_subcommand(subparser)
+    chat_watch_command = chat_watch.add_subcommand(subparser)
+    chat_ingest_command = chat_ingest.add_subcommand(subparser)
+    chat_multi_command = chat_multi.add_subcommand(subparser)
+    chat_async_arxiv_command = chat_async_arxiv.add_subcommand(subparser)
 
     args = parser.parse_args()
     debug_format = "<green>{time:YYYY-MM-DD HH:mm:ss.SSS}</green> | <level>{level: <8}</level> | <cyan>{name}</cyan>:<cyan>{function}</cyan>:<cyan>{line}</cyan> - <level>{message}</level>"
@@ -111,6 +123,16 @@ def _cli():
         chat_async_biorxiv.cli(args)
     elif args.subcommand == chat_async_paper_command:
         chat_async_paper.cli(args)
+    elif args.subcommand == chat_search_command:
+        chat_search.cli(args)
+    elif args.subcommand == chat_watch_command:
+        chat_watch.cli(args)
+    elif args.subcommand == chat_ingest_command:
+        chat_ingest.cli(args)
+    elif args.subcommand == chat_multi_command:
+        chat_multi.cli(args)
+    elif args.subcommand == chat_async_arxiv_command:
+        chat_async_arxiv.cli(args)
     else:
         logger.error("Invalid subcommand")
         parser.print_help()
@@ -1,29 +1,149 @@
 # https://github.com/Wandmalfarbe/pandoc-latex-template
 import asyncio
+import os
+import re
 import shlex
 import shutil
+import time
 from pathlib import Path
+from typing import List, NamedTuple, Optional, Sequence
 
 import aiofiles
+import fitz
 from loguru import logger
 
 from .template import aload_eis
 
+EXPORT_TIMEOUT = 300.0
+"""Seconds one pandoc run may take before it is killed."""
+DIGEST_CHUNK_BYTES = 64 * 1024
+"""Size of the reads used to copy summaries into a digest."""
+
+
+class ExportStats:
+    """
+    Jobs run by an export pool, the time they waited for a worker and the
+    time their commands ran.
+    """
+
+    def __init__(self):
+        self.jobs = 0
+        self.failures = 0
+        self.timeouts = 0
+        self.wait_seconds = 0.0
+        self.render_seconds = 0.0
+
+
+class ExportPool:
+    """
+    Runs export commands on at most `workers` subprocesses at a time.
+
+    Jobs wait in a queue and are taken in submission order, so a large batch
+    renders a few documents at a time instead of starting a LaTeX toolchain
+    per paper. Commands are started without a shell, and one still running
+    after `timeout` seconds is killed and counted as failed.
+    """
+
+    def __init__(self, workers: Optional[int] = None, timeout: float = EXPORT_TIMEOUT):
+        self.workers = workers or os.cpu_count() or 1
+        self.timeout = timeout
+        self.stats = ExportStats()
+        self._queue: Optional[asyncio.Queue] = None
+        self._tasks: List[asyncio.Task] = []
+        self._loop: Optional[asyncio.AbstractEventLoop] = None
+
+    def _start(self) -> asyncio.Queue:
+        # the queue and workers belong to the event loop they were started in,
+        # and each `asyncio.run` starts a new one
+        loop = asyncio.get_running_loop()
+        if loop is not self._loop:
+            self._loop = loop
+            self._queue = asyncio.Queue()
+            self._tasks = [loop.create_task(self._work()) for _ in range(self.workers)]
+        return self._queue
+
+    async def run(self, args: Sequence[str]) -> bool:
+        """
+        Queues a command and waits for it to finish.
+
+        Returns:
+            bool: Whether the command exited with status 0 in time.
+        """
+        queue = self._start()
+        future = asyncio.get_running_loop().create_future()
+        await queue.put((list(args), time.perf_counter(), future))
+        return await future
+
+    async def _work(self) -> None:
+        while True:
+            args, queued_at, future = await self._queue.get()
+            if future.cancelled():
+                continue
+            start = time.perf_counter()
+            self.stats.wait_seconds += start - queued_at
+            try:
+                ok = await self._exec(args)
+            except Exception as e:
+                ok = False
+                logger.error(f"[{shlex.join(args)!r} failed: {e}]")
+            self.stats.render_seconds += time.perf_counter() - start
+            self.stats.jobs += 1
+            self.stats.failures += not ok
+            if not future.cancelled():
+                future.set_result(ok)
+
+    async def _exec(self, args: List[str]) -> bool:
+        proc = await asyncio.create_subprocess_exec(
+            *args, stdout=asyncio.subprocess.PIPE, stderr=asyncio.subprocess.PIPE
+        )
+
+        try:
+            stdout, stderr = await asyncio.wait_for(proc.communicate(), self.timeout)
+        except asyncio.TimeoutError:
+            proc.kill()
+            await proc.wait()
+            self.stats.timeouts += 1
+            logger.error(f"[{shlex.join(args)!r} killed after {self.timeout:.0f}s]")
+            return False
+
+        logger.trace(f"[{shlex.join(args)!r} exited with {proc.returncode}]")
+        if stdout:
+            logger.trace(f"[stdout]\n{stdout.decode()}")
+        if stderr:
+            logger.error(f"[stderr]\n{stderr.decode()}")
+
+        return proc.returncode == 0
+
+    def log_stats(self) -> None:
+        """
+        Logs the average queue wait and render time of the jobs so far.
+        """
+        stats = self.stats
+        if not stats.jobs:
+            return
+        logger.info(
+            f"export: {stats.jobs} jobs, {stats.failures} failed "
+            f"({stats.timeouts} timed out), "
+            f"{stats.wait_seconds / stats.jobs:.1f}s average wait, "
+            f"{stats.render_seconds / stats.jobs:.1f}s average render"
+        )
+
+
+_default_pool: Optional[ExportPool] = None
 
-async def run(cmd) -> bool:
-    proc = await asyncio.create_subprocess_shell(
-        cmd, stdout=asyncio.subprocess.PIPE, stderr=asyncio.subprocess.PIPE
-    )
 
-    stdout, stderr = await proc.communicate()
+def default_pool() -> ExportPool:
+    """
+    Returns the process-wide export pool, with one worker per CPU.
+    """
+    global _default_pool
+    if _default_pool is None:
+        _default_pool = ExportPool()
+    return _default_pool
 
-    logger.trace(f"[{cmd!r} exited with {proc.returncode}]")
-    if stdout:
-        logger.trace(f"[stdout]\n{stdout.decode()}")
-    if stderr:
-        logger.error(f"[stderr]\n{stderr.decode()}")
 
-    return True if proc.returncode == 0 else False
+async def run(args: Sequence[str]) -> bool:
+    return await default_pool().run(args)
 
 
 async def acformt(file_name: Path, source: str, target: str) -> bool:
@@ -40,8 +160,7 @@ async def acformt(file_name: Path, source: str, target: str) -> bool:
         to_file.as_posix(),
     ]
 
-    _cmd = shlex.join(cmd)
-    is_success = await run(_cmd)
+    is_success = await run(cmd)
 
     if not is_success:
         logger.warning("failed to output pdf then fall back to md")
@@ -66,8 +185,7 @@ async def amd2pdf(md_file: Path, pdf_file: Path, template=None) -> bool:
         else:
             cmd += ["--template", template]
 
-    _cmd = shlex.join(cmd)
-    is_success = await run(_cmd)
+    is_success = await run(cmd)
 
     if not is_success:
         logger.warning("failed to output pdf then fall back to md")
@@ -88,8 +206,7 @@ async def amd2tex(md_file: Path, tex_file: Path) -> bool:
         tex_file.as_posix(),
     ]
 
-    _cmd = shlex.join(cmd)
-    is_success = await run(_cmd)
+    is_success = await run(cmd)
 
     if not is_success:
         logger.warning("failed to output pdf then fall back to md")
@@ -129,6 +246,12 @@ async def aexport_to_tex(text: str, file_name: Path, mode="w", keep_md: bool = F
 
 
 async def aexport(content: str, file_name: Path, keep_md: bool = False):
+    """
+    Writes `content` to `file_name` in the format of its suffix.
+
+    Markdown and text are written in-process; PDF and TeX are rendered by
+    pandoc on the export pool.
+    """
     if file_name.suffix == ".md" or file_name.suffix == ".txt":
         await aexport_to_markdown(content, file_name, mode="w")
     elif file_name.suffix == ".pdf":
@@ -137,3 +260,92 @@ async def aexport(content: str, file_name: Path, keep_md: bool = False):
         await aexport_to_tex(content, file_name, mode="w", keep_md=keep_md)
     else:
         raise ValueError("Unsupported file format")
+
+
+class DigestEntry(NamedTuple):
+    title: str
+    path: Path
+
+
+def slugify(heading: str) -> str:
+    """
+    Returns the anchor GitHub and pandoc's `gfm_auto_identifiers` give a heading.
+    """
+    slug = re.sub(r"[^\w\- ]", "", heading.strip().lower())
+    return slug.replace(" ", "-")
+
+
+async def awrite_digest(entries: List[DigestEntry], md_file: Path, title: str):
+    """
+    Streams the Markdown summaries of `entries` into one file, after a table of
+    contents linking to a heading per paper.
+    """
+    headings = [f"{i}. {entry.title}" for i, entry in enumerate(entries, 1)]
+    async with aiofiles.open(md_file, "w", encoding="utf-8") as out:
+        await out.write(f'---\ntitle: "{title}"\n---\n\n')
+        for heading in headings:
+            text = heading.replace("[", "\\[").replace("]", "\\]")
+            await out.write(f"- [{text}](#{slugify(heading)})\n")
+        for heading, entry in zip(headings, entries):
+            await out.write(f"\n\n# {heading}\n\n")
+            async with aiofiles.open(entry.path, "r", encoding="utf-8") as f:
+                while chunk := await f.read(DIGEST_CHUNK_BYTES):
+                    await out.write(chunk)
+
+
+async def adigest(entries: List[DigestEntry], file_name: Path, title: str) -> bool:
+    """
+    Writes a digest of Markdown summaries in the format of `file_name`'s
+    suffix, running pandoc once for the whole batch.
+
+    Returns:
+        bool: Whether the digest was written in that format; on failure the
+        Markdown digest is kept next to it.
+    """
+    if file_name.suffix in (".md", ".txt"):
+        await awrite_digest(entries, file_name, title)
+        return True
+
+    md_file = file_name.with_suffix(".md")
+    await awrite_digest(entries, md_file, title)
+    if shutil.which("pandoc") is None:
+        logger.warning("pandoc not found, the digest is kept as md")
+        return False
+
+    cmd = [
+        "pandoc",
+        md_file.as_posix(),
+        "--from",
+        "markdown+gfm_auto_identifiers",
+        "-o",
+        file_name.as_posix(),
+    ]
+    if file_name.suffix == ".pdf":
+        cmd += ["--template", (await aload_eis()).as_posix()]
+
+    is_success = await run(cmd)
+    if is_success:
+        md_file.unlink()
+    else:
+        logger.warning("failed to output the digest then fall back to md")
+    return is_success
+
+
+def merge_pdfs(entries: List[DigestEntry], pdf_file: Path) -> None:
+    """
+    Concatenates rendered PDFs without re-rendering them, with one bookmark per
+    paper as the table of contents.
+    """
+    toc = []
+    with fitz.open() as digest:
+        for i, entry in enumerate(entries, 1):
+            with fitz.open(entry.path) as pdf:
+                toc.append([1, f"{i}. {entry.title}", digest.page_count + 1])
+                digest.insert_pdf(pdf)
+        digest.set_toc(toc)
+        digest.save(pdf_file, garbage=3, deflate=True)
+
+
+async def amerge_pdfs(entries: List[DigestEntry], pdf_file: Path) -> None:
+    loop = asyncio.get_running_loop()
+    await loop.run_in_executor(None, merge_pdfs, entries, pdf_file)
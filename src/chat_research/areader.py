@@ -4,18 +4,38 @@ Module containing AsyncBaseReader class for reading and summarizing papers with
 import asyncio
 import base64
 import datetime
+import functools
+import itertools
 import re
+from concurrent.futures import ThreadPoolExecutor
 from pathlib import Path
-from typing import List
+from typing import AsyncIterable, Callable, Dict, List, Optional, Tuple
+from xml.etree.ElementTree import ParseError
 
+import aiohttp
 import openai
 import requests
 import tenacity
 import tiktoken
 from loguru import logger
 
-from .aexport import aexport
+from .aexport import (
+    DigestEntry,
+    adigest,
+    aexport,
+    aexport_to_markdown,
+    amerge_pdfs,
+    default_pool,
+)
+from .jats import JatsDocument, JatsPaper, JatsParser
+from .latex import LatexPaper, extract_tex, find_main
 from .paper_with_image import Paper
+from .pipeline import Pipeline, Stage
+from .provider import async_arxiv
+from .provider.base import LocalProvider, Provider
+from .provider.download import PER_HOST, default_manager
+from .provider.store import default_store
+from .scheduler import KeyPool
 from .utils import load_config
 
 
@@ -25,7 +45,15 @@ class AsyncBaseReader:
     """
 
     def __init__(
-        self, root_path: str, language: str, file_format: str, save_image: bool
+        self,
+        root_path: str,
+        language: str,
+        file_format: str,
+        save_image: bool,
+        max_concurrency: int = 8,
+        keep_pdf: bool = True,
+        source: str = "pdf",
+        digest: Optional[str] = None,
     ):
         """
         Initializes AsyncBaseReader object with root path, language, file format, and save image flag.
@@ -35,6 +63,10 @@ class AsyncBaseReader:
             language (str): Language to use for chatbot.
             file_format (str): File format to save papers in.
             save_image (bool): Flag indicating whether to save images of papers.
+            max_concurrency (int, optional): Maximum number of in-flight chat requests. Defaults to 8.
+            keep_pdf (bool, optional): Whether downloaded PDFs are kept on disk, otherwise they are parsed from memory. Defaults to True.
+            source (str, optional): What papers are read from, "pdf", "latex" (arXiv) or "jats" (bioRxiv/medRxiv); the PDF is read when there is no such source. Defaults to "pdf".
+            digest (str, optional): Also collect the summaries of a run into one document, by rendering their Markdown once ("single") or merging their PDFs ("merge", PDF output only). Defaults to None.
         """
         if isinstance(root_path, str):
             root_path = Path(root_path)
@@ -42,9 +74,18 @@ class AsyncBaseReader:
         self.root_path = root_path
         self.language = language
         self.file_format = file_format
+        self.keep_pdf = keep_pdf
+        self.source = source
+        if digest == "merge" and file_format != "pdf":
+            digest = "single"
+        self.digest = digest
+        self.exported: List[DigestEntry] = []
 
         self.config, self.chat_api_list = load_config()
-        self.cur_api = 0
+        self.key_pool = KeyPool(self.chat_api_list)
+        self.max_concurrency = max_concurrency
+        self._chat_semaphore = None
+        self._chat_loop = None
 
         self.gitee_key = self.config["Gitee"]["api"] if save_image else ""
 
@@ -52,6 +93,17 @@ class AsyncBaseReader:
         self.encoding = tiktoken.get_encoding("gpt2")
         self.token_usage = 0
 
+    def close(self) -> None:
+        """
+        Releases what the reader holds open between runs, such as a page cache.
+        """
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc_info) -> None:
+        self.close()
+
     async def _summary_with_chat(self, paper_list: List[Paper], key_words: List[str]):
         """
         Asynchronously summarizes papers with chatbot assistance.
@@ -69,6 +121,8 @@ class AsyncBaseReader:
                 for index, paper in enumerate(paper_list)
             ]
         )
+        await self.export_digest()
+        default_pool().log_stats()
 
     def summary_with_chat(self, paper_list: List[Paper], key_words: List[str]):
         """
@@ -83,6 +137,262 @@ class AsyncBaseReader:
         """
         asyncio.run(self._summary_with_chat(paper_list, key_words))
 
+    @staticmethod
+    def create_paper(
+        provider: Provider, result, paper_path: Path, stream: Optional[bytes] = None
+    ) -> Paper:
+        """
+        Creates a Paper from a downloaded search result.
+
+        Args:
+            provider (Provider): The provider the result comes from.
+            result: The search result.
+            paper_path (Path): Path of the downloaded PDF.
+            stream (bytes, optional): The PDF itself, if it was not written to `paper_path`. Defaults to None.
+
+        Returns:
+            Paper: The parsed paper.
+        """
+        metadata = provider.metadata(result)
+        return Paper(
+            path=paper_path,
+            url=metadata.url,
+            title=metadata.title,
+            abs=metadata.abstract,
+            authers=metadata.authors,
+            stream=stream,
+        )
+
+    async def load_paper(
+        self, provider: Provider, result, path: Path, session
+    ) -> Callable[[], Paper]:
+        """
+        Fetches what one search result is read from, its LaTeX source, JATS XML
+        or PDF.
+
+        Returns:
+            Callable[[], Paper]: Parses the paper; call it off the event loop.
+        """
+        if self.source == "latex":
+            files = await self.read_latex(result, session)
+            if files is not None:
+                return functools.partial(
+                    self.create_latex_paper, provider, result, path, files
+                )
+        elif self.source == "jats":
+            document = await self.read_jats(result, session)
+            if document is not None:
+                return functools.partial(
+                    self.create_jats_paper, provider, result, path, document
+                )
+        paper_path, stream = await self.load_pdf(provider, result, path, session)
+        return functools.partial(
+            self.create_paper, provider, result, paper_path, stream
+        )
+
+    @staticmethod
+    async def read_latex(result, session) -> Optional[Dict[str, str]]:
+        """
+        Reads the `.tex` files of an arXiv result's source into memory.
+
+        Returns:
+            dict: File names and contents, or None if the result has no source.
+        """
+        if not isinstance(result, async_arxiv.Result):
+            return None
+        url = result.get_source_url()
+        try:
+            body = await default_manager().read(session, url)
+        except (aiohttp.ClientError, asyncio.TimeoutError) as e:
+            logger.warning(f"source_error: {e!r}")
+            return None
+        loop = asyncio.get_running_loop()
+        files = await loop.run_in_executor(None, extract_tex, body)
+        if files is None or find_main(files) is None:
+            logger.info(f"No LaTeX source, reading the PDF: {url}")
+            return None
+        return files
+
+    @staticmethod
+    async def read_jats(result, session) -> Optional[JatsDocument]:
+        """
+        Streams the JATS XML of a bioRxiv/medRxiv result through the
+        incremental parser.
+
+        Returns:
+            JatsDocument: The parsed XML, or None if it is missing or has no sections.
+        """
+        url = getattr(result, "jats_xml_path", "")
+        if not url:
+            return None
+        parser = JatsParser()
+        try:
+            async for data in default_manager().stream(session, url):
+                parser.feed(data)
+            document = parser.close()
+        except (aiohttp.ClientError, asyncio.TimeoutError, ParseError) as e:
+            logger.warning(f"jats_error: {e!r}")
+            return None
+        if not document.sections:
+            logger.info(f"No sections in the JATS XML, reading the PDF: {url}")
+            return None
+        return document
+
+    @staticmethod
+    def create_jats_paper(
+        provider: Provider, result, path: Path, document: JatsDocument
+    ) -> JatsPaper:
+        """
+        Creates a paper from the parsed JATS XML of a search result.
+        """
+        metadata = provider.metadata(result)
+        return JatsPaper(
+            path=path / (metadata.key.replace("/", "_") + ".xml"),
+            document=document,
+            url=metadata.url,
+            title=metadata.title,
+            abs=metadata.abstract,
+            authers=metadata.authors,
+        )
+
+    @staticmethod
+    def create_latex_paper(
+        provider: Provider, result, path: Path, files: Dict[str, str]
+    ) -> LatexPaper:
+        """
+        Creates a paper from the `.tex` files of a search result.
+        """
+        metadata = provider.metadata(result)
+        return LatexPaper(
+            path=path / (metadata.key.replace("/", "_") + ".tex"),
+            files=files,
+            url=metadata.url,
+            title=metadata.title,
+            abs=metadata.abstract,
+            authers=metadata.authors,
+        )
+
+    async def load_pdf(
+        self, provider: Provider, result, path: Path, session
+    ) -> Tuple[Path, Optional[bytes]]:
+        """
+        Gets the PDF of one search result.
+
+        Unless `keep_pdf` is set, a PDF missing from the `PdfStore` is read into
+        memory and never written to disk.
+
+        Returns:
+            Tuple[Path, Optional[bytes]]: The path of the PDF, and its bytes if
+            they only live in memory.
+        """
+        if self.keep_pdf or isinstance(provider, LocalProvider):
+            return await self.fetch_pdf(provider, result, path, session), None
+
+        metadata = provider.metadata(result)
+        stored = default_store().find(metadata)
+        if stored is not None:
+            return stored, None
+        url = await provider.resolve_pdf(result, session)
+        logger.info(f"Reading: {metadata.title}")
+        stream = await default_manager().read(session, url)
+        pdf_name = self.validateTitle(metadata.title) + ".pdf"
+        return path / pdf_name, stream
+
+    async def fetch_pdf(self, provider: Provider, result, path: Path, session) -> Path:
+        """
+        Downloads the PDF of one search result into a folder.
+
+        Returns:
+            Path: Path of the PDF.
+        """
+        pdf_name = self.validateTitle(provider.metadata(result).title) + ".pdf"
+        if isinstance(provider, LocalProvider):
+            paper_path = await provider.download(result, session, path, pdf_name)
+        else:
+            paper_path = await default_store().fetch(
+                provider, result, session, path, pdf_name
+            )
+        return Path(paper_path)
+
+    async def summarize_results(
+        self,
+        provider: Provider,
+        results,
+        path: Path,
+        session,
+        key_words,
+        download_workers: int = PER_HOST,
+    ) -> List[Paper]:
+        """
+        Downloads, parses, summarizes and exports search results in one
+        pipeline, so the first summary starts as soon as the first PDF lands.
+
+        Args:
+            provider (Provider): The provider the results come from.
+            results: The search results, an iterable or an async iterable.
+            path (Path): Folder the PDFs are stored in.
+            session (aiohttp.ClientSession): Session used for the downloads.
+            key_words: Key words to use for chatbot.
+            download_workers (int, optional): Concurrent downloads. Defaults to `PER_HOST`.
+
+        Returns:
+            List[Paper]: The summarized papers, in completion order.
+        """
+        if isinstance(results, AsyncIterable):
+            pairs = ((provider, result) async for result in results)
+        else:
+            pairs = ((provider, result) for result in results)
+        return await self.summarize_pairs(
+            pairs, path, session, key_words, download_workers
+        )
+
+    async def summarize_pairs(
+        self,
+        pairs,
+        path: Path,
+        session,
+        key_words,
+        download_workers: int = PER_HOST,
+    ) -> List[Paper]:
+        """
+        Like `summarize_results`, for `(provider, result)` pairs of several
+        providers, such as the merged stream of `multi_search`.
+        """
+        loop = asyncio.get_running_loop()
+        paper_index = itertools.count()
+
+        async def download(pair):
+            provider, result = pair
+            return await self.load_paper(provider, result, path, session)
+
+        async def parse(build):
+            return await loop.run_in_executor(parse_executor, build)
+
+        async def summarize(paper):
+            content = await self.summarize_paper(paper, next(paper_index), key_words)
+            return paper, content
+
+        async def export(item):
+            paper, content = item
+            await self.export_summary(paper, content)
+            return paper
+
+        pipeline = Pipeline(
+            [
+                Stage("download", download, download_workers),
+                Stage("parse", parse, 1),
+                Stage("summary", summarize, self.max_concurrency),
+                Stage("export", export, default_pool().workers),
+            ]
+        )
+        # PyMuPDF is not thread-safe, so papers are parsed one at a time
+        with ThreadPoolExecutor(max_workers=1) as parse_executor:
+            paper_list = await pipeline.run(pairs)
+        await self.export_digest()
+        default_manager().log_throughput()
+        default_pool().log_stats()
+        return paper_list
+
     def update_title(self, text: str) -> str:
         """
         Updates the title of a paper based on the summary text.
@@ -111,6 +421,21 @@ class AsyncBaseReader:
         Returns:
             None
         """
+        content = await self.summarize_paper(paper, paper_index, key_words)
+        await self.export_summary(paper, content)
+
+    async def summarize_paper(self, paper: Paper, paper_index: int, key_words) -> str:
+        """
+        Asks the chatbot for the summary, method and conclusion of a paper.
+
+        Args:
+            paper (Paper): Paper object to summarize.
+            paper_index (int): Index of the paper in the list.
+            key_words (List[str]): List of key words to use for chatbot.
+
+        Returns:
+            str: The summary, ready to export.
+        """
 
         result = []
         text = ""
@@ -242,7 +567,16 @@ class AsyncBaseReader:
                 )
         result.append(chat_conclusion_text)
         result.append("\n" * 4)
+        return "\n".join([item.strip() for item in result])
 
+    async def export_summary(self, paper: Paper, content: str):
+        """
+        Writes the summary of a paper to the export folder.
+
+        Args:
+            paper (Paper): The summarized paper.
+            content (str): Its summary.
+        """
         date_str = str(datetime.datetime.now())[:13].replace(" ", "-")
         export_path = self.root_path / "export"
 
@@ -254,10 +588,43 @@ class AsyncBaseReader:
             / f"{date_str}-{self.validateTitle(paper.title[:80])}".strip()
         )
 
-        await aexport(
-            content="\n".join([item.strip() for item in result]),
-            file_name=file_name.with_suffix(f".{self.file_format}"),
-        )
+        if self.digest == "single":
+            # rendered once for the whole batch by `export_digest`
+            file_name = file_name.with_suffix(".md")
+            await aexport_to_markdown(content, file_name)
+        else:
+            file_name = file_name.with_suffix(f".{self.file_format}")
+            await aexport(content=content, file_name=file_name)
+        if self.digest:
+            self.exported.append(DigestEntry(paper.title, file_name))
+
+    async def export_digest(self):
+        """
+        Writes the summaries exported since the last digest into one document,
+        which replaces them.
+        """
+        if not self.digest or not self.exported:
+            return
+        entries, self.exported = self.exported, []
+        date_str = str(datetime.datetime.now())[:13].replace(" ", "-")
+        file_name = self.root_path / "export" / f"{date_str}-digest.{self.file_format}"
+
+        if self.digest == "merge":
+            rendered = [entry for entry in entries if entry.path.exists()]
+            for entry in entries:
+                if entry not in rendered:
+                    logger.warning(f"{entry.title} has no PDF and is left out")
+            if not rendered:
+                return
+            await amerge_pdfs(rendered, file_name)
+        else:
+            if not await adigest(entries, file_name, f"Digest {date_str}"):
+                file_name = file_name.with_suffix(".md")
+            rendered = entries
+
+        for entry in rendered:
+            entry.path.unlink(missing_ok=True)
+        logger.info(f"Wrote a digest of {len(rendered)} papers to {file_name}")
 
     @tenacity.retry(
         wait=tenacity.wait_exponential(multiplier=1, min=4, max=10),
@@ -279,11 +646,6 @@ class AsyncBaseReader:
             str: The generated conclusion.
         """
 
-        openai.api_key = self.chat_api_list[self.cur_api]
-        self.cur_api += 1
-        self.cur_api = (
-            0 if self.cur_api >= len(self.chat_api_list) - 1 else self.cur_api
-        )
         text_token = len(self.encoding.encode(text))
         clip_text_index = int(
             len(text) * (self.max_token_num - conclusion_prompt_token) / text_token
@@ -318,11 +680,7 @@ class AsyncBaseReader:
                 ),
             },
         ]
-        response = await openai.ChatCompletion.acreate(
-            model="gpt-3.5-turbo",
-            # prompt需要用英语替换，少占用token。
-            messages=messages,
-        )
+        response = await self.chat_completion(messages)
         result = ""
         for choice in response.choices:
             result += choice.message.content
@@ -358,11 +716,6 @@ class AsyncBaseReader:
         The function then uses the OpenAI ChatCompletion API to generate a response based on the messages sent to the model.
         The response is then formatted and returned as the output of the function."""
 
-        openai.api_key = self.chat_api_list[self.cur_api]
-        self.cur_api += 1
-        self.cur_api = (
-            0 if self.cur_api >= len(self.chat_api_list) - 1 else self.cur_api
-        )
         text_token = len(self.encoding.encode(text))
         clip_text_index = int(
             len(text) * (self.max_token_num - method_prompt_token) / text_token
@@ -400,10 +753,7 @@ class AsyncBaseReader:
                 ),
             },
         ]
-        response = await openai.ChatCompletion.acreate(
-            model="gpt-3.5-turbo",
-            messages=messages,
-        )
+        response = await self.chat_completion(messages)
 
         result = ""
         for choice in response.choices:
@@ -432,11 +782,6 @@ class AsyncBaseReader:
         Returns:
             str: The summarized text of the research paper.
         """
-        openai.api_key = self.chat_api_list[self.cur_api]
-        self.cur_api += 1
-        self.cur_api = (
-            0 if self.cur_api >= len(self.chat_api_list) - 1 else self.cur_api
-        )
         text_token = len(self.encoding.encode(text))
         clip_text_index = int(
             len(text) * (self.max_token_num - summary_prompt_token) / text_token
@@ -486,10 +831,7 @@ class AsyncBaseReader:
             },
         ]
 
-        response = await openai.ChatCompletion.acreate(
-            model="gpt-3.5-turbo",
-            messages=messages,
-        )
+        response = await self.chat_completion(messages)
         result = ""
 
         for choice in response.choices:
@@ -500,6 +842,40 @@ class AsyncBaseReader:
         self.report_token_usage(response)
         return result
 
+    @property
+    def chat_semaphore(self) -> asyncio.Semaphore:
+        """
+        Semaphore bounding the number of in-flight chat requests.
+
+        It is created lazily so that it binds to the running event loop.
+        """
+        loop = asyncio.get_running_loop()
+        if self._chat_semaphore is None or self._chat_loop is not loop:
+            self._chat_semaphore = asyncio.Semaphore(self.max_concurrency)
+            self._chat_loop = loop
+        return self._chat_semaphore
+
+    async def chat_completion(self, messages, model="gpt-3.5-turbo"):
+        """
+        Sends a chat completion request with the next key of the key pool.
+
+        The key is passed per request instead of through the global `openai.api_key`,
+        so that concurrent requests never race on it.
+
+        Args:
+            messages (list): The chat messages.
+            model (str, optional): The chat model. Defaults to "gpt-3.5-turbo".
+
+        Returns:
+            The response object returned by the OpenAI API.
+        """
+        async with self.chat_semaphore:
+            return await openai.ChatCompletion.acreate(
+                model=model,
+                messages=messages,
+                api_key=self.key_pool.next_key(),
+            )
+
     @staticmethod
     def format_text(text: str) -> str:
         """
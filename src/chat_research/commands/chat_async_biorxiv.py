@@ -7,8 +7,12 @@ from loguru import logger
 from pydantic import BaseModel
 
 from ..areader import AsyncBaseReader
-from ..paper_with_image import Paper
+from ..index import MetadataIndex, search_key
 from ..provider import async_biorxiv as biorxiv
+from ..provider.base import BiorxivProvider, MedrxivProvider
+from ..provider.cache import PageCache
+from ..provider.http import create_session
+from ..ranker import rank_results
 
 
 class Params(BaseModel):
@@ -17,9 +21,16 @@ class Params(BaseModel):
     server: str
     category: list[str]
     filter_keys: Optional[list[str]] = None
+    top_k: Optional[int] = None
+    min_score: Optional[float] = None
+    incremental: bool = False
+    cache_ttl: float = 0
     max_results: int
     sort: str
     save_image: bool
+    keep_pdf: bool = False
+    digest: Optional[str] = None
+    source: str = "pdf"
     file_format: str
     language: str
 
@@ -32,6 +43,8 @@ class Reader(AsyncBaseReader):
         root_path=".",
         sort=biorxiv.SortCriterion.SubmittedDate,
         user_name="defualt",
+        top_k=None,
+        min_score=None,
         args=None,
     ):
         if args is None:
@@ -49,6 +62,9 @@ class Reader(AsyncBaseReader):
             language,
             args.file_format,
             args.save_image,
+            keep_pdf=args.keep_pdf,
+            digest=args.digest,
+            source=args.source,
         )
 
         self.user_name = user_name  # 读者姓名
@@ -56,26 +72,72 @@ class Reader(AsyncBaseReader):
         self.args = args
         self.category = category
         self.filter_keys = filter_keys
+        self.top_k = top_k  # keep at most this many ranked papers
+        self.min_score = min_score  # minimum relevance score of a kept paper
+        self.incremental = args.incremental
+        self.provider = (
+            MedrxivProvider() if args.server == "medrxiv" else BiorxivProvider()
+        )
+        self.client = biorxiv.Client(
+            cache=PageCache(args.cache_ttl) if args.cache_ttl > 0 else None
+        )
+
+    def close(self):
+        self.client.close()
+
+    def search_key(self):
+        return search_key(self.args.server, *sorted(self.category))
 
-    def get_biorxiv(self, max_results=30):
+    def get_biorxiv(self, max_results=30, since: Optional[str] = None):
+        """
+        Builds the search; with a high-water mark `since`, the interval starts
+        no earlier than the day of the mark.
+        """
         if self.args.days is not None:
-            return biorxiv.Search(
-                days=self.args.days,
-                server=self.args.server,
-                max_results=max_results,
-            )
+            today = datetime.date.today()
+            start_date = (today - datetime.timedelta(days=self.args.days)).isoformat()
+            end_date = today.isoformat()
         else:
             start_date, end_date = self.args.date.strip().split(":")
+
+        if since is not None and since[:10] > start_date:
+            start_date = since[:10]
+        elif self.args.days is not None:
             return biorxiv.Search(
-                start_date=start_date,
-                end_date=end_date,
+                days=self.args.days,
                 server=self.args.server,
+                categories=self.category,
                 max_results=max_results,
             )
 
-    def filter_arxiv(self, max_results=30) -> list[biorxiv.Result]:
-        search = self.get_biorxiv(max_results=max_results)
-        results = list(search.results())
+        return biorxiv.Search(
+            start_date=start_date,
+            end_date=end_date,
+            server=self.args.server,
+            categories=self.category,
+            max_results=max_results,
+        )
+
+    def needs_ranking(self) -> bool:
+        return bool(self.filter_keys) or (
+            self.top_k is not None or self.min_score is not None
+        )
+
+    async def _filter_arxiv(
+        self, max_results=30, session: Optional[aiohttp.ClientSession] = None
+    ) -> list[biorxiv.Result]:
+        with MetadataIndex() as index:
+            mark = (
+                index.high_water_mark(self.search_key()) if self.incremental else None
+            )
+            search = self.get_biorxiv(max_results=max_results, since=mark)
+            results = [
+                result async for result in self.client.aresults(search, session=session)
+            ]
+            if self.incremental:
+                results = index.sync(self.search_key(), results)
+            else:
+                index.record_sync(self.search_key(), results)
 
         logger.info("All search:")
         for index, result in enumerate(results):
@@ -83,24 +145,27 @@ class Reader(AsyncBaseReader):
                 f"{index=}, title={result.title} {result.date.strftime('%Y-%m-%d')}"
             )
 
-        # if self.filter_keys is empty then do not filter out
-        if not self.filter_keys:
-            return results
-
-        filter_results = []
-
-        logger.info(f"filter_keys {self.filter_keys}")
-        # 确保每个关键词都能在摘要中找到，才算是目标论文
-        for index, result in enumerate(results):
-            abs_text = result.abstract.replace("-\n", "-").replace("\n", " ").lower()
-            meet_num = 0
+        return self.rank(results)
 
-            for f_key in self.filter_keys:
-                if f_key.lower() in abs_text:
-                    meet_num += 1
+    def rank(self, results: list[biorxiv.Result]) -> list[biorxiv.Result]:
+        # if neither filter keys nor a cutoff is given then do not filter out
+        if not self.needs_ranking():
+            return results
 
-            if meet_num == len(self.filter_keys):
-                filter_results.append(result)
+        rank_query = " ".join(self.filter_keys or self.category)
+        logger.info(f"rank_query: {rank_query}")
+        documents = [
+            result.title + " " + result.abstract.replace("-\n", "-").replace("\n", " ")
+            for result in results
+        ]
+        filter_results = rank_results(
+            results,
+            documents,
+            rank_query,
+            top_k=self.top_k,
+            min_score=self.min_score,
+            required=self.filter_keys,
+        )
 
         logger.info(f"filter_results: {len(filter_results)}")
         logger.info("filter_papers:")
@@ -111,50 +176,48 @@ class Reader(AsyncBaseReader):
 
         return filter_results
 
-    def download_pdf(self, filter_results):
-        return asyncio.run(self._download_pdf(filter_results))
-
-    @staticmethod
-    def create_paper(results_mapping, paper_path):
-        result = results_mapping[paper_path.name]
-        paper = Paper(
-            path=paper_path,
-            url=result.entry_id,
-            title=result.title,
-            abs=result.abstract.replace("-\n", "-").replace("\n", " "),
-            authers=[str(aut) for aut in result.authors.split(",")],
-        )
-
-        return paper
+    def fetch_and_summarize(self, max_results=30, key_words=""):
+        return asyncio.run(self._fetch_and_summarize(max_results, key_words))
+
+    async def _fetch_and_summarize(self, max_results=30, key_words=""):
+        """
+        Searches, downloads and summarizes in one pipeline over one pooled
+        session.
+
+        Without ranking, every new result enters the pipeline as soon as the
+        search yields it.
+        """
+        async with create_session() as session:
+            if self.needs_ranking():
+                results = await self._filter_arxiv(max_results, session)
+            else:
+                results = self._new_results(max_results, session)
+            return await self.summarize_results(
+                self.provider, results, self.pdf_path(), session, key_words
+            )
 
-    async def _download_pdf(self, filter_results):
+    async def _new_results(self, max_results, session):
+        with MetadataIndex() as index:
+            mark = (
+                index.high_water_mark(self.search_key()) if self.incremental else None
+            )
+            search = self.get_biorxiv(max_results=max_results, since=mark)
+            results = []
+            async for result in self.client.aresults(search, session=session):
+                results.append(result)
+                if index.is_new(result, mark):
+                    logger.info(
+                        f"index={len(results) - 1}, title={result.title} {result.date.strftime('%Y-%m-%d')}"
+                    )
+                    yield result
+            index.record_sync(self.search_key(), results)
+
+    def pdf_path(self):
         date_str = str(datetime.datetime.now())[:13].replace(" ", "-")
         category_str = "-".join([c for c in self.category])
         path = self.root_path / "pdf_files" / f"{category_str}-{date_str}"
         path.mkdir(parents=True, exist_ok=True)
-
-        logger.info(f"All_paper: {len(filter_results)}")
-
-        paper_list = []
-        tasks = []
-        results_mapping = {}
-
-        async with aiohttp.ClientSession() as session:
-            for _, result in enumerate(filter_results):
-                title_str = self.validateTitle(result.title)
-                pdf_name = title_str + ".pdf"
-                tasks.append(result.download_pdf(session, path.as_posix(), pdf_name))
-                results_mapping[pdf_name] = result
-
-            for done_task in asyncio.as_completed(tasks):
-                try:
-                    paper_path = await done_task
-                    paper_list.append(self.create_paper(results_mapping, paper_path))
-
-                except Exception as e:
-                    logger.warning(f"download_error: {e}")
-
-        return paper_list
+        return path
 
     def show_info(self):
         categories = ",".join(self.category)
@@ -174,6 +237,7 @@ CATEGORY_LIST = [
     "bioinformatics",
     "biophysics",
     "cancer biology",
+    "cell biology",
     "clinical trials",
     "developmental biology",
     "ecology",
@@ -267,12 +331,11 @@ def add_subcommand(parser):
         "-c",
         "--category",
         type=str,
-        default="bioinformatics",
         choices=CATEGORY_LIST,
         action="extend",
         nargs="+",
         metavar="",
-        help="the category of user research fields (default: %(default)s)",
+        help="the categories of user research fields, only papers of these categories are fetched (default: bioinformatics)",
     )
     subparser.add_argument(
         "--filter-keys",
@@ -280,7 +343,59 @@ def add_subcommand(parser):
         action="extend",
         nargs="+",
         metavar="",
-        help="the filter key words, every word in the abstract must have, otherwise it will not be selected as the target paper",
+        help="the filter key words, only papers whose title or abstract contains every key are kept, ranked by their relevance to these words",
+    )
+
+    subparser.add_argument(
+        "--top-k",
+        type=int,
+        metavar="",
+        help="only download the k most relevant papers (default: %(default)s)",
+    )
+
+    subparser.add_argument(
+        "--min-score",
+        type=float,
+        metavar="",
+        help="only download papers whose relevance score is at least this value (default: %(default)s)",
+    )
+
+    subparser.add_argument(
+        "--incremental",
+        action="store_true",
+        help="only handle papers that are new since the last run of the same categories, see `chatre search`",
+    )
+
+    subparser.add_argument(
+        "--cache-ttl",
+        type=float,
+        default=0,
+        metavar="",
+        help="reuse the API result pages fetched in the last this many seconds, 0 disables the cache (default: %(default)s)",
+    )
+
+    subparser.add_argument(
+        "--source",
+        type=str,
+        default="pdf",
+        choices=["pdf", "jats"],
+        metavar="",
+        help="read papers from their PDF or their JATS XML, jats falls back to the PDF when the XML has no sections (default: %(default)s)",
+    )
+
+    subparser.add_argument(
+        "--keep-pdf",
+        action="store_true",
+        help="keep the downloaded PDFs in the PDF store and the pdf_files folder, otherwise they are only read in memory",
+    )
+
+    subparser.add_argument(
+        "--digest",
+        type=str,
+        default=None,
+        choices=["single", "merge"],
+        metavar="",
+        help="also collect the summaries into one dated digest with a table of contents, rendered by one pandoc run (single) or merged from the per-paper PDFs (merge, pdf format only) (default: %(default)s)",
     )
 
     subparser.add_argument(
@@ -305,20 +420,22 @@ def main(args):
         category=args.category,
         filter_keys=args.filter_keys,
         sort=sort,
+        top_k=args.top_k,
+        min_score=args.min_score,
         args=args,
     )
 
-    reader.show_info()
-    filter_results = reader.filter_arxiv(max_results=args.max_results)
-    paper_list = reader.download_pdf(filter_results)
-
-    key_words = ",".join(reader.category)
-    reader.summary_with_chat(paper_list, key_words)
+    with reader:
+        reader.show_info()
+        key_words = ",".join(reader.category)
+        reader.fetch_and_summarize(max_results=args.max_results, key_words=key_words)
     reader.show_token_usage()
 
 
 def cli(args):
-    if not isinstance(args.category, list):
+    if args.category is None:
+        args.category = ["bioinformatics"]
+    elif not isinstance(args.category, list):
         args.category = [args.category]
 
     parser = Params(**vars(args))
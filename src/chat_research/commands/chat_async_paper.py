@@ -1,26 +1,69 @@
 import asyncio
 import datetime
 import os
+import re
 from pathlib import Path
 from typing import Optional
 
-import aiohttp
 from loguru import logger
 from pydantic import BaseModel, validator
 
 from ..areader import AsyncBaseReader
+from ..index import MetadataIndex, record_from_result, result_mark, search_key
 from ..paper_with_image import Paper
 from ..provider import async_arxiv as arxiv
+from ..provider.base import ArxivProvider
+from ..provider.cache import PageCache
+from ..provider.http import create_session
+from ..ranker import rank_results
+
+ID_CHUNK_SIZE = 100
+"""The number of IDs requested per `id_list` search."""
+
+_ARXIV_ID = re.compile(
+    r"(?:arxiv\.org/(?:abs|pdf)/|arxiv:)?"
+    r"(?P<id>\d{4}\.\d{4,5}|[a-z-]+(?:\.[A-Z]{2})?/\d{7})(?:v(?P<version>\d+))?",
+    re.IGNORECASE,
+)
+
+
+def read_ids(path) -> list[tuple[str, Optional[str]]]:
+    """
+    Reads `(id, version)` pairs from a file of arXiv IDs, one per line.
+
+    Lines may hold bare IDs, `arXiv:` prefixed IDs or abs/pdf URLs; blank lines,
+    `#` comments and repeated IDs are skipped.
+    """
+    ids = {}
+    with open(path, encoding="utf-8") as f:
+        for line in f:
+            line = line.split("#", 1)[0].strip()
+            if not line:
+                continue
+            match = _ARXIV_ID.search(line)
+            if match is None:
+                logger.warning(f"not an arXiv ID: {line}")
+                continue
+            ids.setdefault(match["id"], match["version"])
+    return list(ids.items())
 
 
 class PaperParams(BaseModel):
     pdf: str
+    ids_file: Optional[str] = None
     query: str
     key_word: str
     filter_keys: Optional[list[str]] = None
+    top_k: Optional[int] = None
+    min_score: Optional[float] = None
+    incremental: bool = False
+    cache_ttl: float = 0
     max_results: int
     sort: str
     save_image: bool
+    keep_pdf: bool = False
+    digest: Optional[str] = None
+    source: str = "pdf"
     file_format: str
     language: str
 
@@ -30,6 +73,12 @@ class PaperParams(BaseModel):
             raise ValueError("pdf_path must exist")
         return v
 
+    @validator("ids_file")
+    def ids_file_must_exist(cls, v):
+        if v is not None and not Path(v).is_file():
+            raise ValueError("ids_file must exist")
+        return v
+
 
 class Reader(AsyncBaseReader):
     def __init__(
@@ -40,6 +89,10 @@ class Reader(AsyncBaseReader):
         root_path=".",
         sort=arxiv.SortCriterion.SubmittedDate,
         user_name="defualt",
+        top_k=None,
+        min_score=None,
+        incremental=False,
+        cache_ttl=0,
         args=None,
     ):
         if args is None:
@@ -57,6 +110,9 @@ class Reader(AsyncBaseReader):
             language,
             args.file_format,
             args.save_image,
+            keep_pdf=args.keep_pdf,
+            digest=args.digest,
+            source=args.source,
         )
 
         self.user_name = user_name  # name of the reader
@@ -64,6 +120,16 @@ class Reader(AsyncBaseReader):
         self.filter_keys = filter_keys  # keywords used to filter abstracts
         self.query = query  # search query entered by the reader
         self.sort = sort  # sorting method selected by the reader
+        self.top_k = top_k  # keep at most this many ranked papers
+        self.min_score = min_score  # minimum relevance score of a kept paper
+        self.incremental = incremental  # only keep papers new since the last run
+        self.provider = ArxivProvider(sort_by=sort)
+        self.client = arxiv.AsyncClient(
+            cache=PageCache(cache_ttl) if cache_ttl > 0 else None
+        )
+
+    def close(self):
+        self.client.close()
 
     def get_arxiv(self, max_results=30):
         search = arxiv.Search(
@@ -74,9 +140,19 @@ class Reader(AsyncBaseReader):
         )
         return search
 
-    def filter_arxiv(self, max_results=30):
+    def search_key(self):
+        return search_key("arxiv", self.query, self.sort.value)
+
+    async def _filter_arxiv(self, max_results=30, session=None):
         search = self.get_arxiv(max_results=max_results)
-        results = list(search.results())
+        with MetadataIndex() as index:
+            if self.incremental:
+                mark = index.high_water_mark(self.search_key())
+                results = await self.fetch_results(search, mark, session)
+                results = index.sync(self.search_key(), results)
+            else:
+                results = await self.fetch_results(search, session=session)
+                index.record_sync(self.search_key(), results)
 
         logger.info("All search:")
         for index, result in enumerate(results):
@@ -84,22 +160,27 @@ class Reader(AsyncBaseReader):
                 f"{index=}, title={result.title} {result.updated.strftime('%Y-%m-%d')}"
             )
 
-        # if self.filter_keys is empty then do not filter out
-        if not self.filter_keys:
-            return results
+        return self.rank(results)
 
-        filter_results = []
+    def rank(self, results):
+        # if neither filter keys nor a cutoff is given then do not filter out
+        if not self.filter_keys and self.top_k is None and self.min_score is None:
+            return results
 
-        logger.info(f"filter_keys {self.filter_keys}")
-        # 确保每个关键词都能在摘要中找到，才算是目标论文
-        for index, result in enumerate(search.results()):
-            abs_text = result.summary.replace("-\n", "-").replace("\n", " ")
-            meet_num = 0
-            for f_key in self.filter_keys:
-                if f_key.lower() in abs_text.lower():
-                    meet_num += 1
-            if meet_num == len(self.filter_keys):
-                filter_results.append(result)
+        rank_query = " ".join(self.filter_keys) if self.filter_keys else self.key_word
+        logger.info(f"rank_query: {rank_query}")
+        documents = [
+            result.title + " " + result.summary.replace("-\n", "-").replace("\n", " ")
+            for result in results
+        ]
+        filter_results = rank_results(
+            results,
+            documents,
+            rank_query,
+            top_k=self.top_k,
+            min_score=self.min_score,
+            required=self.filter_keys,
+        )
 
         logger.info(f"filter_results: {len(filter_results)}")
         logger.info("filter_papers:")
@@ -110,22 +191,75 @@ class Reader(AsyncBaseReader):
 
         return filter_results
 
-    def download_pdf(self, filter_results):
-        return asyncio.run(self._download_pdf(filter_results))
-
-    @staticmethod
-    def create_paper(results_mapping, paper_path):
-        result = results_mapping[paper_path.name]
-        paper = Paper(
-            path=paper_path,
-            url=result.entry_id,
-            title=result.title,
-            abs=result.summary.replace("-\n", "-").replace("\n", " "),
-            authers=[str(aut) for aut in result.authors],
+    async def fetch_results(self, search, mark=None, session=None):
+        """
+        Collects the results of a search.
+
+        When the search is sorted by descending update date, fetching stops at
+        the first result older than the high-water mark `mark`.
+        """
+        stop_early = (
+            mark is not None
+            and search.sort_by == arxiv.SortCriterion.LastUpdatedDate
+            and search.sort_order == arxiv.SortOrder.Descending
         )
-        return paper
+        results = []
+        async for result in self.client.aresults(search, session=session):
+            if stop_early and result_mark(result) < mark:
+                break
+            results.append(result)
+        return results
+
+    async def _fetch_ids(self, ids, session, chunk_size=ID_CHUNK_SIZE):
+        """
+        Looks up `(id, version)` pairs, in their order.
+
+        Versioned IDs already in the local index are served from it; the others
+        are requested `chunk_size` at a time through the rate-limited client.
+        An unversioned ID always goes to the API, since the index may only hold
+        an older version than the latest one.
+        """
+        found = {}
+        missing = []
+        with MetadataIndex() as index:
+            for paper_id, version in ids:
+                record = index.lookup("arxiv", paper_id, version) if version else None
+                if record is not None:
+                    found[paper_id] = arxiv.Result.from_record(record)
+                else:
+                    missing.append(f"{paper_id}v{version}" if version else paper_id)
+            logger.info(f"{len(found)} IDs found in the index, fetching {len(missing)}")
+
+            if missing:
+                fetched = await self._fetch_id_chunks(missing, chunk_size, session)
+                index.add(fetched)
+                for result in fetched:
+                    paper_id = record_from_result(result).paper_id
+                    found[paper_id] = result
+
+        results = []
+        for paper_id, _ in ids:
+            if paper_id in found:
+                results.append(found[paper_id])
+            else:
+                logger.warning(f"arXiv ID not found: {paper_id}")
+        return results
+
+    async def _fetch_id_chunks(self, ids, chunk_size, session):
+        chunks = [ids[i : i + chunk_size] for i in range(0, len(ids), chunk_size)]
+        # the client's limiter spaces the chunk requests out
+        pages = await asyncio.gather(
+            *(
+                self.fetch_results(
+                    arxiv.Search(id_list=chunk, max_results=len(chunk)),
+                    session=session,
+                )
+                for chunk in chunks
+            )
+        )
+        return [result for page in pages for result in page]
 
-    async def _download_pdf(self, filter_results):
+    def pdf_path(self):
         date_str = str(datetime.datetime.now())[:13].replace(" ", "-")
         query_str = (
             self.query.replace("au:", "")
@@ -137,28 +271,25 @@ class Reader(AsyncBaseReader):
         path = self.root_path / "pdf_files" / f"{query_str}-{date_str}"
 
         path.mkdir(parents=True, exist_ok=True)
-        logger.info(f"All_paper: {len(filter_results)}")
-
-        paper_list = []
-        tasks = []
-        results_mapping = {}
-
-        async with aiohttp.ClientSession() as session:
-            for _, result in enumerate(filter_results):
-                title_str = self.validateTitle(result.title)
-                pdf_name = title_str + ".pdf"
-                tasks.append(result.download_pdf(session, path.as_posix(), pdf_name))
-                results_mapping[pdf_name] = result
-
-            for done_task in asyncio.as_completed(tasks):
-                try:
-                    paper_path = await done_task
-                    paper_list.append(self.create_paper(results_mapping, paper_path))
-
-                except Exception as e:
-                    logger.warning(f"download_error: {e}")
-
-        return paper_list
+        return path
+
+    def fetch_and_summarize(self, max_results=30, ids=None):
+        return asyncio.run(self._fetch_and_summarize(max_results, ids))
+
+    async def _fetch_and_summarize(self, max_results=30, ids=None):
+        """
+        Searches, or looks up `ids`, then downloads and summarizes the kept
+        results in one pipeline over one pooled session.
+        """
+        async with create_session() as session:
+            if ids is not None:
+                filter_results = self.rank(await self._fetch_ids(ids, session))
+            else:
+                filter_results = await self._filter_arxiv(max_results, session)
+            logger.info(f"All_paper: {len(filter_results)}")
+            return await self.summarize_results(
+                self.provider, filter_results, self.pdf_path(), session, self.key_word
+            )
 
     def show_info(self):
         logger.info(f"Key word: {self.key_word}")
@@ -181,6 +312,13 @@ def add_subcommand(parser):
         help="if none, the bot will download from arxiv with query",
     )
 
+    subparser.add_argument(
+        "--ids-file",
+        type=str,
+        metavar="",
+        help="a file of arXiv IDs or URLs, one per line, to fetch and summary instead of searching",
+    )
+
     subparser.add_argument(
         "-q",
         "--query",
@@ -242,7 +380,59 @@ def add_subcommand(parser):
         action="extend",
         nargs="+",
         metavar="",
-        help="the filter key words, every word in the abstract must have, otherwise it will not be selected as the target paper",
+        help="the filter key words, only papers whose title or abstract contains every key are kept, ranked by their relevance to these words",
+    )
+
+    subparser.add_argument(
+        "--top-k",
+        type=int,
+        metavar="",
+        help="only download the k most relevant papers (default: %(default)s)",
+    )
+
+    subparser.add_argument(
+        "--min-score",
+        type=float,
+        metavar="",
+        help="only download papers whose relevance score is at least this value (default: %(default)s)",
+    )
+
+    subparser.add_argument(
+        "--incremental",
+        action="store_true",
+        help="only handle papers that are new since the last run of the same query, see `chatre search`",
+    )
+
+    subparser.add_argument(
+        "--cache-ttl",
+        type=float,
+        default=0,
+        metavar="",
+        help="reuse the API result pages fetched in the last this many seconds, 0 disables the cache (default: %(default)s)",
+    )
+
+    subparser.add_argument(
+        "--source",
+        type=str,
+        default="pdf",
+        choices=["pdf", "latex"],
+        metavar="",
+        help="read arXiv papers from their PDF or their LaTeX source, latex falls back to the PDF when there is no source (default: %(default)s)",
+    )
+
+    subparser.add_argument(
+        "--keep-pdf",
+        action="store_true",
+        help="keep the downloaded PDFs in the PDF store and the pdf_files folder, otherwise they are only read in memory",
+    )
+
+    subparser.add_argument(
+        "--digest",
+        type=str,
+        default=None,
+        choices=["single", "merge"],
+        metavar="",
+        help="also collect the summaries into one dated digest with a table of contents, rendered by one pandoc run (single) or merged from the per-paper PDFs (merge, pdf format only) (default: %(default)s)",
     )
 
     subparser.add_argument(
@@ -264,43 +454,62 @@ def main(args):
         sort = arxiv.SortCriterion.Relevance
 
     if args.pdf:
-        reader = Reader(
+        with Reader(
             key_word=args.key_word,
             query=args.query,
             filter_keys=args.filter_keys,
             sort=sort,
+            top_k=args.top_k,
+            min_score=args.min_score,
+            incremental=args.incremental,
+            cache_ttl=args.cache_ttl,
             args=args,
-        )
-        reader.show_info()
-        paper_list = []
-        if args.pdf.endswith(".pdf"):
-            paper_list.append(Paper(path=args.pdf))
-            logger.info(f"read pdf file {args.pdf}")
-        else:
-            logger.info(f"read pdf files from path {args.pdf}")
-            for root, dirs, files in os.walk(args.pdf):
-                logger.trace(f"root: {root}, dirs: {dirs}, files: {files}")
-                for filename in files:
-                    if filename.endswith(".pdf"):
-                        paper_list.append(Paper(path=os.path.join(root, filename)))
-
-        logger.info("paper_num: {}".format(len(paper_list)))
-        for paper_index, paper in enumerate(paper_list):
-            name = Path(paper.path).name
-            logger.info(f"{paper_index=}, {name=}")
-        reader.summary_with_chat(paper_list=paper_list, key_words=reader.key_word)
+        ) as reader:
+            reader.show_info()
+            paper_list = []
+            if args.pdf.endswith(".pdf"):
+                paper_list.append(Paper(path=args.pdf))
+                logger.info(f"read pdf file {args.pdf}")
+            else:
+                logger.info(f"read pdf files from path {args.pdf}")
+                for root, dirs, files in os.walk(args.pdf):
+                    logger.trace(f"root: {root}, dirs: {dirs}, files: {files}")
+                    for filename in files:
+                        if filename.endswith(".pdf"):
+                            paper_list.append(Paper(path=os.path.join(root, filename)))
+
+            logger.info("paper_num: {}".format(len(paper_list)))
+            for paper_index, paper in enumerate(paper_list):
+                name = Path(paper.path).name
+                logger.info(f"{paper_index=}, {name=}")
+            reader.summary_with_chat(paper_list=paper_list, key_words=reader.key_word)
+    elif args.ids_file:
+        with Reader(
+            key_word=args.key_word,
+            query=f"ids-{Path(args.ids_file).stem}",
+            filter_keys=args.filter_keys,
+            sort=sort,
+            top_k=args.top_k,
+            min_score=args.min_score,
+            cache_ttl=args.cache_ttl,
+            args=args,
+        ) as reader:
+            reader.show_info()
+            reader.fetch_and_summarize(ids=read_ids(args.ids_file))
     else:
-        reader = Reader(
+        with Reader(
             key_word=args.key_word,
             query=args.query,
             filter_keys=args.filter_keys,
             sort=sort,
+            top_k=args.top_k,
+            min_score=args.min_score,
+            incremental=args.incremental,
+            cache_ttl=args.cache_ttl,
             args=args,
-        )
-        reader.show_info()
-        filter_results = reader.filter_arxiv(max_results=args.max_results)
-        paper_list = reader.download_pdf(filter_results)
-        reader.summary_with_chat(paper_list=paper_list, key_words=reader.key_word)
+        ) as reader:
+            reader.show_info()
+            reader.fetch_and_summarize(max_results=args.max_results)
 
     reader.show_token_usage()
 
@@ -0,0 +1,174 @@
+import gzip
+import json
+import time
+from pathlib import Path
+from typing import Iterator, Optional
+
+from loguru import logger
+from pydantic import BaseModel, validator
+
+from ..index import MetadataIndex
+from ..provider import async_arxiv as arxiv
+
+
+class IngestParams(BaseModel):
+    snapshot: str
+    category: Optional[list[str]] = None
+    date: Optional[str] = None
+    filter_keys: Optional[list[str]] = None
+    batch_size: int
+
+    @validator("snapshot")
+    def snapshot_must_exist(cls, v):
+        if not Path(v).is_file():
+            raise ValueError("snapshot must be an existing file")
+        return v
+
+
+def read_snapshot(path) -> Iterator[dict]:
+    """
+    Streams the records of a JSON-lines metadata snapshot, optionally gzipped.
+    """
+    opener = gzip.open if str(path).endswith(".gz") else open
+    with opener(path, "rt", encoding="utf-8") as f:
+        for line_number, line in enumerate(f, 1):
+            if not line.strip():
+                continue
+            try:
+                yield json.loads(line)
+            except json.JSONDecodeError as e:
+                logger.warning(f"skipping line {line_number}: {e}")
+
+
+class SnapshotFilter:
+    """
+    Cheap checks on raw snapshot records, applied before any `Result` is built.
+    """
+
+    def __init__(self, categories=None, date=None, filter_keys=None):
+        # "cs" matches every cs.* category, "cs.LG" only itself
+        self.categories = tuple(categories or ())
+        self.start_date, self.end_date = None, None
+        if date:
+            self.start_date, self.end_date = date.strip().split(":")
+        self.filter_keys = [key.lower() for key in filter_keys or ()]
+
+    def _category_matches(self, category: str) -> bool:
+        return any(
+            category == wanted or category.startswith(wanted + ".")
+            for wanted in self.categories
+        )
+
+    def __call__(self, entry: dict) -> bool:
+        if self.categories and not any(
+            self._category_matches(c) for c in (entry.get("categories") or "").split()
+        ):
+            return False
+
+        if self.start_date is not None:
+            # update_date is an ISO date, so strings compare chronologically
+            update_date = entry.get("update_date") or ""
+            if not self.start_date <= update_date <= self.end_date:
+                return False
+
+        if self.filter_keys:
+            text = f"{entry.get('title', '')} {entry.get('abstract', '')}".lower()
+            if not any(key in text for key in self.filter_keys):
+                return False
+
+        return True
+
+
+def ingest(path, index: MetadataIndex, accept: SnapshotFilter, batch_size: int):
+    """
+    Converts the accepted snapshot records to `Result`s and inserts them into
+    the index in batches, keeping at most one batch in memory.
+
+    Returns:
+        tuple[int, int]: The number of records read and of records indexed.
+    """
+    read = indexed = 0
+    batch = []
+    for entry in read_snapshot(path):
+        read += 1
+        if not accept(entry):
+            continue
+        try:
+            batch.append(arxiv.Result.from_snapshot_entry(entry, metadata_only=True))
+        except (arxiv.MissingFieldError, ValueError) as e:
+            logger.warning(f"skipping record {entry.get('id')}: {e}")
+            continue
+
+        if len(batch) >= batch_size:
+            indexed += index.add(batch)
+            batch.clear()
+            logger.info(f"read {read} records, indexed {indexed}")
+
+    if batch:
+        indexed += index.add(batch)
+    return read, indexed
+
+
+def add_subcommand(parser):
+    name = "ingest"
+    subparser = parser.add_parser(
+        name, help="Fill the local index from an arXiv metadata snapshot"
+    )
+
+    subparser.add_argument(
+        "--snapshot",
+        type=str,
+        required=True,
+        metavar="",
+        help="the arxiv-metadata JSON-lines file, optionally .gz",
+    )
+
+    subparser.add_argument(
+        "-c",
+        "--category",
+        type=str,
+        action="extend",
+        nargs="+",
+        metavar="",
+        help="only ingest papers of these categories, e.g. cs.LG or cs (default: all)",
+    )
+
+    subparser.add_argument(
+        "--date",
+        type=str,
+        metavar="",
+        help="only ingest papers last updated in this range (example 2018-08-21:2018-08-28)",
+    )
+
+    subparser.add_argument(
+        "--filter-keys",
+        type=str,
+        action="extend",
+        nargs="+",
+        metavar="",
+        help="only ingest papers whose title or abstract contains one of these words",
+    )
+
+    subparser.add_argument(
+        "--batch-size",
+        type=int,
+        default=5000,
+        metavar="",
+        help="the number of records inserted per transaction (default: %(default)s)",
+    )
+
+    return name
+
+
+def main(args):
+    accept = SnapshotFilter(args.category, args.date, args.filter_keys)
+    start = time.perf_counter()
+    with MetadataIndex() as index:
+        read, indexed = ingest(args.snapshot, index, accept, args.batch_size)
+    elapsed = time.perf_counter() - start
+    logger.info(f"indexed {indexed} of {read} records in {elapsed:.1f}s")
+
+
+def cli(args):
+    parameters = IngestParams(**vars(args))
+    main(parameters)
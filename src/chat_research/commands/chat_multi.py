@@ -0,0 +1,272 @@
+import asyncio
+import datetime
+import itertools
+from typing import Optional
+
+from loguru import logger
+from pydantic import BaseModel
+
+from ..areader import AsyncBaseReader
+from ..provider.base import (
+    ArxivProvider,
+    BiorxivProvider,
+    LocalProvider,
+    MedrxivProvider,
+    multi_search,
+)
+from ..provider.http import create_session
+from ..ranker import rank_results
+from .chat_async_biorxiv import CATEGORY_LIST
+
+PROVIDER_NAMES = ["arxiv", "biorxiv", "medrxiv", "local"]
+
+
+class MultiParams(BaseModel):
+    query: str
+    providers: Optional[list[str]] = None
+    category: Optional[list[str]] = None
+    days: int
+    local_dir: str
+    max_results: int
+    top_k: Optional[int] = None
+    save_image: bool
+    keep_pdf: bool = False
+    source: str = "pdf"
+    digest: Optional[str] = None
+    file_format: str
+    language: str
+
+
+def create_providers(args) -> list:
+    providers = []
+    for name in args.providers:
+        if name == "arxiv":
+            providers.append(ArxivProvider())
+        elif name == "biorxiv":
+            providers.append(BiorxivProvider(args.category or [], days=args.days))
+        elif name == "medrxiv":
+            providers.append(MedrxivProvider(args.category or [], days=args.days))
+        elif name == "local":
+            providers.append(LocalProvider(args.local_dir))
+    return providers
+
+
+class Reader(AsyncBaseReader):
+    def __init__(self, query, providers, top_k=None, root_path=".", args=None):
+        if args is None:
+            raise ValueError("args is None")
+
+        if args.language == "zh":
+            language = "Chinese"
+        else:
+            language = "English"
+
+        super().__init__(
+            root_path,
+            language,
+            args.file_format,
+            args.save_image,
+            keep_pdf=args.keep_pdf,
+            digest=args.digest,
+            source=args.source,
+        )
+
+        self.query = query  # search query entered by the reader
+        self.providers = providers  # sources searched concurrently
+        self.top_k = top_k  # keep at most this many merged papers
+
+    def pdf_path(self):
+        date_str = str(datetime.datetime.now())[:13].replace(" ", "-")
+        query_str = "-".join(self.query.split())[:25]
+        path = self.root_path / "pdf_files" / f"multi-{query_str}-{date_str}"
+        path.mkdir(parents=True, exist_ok=True)
+        return path
+
+    def rank(self, pairs):
+        """
+        Keeps the `top_k` merged papers most relevant to the query.
+        """
+        documents = []
+        for provider, result in pairs:
+            metadata = provider.metadata(result)
+            documents.append(metadata.title + " " + metadata.abstract)
+        pairs = rank_results(pairs, documents, self.query, top_k=self.top_k)
+        logger.info(f"filter_results: {len(pairs)}")
+        return pairs
+
+    def fetch_and_summarize(self, max_results=20):
+        return asyncio.run(self._fetch_and_summarize(max_results))
+
+    async def _fetch_and_summarize(self, max_results=20):
+        """
+        Searches every provider, then downloads and summarizes the merged
+        papers in one pipeline over one pooled session.
+
+        Without `top_k`, every paper enters the pipeline as soon as a search
+        yields it.
+        """
+        async with create_session() as session:
+            pairs = self._merged_results(max_results, session)
+            if self.top_k is not None:
+                pairs = self.rank([pair async for pair in pairs])
+            return await self.summarize_pairs(
+                pairs, self.pdf_path(), session, self.query
+            )
+
+    async def _merged_results(self, max_results, session):
+        index = itertools.count()
+        async for provider, result in multi_search(
+            self.providers, self.query, max_results, session
+        ):
+            metadata = provider.metadata(result)
+            logger.info(
+                f"index={next(index)}, {provider.name}: {metadata.title or metadata.key}"
+            )
+            yield provider, result
+
+    def show_info(self):
+        logger.info(f"Query: {self.query}")
+        logger.info(f"Providers: {', '.join(p.name for p in self.providers)}")
+
+
+def add_subcommand(parser):
+    name = "multi"
+    subparser = parser.add_parser(
+        name, help="Search several sources at once and summarize the merged papers"
+    )
+
+    subparser.add_argument(
+        "-q",
+        "--query",
+        type=str,
+        required=True,
+        metavar="",
+        help="the words to search for",
+    )
+
+    subparser.add_argument(
+        "-p",
+        "--providers",
+        type=str,
+        choices=PROVIDER_NAMES,
+        action="extend",
+        nargs="+",
+        metavar="",
+        help="the sources to search, of arxiv, biorxiv, medrxiv and local (default: arxiv biorxiv)",
+    )
+
+    subparser.add_argument(
+        "-c",
+        "--category",
+        type=str,
+        choices=CATEGORY_LIST,
+        action="extend",
+        nargs="+",
+        metavar="",
+        help="the bioRxiv/medRxiv categories to search (default: all)",
+    )
+
+    subparser.add_argument(
+        "--days",
+        type=int,
+        default=2,
+        metavar="",
+        help="the last days of bioRxiv/medRxiv papers to search (default: %(default)s)",
+    )
+
+    subparser.add_argument(
+        "--local-dir",
+        type=str,
+        default=".",
+        metavar="",
+        help="the folder searched by the local source (default: %(default)s)",
+    )
+
+    subparser.add_argument(
+        "-m",
+        "--max-results",
+        type=int,
+        default=10,
+        metavar="",
+        help="the maximum number of results of each source (default: %(default)s)",
+    )
+
+    subparser.add_argument(
+        "--top-k",
+        type=int,
+        metavar="",
+        help="only summarize the k merged papers most relevant to the query (default: %(default)s)",
+    )
+
+    subparser.add_argument(
+        "-f",
+        "--file-format",
+        type=str,
+        default="md",
+        choices=["md", "txt", "pdf", "tex"],
+        metavar="",
+        help="the format of the exported file (default: %(default)s)",
+    )
+
+    subparser.add_argument(
+        "-l",
+        "--language",
+        type=str,
+        default="en",
+        metavar="",
+        help="The other output lauguage is English, is en (default: %(default)s)",
+    )
+
+    subparser.add_argument(
+        "--keep-pdf",
+        action="store_true",
+        help="keep the downloaded PDFs in the PDF store and the pdf_files folder, otherwise they are only read in memory",
+    )
+
+    subparser.add_argument(
+        "--source",
+        type=str,
+        default="pdf",
+        choices=["pdf", "latex", "jats"],
+        metavar="",
+        help="read arXiv papers from their LaTeX source (latex) or bioRxiv/medRxiv papers from their JATS XML (jats), falling back to the PDF (default: %(default)s)",
+    )
+
+    subparser.add_argument(
+        "--digest",
+        type=str,
+        default=None,
+        choices=["single", "merge"],
+        metavar="",
+        help="also collect the summaries into one dated digest with a table of contents, rendered by one pandoc run (single) or merged from the per-paper PDFs (merge, pdf format only) (default: %(default)s)",
+    )
+
+    subparser.add_argument(
+        "--save-image",
+        default=False,
+        metavar="",
+        help="save image? It takes a minute or two to save a picture! But pretty (default: %(default)s)",
+    )
+
+    return name
+
+
+def main(args):
+    providers = create_providers(args)
+    reader = Reader(
+        query=args.query,
+        providers=providers,
+        top_k=args.top_k,
+        args=args,
+    )
+    reader.show_info()
+    reader.fetch_and_summarize(max_results=args.max_results)
+    reader.show_token_usage()
+
+
+def cli(args):
+    if args.providers is None:
+        args.providers = ["arxiv", "biorxiv"]
+
+    parameters = MultiParams(**vars(args))
+    main(parameters)
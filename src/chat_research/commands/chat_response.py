@@ -1,22 +1,22 @@
+import asyncio
 import datetime
-import os
+import re
 from pathlib import Path
 
-import openai
+import aiofiles
 import tenacity
-import tiktoken
 from loguru import logger
 from pydantic import BaseModel, validator
 
-from chat_research.utils import report_token_usage
-
-from ..utils import load_config
+from ..aexport import aexport_to_markdown
+from ..areader import AsyncBaseReader
 
 
 class ResponseParams(BaseModel):
     comment_path: str
     file_format: str
     language: str
+    max_concurrency: int = 8
 
     @validator("comment_path")
     def comment_path_must_exist(cls, v):
@@ -25,59 +25,150 @@ class ResponseParams(BaseModel):
         return v
 
 
-class Response:
-    def __init__(self, args=None):
+REVIEWER_PATTERN = re.compile(
+    r"^\s*(?:#\s*(\d+)\s*(?:reviewer|referee)\b.*"
+    r"|(?:reviewer|referee)\s*#?\s*(\d+)\b.*"
+    r"|(?:reviewer|referee)[ \t]*:?[ \t]*)$",
+    re.IGNORECASE | re.MULTILINE,
+)
+CONCERN_PATTERN = re.compile(r"Concern\s*#\s*\d+", re.IGNORECASE)
+
+
+def split_reviewers(comments: str) -> list[tuple[int, str]]:
+    """
+    Splits a review comments file into one unit per reviewer.
+
+    Reviewers are detected by headings such as "#1 Reviewer", "Reviewer 2" or
+    a bare "Reviewer:", and keep the number of their heading; a heading without
+    one continues from the previous number. Text without any heading is treated
+    as a single reviewer.
+    """
+    headings = list(REVIEWER_PATTERN.finditer(comments))
+    if not headings:
+        return [(1, comments.strip())] if comments.strip() else []
+
+    reviewers = []
+    number = 0
+    for index, heading in enumerate(headings):
+        parsed = heading.group(1) or heading.group(2)
+        number = int(parsed) if parsed else number + 1
+        end = headings[index + 1].start() if index + 1 < len(headings) else None
+        text = comments[heading.end() : end].strip()
+        if text:
+            reviewers.append((number, text))
+    return reviewers
+
+
+def split_concerns(text: str, encoding, max_tokens: int) -> list[str]:
+    """
+    Groups the paragraphs of one reviewer into chunks of at most `max_tokens` tokens.
+
+    A paragraph longer than the budget is kept as its own chunk and clipped later.
+    """
+    chunks = []
+    current = []
+    current_tokens = 0
+    for paragraph in re.split(r"\n\s*\n", text):
+        paragraph = paragraph.strip()
+        if not paragraph:
+            continue
+        tokens = len(encoding.encode(paragraph))
+        if current and current_tokens + tokens > max_tokens:
+            chunks.append("\n\n".join(current))
+            current, current_tokens = [], 0
+        current.append(paragraph)
+        current_tokens += tokens
+    if current:
+        chunks.append("\n\n".join(current))
+    return chunks
+
+
+def renumber_concerns(responses: list[str]) -> str:
+    """
+    Joins the responses for the chunks of one reviewer and numbers the concerns consecutively.
+    """
+    counter = 0
+
+    def replace(_):
+        nonlocal counter
+        counter += 1
+        return f"Concern #{counter}"
+
+    return "\n\n".join(
+        CONCERN_PATTERN.sub(replace, response.strip()) for response in responses
+    )
+
+
+class Response(AsyncBaseReader):
+    def __init__(self, root_path=".", args=None):
         if args is None:
             raise ValueError("args is None")
 
         if args.language == "en":
-            self.language = "English"
+            language = "English"
         elif args.language == "zh":
-            self.language = "Chinese"
+            language = "Chinese"
         else:
-            self.language = "Chinese"
-
-        self.config, self.chat_api_list = load_config()
+            language = "Chinese"
+
+        super().__init__(
+            root_path,
+            language,
+            args.file_format,
+            False,
+            max_concurrency=args.max_concurrency,
+        )
 
-        self.cur_api = 0
-        self.file_format = args.file_format
-        self.max_token_num = 4096
-        self.encoding = tiktoken.get_encoding("gpt2")
+        self.response_prompt_token = 1000
+        # leave room in the context window for the generated responses
+        self.max_comment_token = (self.max_token_num - self.response_prompt_token) // 2
 
     def response_by_chatgpt(self, comment_path):
-        htmls = []
-        with open(comment_path, "r", encoding="utf-8") as f:
-            comments = f.read()
+        asyncio.run(self._response_by_chatgpt(comment_path))
+
+    async def _response_by_chatgpt(self, comment_path):
+        async with aiofiles.open(comment_path, "r", encoding="utf-8") as f:
+            comments = await f.read()
+
+        reviewers = split_reviewers(comments)
+        units = []
+        for reviewer_index, reviewer_text in reviewers:
+            for chunk in split_concerns(
+                reviewer_text, self.encoding, self.max_comment_token
+            ):
+                units.append((reviewer_index, chunk))
+        logger.info(f"reviewers: {len(reviewers)}, units: {len(units)}")
+
+        responses = await asyncio.gather(
+            *[self.chat_response(text=chunk) for _, chunk in units]
+        )
+
+        per_reviewer = {}
+        for (reviewer_index, _), response in zip(units, responses):
+            per_reviewer.setdefault(reviewer_index, []).append(response)
 
-        chat_response_text = self.chat_response(text=comments)
-        htmls.append(chat_response_text)
+        htmls = ["- Response to reviewers"]
+        for reviewer_index, reviewer_responses in per_reviewer.items():
+            htmls.append(f"#{reviewer_index} reviewer")
+            htmls.append(renumber_concerns(reviewer_responses))
+            htmls.append("")
 
         # 将审稿意见保存起来
         date_str = str(datetime.datetime.now())[:13].replace(" ", "-")
-        export_path = os.path.join("./", "response_file")
-        if not os.path.exists(export_path):
-            os.makedirs(export_path)
-        file_name = os.path.join(
-            export_path, date_str + "-Response." + self.file_format
-        )
-        self.export_to_markdown("\n".join(htmls), file_name=file_name)
-        htmls = []
+        export_path = self.root_path / "response_file"
+        export_path.mkdir(parents=True, exist_ok=True)
+        file_name = export_path / f"{date_str}-Response.{self.file_format}"
+        await aexport_to_markdown("\n".join(htmls), file_name)
 
     @tenacity.retry(
         wait=tenacity.wait_exponential(multiplier=1, min=4, max=10),
         stop=tenacity.stop_after_attempt(5),
         reraise=True,
     )
-    def chat_response(self, text):
-        openai.api_key = self.chat_api_list[self.cur_api]
-        self.cur_api += 1
-        self.cur_api = (
-            0 if self.cur_api >= len(self.chat_api_list) - 1 else self.cur_api
-        )
-        response_prompt_token = 1000
+    async def chat_response(self, text):
         text_token = len(self.encoding.encode(text))
         input_text_index = int(
-            len(text) * (self.max_token_num - response_prompt_token) / text_token
+            len(text) * (self.max_token_num - self.response_prompt_token) / text_token
         )
         input_text = "This is the review comments:" + text[:input_text_index]
         messages = [
@@ -85,26 +176,9 @@ class Response:
                 "role": "system",
                 "content": """You are the author, you submitted a paper, and the reviewers gave the review comments.
                 Please reply with what we have done, not what we will do.
-                You need to extract questions from the review comments one by one, and then respond point-to-point to the reviewers’ concerns.
+                You need to extract questions from the review comments one by one, and then respond point-to-point to the reviewer’s concerns.
+                The comments all come from the same reviewer.
                 Please answer in {}. Follow the format of the output later:
-                - Response to reviewers
-                #1 reviewer
-                Concern #1: xxxx
-                Author response: xxxxx
-
-                Concern #2: xxxx
-                Author response: xxxxx
-                ...
-
-                #2 reviewer
-                Concern #1: xxxx
-                Author response: xxxxx
-
-                Concern #2: xxxx
-                Author response: xxxxx
-                ...
-
-                #3 reviewer
                 Concern #1: xxxx
                 Author response: xxxxx
 
@@ -119,10 +193,7 @@ class Response:
             {"role": "user", "content": input_text},
         ]
 
-        response = openai.ChatCompletion.create(
-            model="gpt-3.5-turbo",
-            messages=messages,
-        )
+        response = await self.chat_completion(messages)
         result = ""
         for choice in response.choices:
             result += choice.message.content
@@ -130,18 +201,10 @@ class Response:
         logger.info(result)
         logger.info("********" * 10)
 
-        report_token_usage(response)
+        self.report_token_usage(response)
 
         return result
 
-    def export_to_markdown(self, text, file_name, mode="w"):
-        # 使用markdown模块的convert方法，将文本转换为html格式
-        # html = markdown.markdown(text)
-        # 打开一个文件，以写入模式
-        with open(file_name, mode, encoding="utf-8") as f:
-            # 将html格式的内容写入文件
-            f.write(text)
-
 
 def add_subcommand(parser):
     name = "response"
@@ -172,12 +235,21 @@ def add_subcommand(parser):
         help="output language, en or zh (default: %(default)s)",
     )
 
+    subparser.add_argument(
+        "--max-concurrency",
+        type=int,
+        default=8,
+        metavar="",
+        help="the maximum number of chat requests in flight (default: %(default)s)",
+    )
+
     return name
 
 
 def main(args):
     Response1 = Response(args=args)
     Response1.response_by_chatgpt(comment_path=args.comment_path)
+    Response1.show_token_usage()
 
 
 def cli(args):
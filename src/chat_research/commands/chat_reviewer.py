@@ -1,19 +1,16 @@
+import asyncio
 import datetime
 import os
-import re
 from pathlib import Path
 from typing import Optional
 
-import openai
 import tenacity
-import tiktoken
 from loguru import logger
 from pydantic import BaseModel, validator
 
-from chat_research.utils import report_token_usage
-
+from ..aexport import aexport
+from ..areader import AsyncBaseReader
 from ..paper import Paper
-from ..utils import load_config
 
 
 class ReviewerParams(BaseModel):
@@ -22,11 +19,13 @@ class ReviewerParams(BaseModel):
     review_format: Optional[str] = None
     research_fields: str
     language: str
+    max_concurrency: int = 8
 
     @validator("paper_path")
     def paper_path_must_exist(cls, v):
         if not Path(v).exists():
             raise ValueError("paper_path must exist")
+        return v
 
 
 REVIEW_FORMAT = """
@@ -58,29 +57,30 @@ xxx
 """
 
 
-class Reviewer:
+class Reviewer(AsyncBaseReader):
     # 初始化方法，设置属性
-    def __init__(self, args=None):
+    def __init__(self, root_path=".", args=None):
         if args is None:
             raise ValueError("args is None")
 
         if args.language == "en":
-            self.language = "English"
+            language = "English"
         elif args.language == "zh":
-            self.language = "Chinese"
+            language = "Chinese"
         else:
-            self.language = "English"
+            language = "English"
+
+        super().__init__(
+            root_path,
+            language,
+            args.file_format,
+            False,
+            max_concurrency=args.max_concurrency,
+        )
 
         self.research_fields = args.research_fields
         self.review_format = args.review_format
 
-        self.config, self.chat_api_list = load_config()
-
-        self.cur_api = 0
-        self.file_format = args.file_format
-        self.max_token_num = 4096
-        self.encoding = tiktoken.get_encoding("gpt2")
-
     @staticmethod
     def get_review_format(path: Optional[Path]):
         if path is None:
@@ -89,66 +89,73 @@ class Reviewer:
             with open(path, "r") as f:
                 return f.read()
 
-    def validateTitle(self, title):
-        # 修正论文的路径格式
-        rstr = r"[\/\\\:\*\?\"\<\>\|]"  # '/ \ : * ? " < > |'
-        new_title = re.sub(rstr, "_", title)  # 替换为下划线
-        return new_title
-
     def review_by_chatgpt(self, paper_list):
+        asyncio.run(self._review_by_chatgpt(paper_list))
+
+    async def _review_by_chatgpt(self, paper_list):
+        # bound the number of papers under review at the same time
+        paper_semaphore = asyncio.Semaphore(self.max_concurrency)
+
+        async def review(paper_index, paper):
+            async with paper_semaphore:
+                try:
+                    await self.review_one_paper(paper, paper_index)
+                except Exception as e:
+                    logger.error(f"review_error: {paper.path} {e}")
+
+        await asyncio.gather(
+            *[review(index, paper) for index, paper in enumerate(paper_list)]
+        )
+
+    async def review_one_paper(self, paper, paper_index):
+        sections_of_interest = await self.stage_1(paper)
+        # extract the essential parts of the paper
+        text = ""
+        text += "Title:" + paper.title + ". "
+        text += "Abstract: " + paper.section_texts["Abstract"]
+        intro_title = next(
+            (item for item in paper.section_names if "ntroduction" in item.lower()),
+            None,
+        )
+        if intro_title is not None:
+            text += "Introduction: " + paper.section_texts[intro_title]
+        # Similar for conclusion section
+        conclusion_title = next(
+            (item for item in paper.section_names if "onclusion" in item), None
+        )
+        if conclusion_title is not None:
+            text += "Conclusion: " + paper.section_texts[conclusion_title]
+        for heading in sections_of_interest:
+            heading = heading.strip()
+            if heading in paper.section_names:
+                text += heading + ": " + paper.section_texts[heading]
+        chat_review_text = await self.chat_review(text=text)
+
         htmls = []
-        for paper_index, paper in enumerate(paper_list):
-            sections_of_interest = self.stage_1(paper)
-            # extract the essential parts of the paper
-            text = ""
-            text += "Title:" + paper.title + ". "
-            text += "Abstract: " + paper.section_texts["Abstract"]
-            intro_title = next(
-                (item for item in paper.section_names if "ntroduction" in item.lower()),
-                None,
-            )
-            if intro_title is not None:
-                text += "Introduction: " + paper.section_texts[intro_title]
-            # Similar for conclusion section
-            conclusion_title = next(
-                (item for item in paper.section_names if "onclusion" in item), None
-            )
-            if conclusion_title is not None:
-                text += "Conclusion: " + paper.section_texts[conclusion_title]
-            for heading in sections_of_interest:
-                if heading in paper.section_names:
-                    text += heading + ": " + paper.section_texts[heading]
-            chat_review_text = self.chat_review(text=text)
-            htmls.append("## Paper:" + str(paper_index + 1))
-            htmls.append("\n\n\n")
-            htmls.append(chat_review_text)
-
-            # 将审稿意见保存起来
-            date_str = str(datetime.datetime.now())[:13].replace(" ", "-")
-            export_path = os.path.join(self.root_path, "export")
-            if not os.path.exists(export_path):
-                os.makedirs(export_path)
-            mode = "w" if paper_index == 0 else "a"
-            file_name = os.path.join(
-                export_path,
-                date_str
-                + "-"
-                + self.validateTitle(paper.title)
-                + "."
-                + self.file_format,
-            )
-            self.export_to_markdown("\n".join(htmls), file_name=file_name, mode=mode)
-            htmls = []
-
-    def stage_1(self, paper):
+        htmls.append("## Paper:" + str(paper_index + 1))
+        htmls.append("\n\n\n")
+        htmls.append(chat_review_text)
+
+        # 将审稿意见保存起来
+        date_str = str(datetime.datetime.now())[:13].replace(" ", "-")
+        export_path = self.root_path / "export"
+        export_path.mkdir(parents=True, exist_ok=True)
+
+        file_name = export_path / f"{date_str}-{self.validateTitle(paper.title)}"
+        await aexport(
+            content="\n".join(htmls),
+            file_name=file_name.with_suffix(f".{self.file_format}"),
+        )
+
+    @tenacity.retry(
+        wait=tenacity.wait_exponential(multiplier=1, min=4, max=10),
+        stop=tenacity.stop_after_attempt(5),
+        reraise=True,
+    )
+    async def stage_1(self, paper):
         text = ""
         text += "Title: " + paper.title + ". "
         text += "Abstract: " + paper.section_texts["Abstract"]
-        openai.api_key = self.chat_api_list[self.cur_api]
-        self.cur_api += 1
-        self.cur_api = (
-            0 if self.cur_api >= len(self.chat_api_list) - 1 else self.cur_api
-        )
         messages = [
             {
                 "role": "system",
@@ -165,14 +172,12 @@ class Reviewer:
             },
             {"role": "user", "content": text},
         ]
-        response = openai.ChatCompletion.create(
-            model="gpt-3.5-turbo",
-            messages=messages,
-        )
+        response = await self.chat_completion(messages)
         result = ""
         for choice in response.choices:
             result += choice.message.content
         logger.info(result)
+        self.report_token_usage(response)
         return result.split(",")
 
     @tenacity.retry(
@@ -180,12 +185,7 @@ class Reviewer:
         stop=tenacity.stop_after_attempt(5),
         reraise=True,
     )
-    def chat_review(self, text):
-        openai.api_key = self.chat_api_list[self.cur_api]
-        self.cur_api += 1
-        self.cur_api = (
-            0 if self.cur_api >= len(self.chat_api_list) - 1 else self.cur_api
-        )
+    async def chat_review(self, text):
         review_prompt_token = 1000
         text_token = len(self.encoding.encode(text))
         input_text_index = int(
@@ -207,10 +207,7 @@ class Reviewer:
             {"role": "user", "content": input_text},
         ]
 
-        response = openai.ChatCompletion.create(
-            model="gpt-3.5-turbo",
-            messages=messages,
-        )
+        response = await self.chat_completion(messages)
         result = ""
         for choice in response.choices:
             result += choice.message.content
@@ -218,18 +215,10 @@ class Reviewer:
         logger.info(result)
         logger.info("********" * 10)
 
-        report_token_usage(response)
+        self.report_token_usage(response)
 
         return result
 
-    def export_to_markdown(self, text, file_name, mode="w"):
-        # 使用markdown模块的convert方法，将文本转换为html格式
-        # html = markdown.markdown(text)
-        # 打开一个文件，以写入模式
-        with open(file_name, mode, encoding="utf-8") as f:
-            # 将html格式的内容写入文件
-            f.write(text)
-
 
 def add_subcommand(parser):
     name = "reviewer"
@@ -274,6 +263,14 @@ def add_subcommand(parser):
         help="output language, en or zh (default: %(default)s)",
     )
 
+    subparser.add_argument(
+        "--max-concurrency",
+        type=int,
+        default=8,
+        metavar="",
+        help="the maximum number of papers and chat requests in flight (default: %(default)s)",
+    )
+
     return name
 
 
@@ -299,6 +296,7 @@ def main(args):
         logger.info(f"{paper_index}, {paper}")
 
     reviewer1.review_by_chatgpt(paper_list=paper_list)
+    reviewer1.show_token_usage()
 
 
 def cli(args):
@@ -0,0 +1,125 @@
+import asyncio
+import time
+from typing import Optional
+
+from loguru import logger
+from pydantic import BaseModel
+from rich.console import Console
+from rich.table import Table
+
+from ..index import MetadataIndex, search_key
+from ..provider import async_arxiv as arxiv
+
+
+class SearchParams(BaseModel):
+    query: list[str]
+    offline: bool
+    source: Optional[str] = None
+    max_results: int
+    limit: int
+
+
+async def fetch_results(search):
+    return [result async for result in search.aresults()]
+
+
+def sync_arxiv(index: MetadataIndex, query: str, max_results: int):
+    """
+    Fetches the newest arXiv results of the query into the index.
+    """
+    search = arxiv.Search(
+        query=f"all: {query}",
+        max_results=max_results,
+        sort_by=arxiv.SortCriterion.LastUpdatedDate,
+        sort_order=arxiv.SortOrder.Descending,
+    )
+    results = asyncio.run(fetch_results(search))
+    index.record_sync(search_key("arxiv", search.query, search.sort_by.value), results)
+    logger.info(f"fetched {len(results)} results from arxiv")
+
+
+def show_records(records):
+    table = Table(show_lines=False)
+    table.add_column("source")
+    table.add_column("id")
+    table.add_column("updated")
+    table.add_column("title")
+    for record in records:
+        version = f"v{record.version}" if record.version else ""
+        table.add_row(
+            record.source,
+            record.paper_id + version,
+            (record.updated or "")[:10],
+            record.title,
+        )
+    Console().print(table)
+
+
+def add_subcommand(parser):
+    name = "search"
+    subparser = parser.add_parser(name, help="Search the local index of fetched papers")
+
+    subparser.add_argument(
+        "query",
+        type=str,
+        nargs="+",
+        help="the words to search for in titles, abstracts, authors and categories",
+    )
+
+    subparser.add_argument(
+        "--offline",
+        action="store_true",
+        help="only answer from the local index, without fetching from arxiv first",
+    )
+
+    subparser.add_argument(
+        "--source",
+        type=str,
+        choices=["arxiv", "biorxiv", "medrxiv"],
+        metavar="",
+        help="only show papers of this source (default: %(default)s)",
+    )
+
+    subparser.add_argument(
+        "-m",
+        "--max-results",
+        type=int,
+        default=50,
+        metavar="",
+        help="the maximum number of results fetched from arxiv when online (default: %(default)s)",
+    )
+
+    subparser.add_argument(
+        "-n",
+        "--limit",
+        type=int,
+        default=20,
+        metavar="",
+        help="the maximum number of papers shown (default: %(default)s)",
+    )
+
+    return name
+
+
+def main(args):
+    query = " ".join(args.query)
+    with MetadataIndex() as index:
+        if not args.offline:
+            if args.source in (None, "arxiv"):
+                sync_arxiv(index, query, args.max_results)
+            else:
+                logger.warning(
+                    f"{args.source} has no search API, answering from the index"
+                )
+
+        start = time.perf_counter()
+        records = index.search(query, limit=args.limit, source=args.source)
+        elapsed = (time.perf_counter() - start) * 1000
+
+    show_records(records)
+    logger.info(f"{len(records)} papers found in {elapsed:.1f} ms")
+
+
+def cli(args):
+    parameters = SearchParams(**vars(args))
+    main(parameters)
@@ -0,0 +1,230 @@
+"""
+Long-running watch mode: polls the queries configured in the `[Watch]` section
+of chatre.toml and summarizes only the papers not processed before.
+
+Example configuration:
+
+    [Watch]
+    interval_minutes = 60
+
+    [[Watch.arxiv]]
+    query = "all: ChatGPT robot"
+    key_word = "robotics"
+    max_results = 20
+
+    [[Watch.biorxiv]]
+    server = "biorxiv"
+    category = ["bioinformatics", "genomics"]
+    days = 1
+"""
+import asyncio
+from typing import Optional
+
+from loguru import logger
+from pydantic import BaseModel
+
+from ..index import MetadataIndex
+from ..provider import async_arxiv as arxiv
+from ..provider import async_biorxiv as biorxiv
+from ..provider.http import create_session
+from ..utils import load_config
+from . import chat_async_biorxiv, chat_async_paper
+
+ARXIV_DEFAULTS = {
+    "pdf": "",
+    "query": "all: ChatGPT robot",
+    "key_word": "reinforcement learning",
+    "max_results": 20,
+    "sort": "LastUpdatedDate",
+    "save_image": False,
+    "file_format": "md",
+    "language": "en",
+}
+
+BIORXIV_DEFAULTS = {
+    "days": 1,
+    "server": "biorxiv",
+    "category": ["bioinformatics"],
+    "max_results": 20,
+    "sort": "Relevance",
+    "save_image": False,
+    "file_format": "md",
+    "language": "en",
+}
+
+
+class WatchParams(BaseModel):
+    once: bool
+    interval: Optional[float] = None
+
+
+class ArxivJob:
+    """
+    A configured arXiv query with its warm reader.
+    """
+
+    def __init__(self, spec: dict):
+        params = chat_async_paper.PaperParams(**{**ARXIV_DEFAULTS, **spec})
+        self.max_results = params.max_results
+        self.reader = chat_async_paper.Reader(
+            key_word=params.key_word,
+            query=params.query,
+            filter_keys=params.filter_keys,
+            sort=(
+                arxiv.SortCriterion.Relevance
+                if params.sort == "Relevance"
+                else arxiv.SortCriterion.LastUpdatedDate
+            ),
+            top_k=params.top_k,
+            min_score=params.min_score,
+            cache_ttl=params.cache_ttl,
+            args=params,
+        )
+        self.key_words = self.reader.key_word
+
+    def __str__(self) -> str:
+        return f"arxiv({self.reader.query})"
+
+    async def fetch(self, session):
+        search = self.reader.get_arxiv(max_results=self.max_results)
+        return await self.reader.fetch_results(search, session=session)
+
+
+class BiorxivJob:
+    """
+    A configured bioRxiv/medRxiv category watch with its warm reader.
+    """
+
+    def __init__(self, spec: dict):
+        spec = {**BIORXIV_DEFAULTS, **spec}
+        if not isinstance(spec["category"], list):
+            spec["category"] = [spec["category"]]
+        params = chat_async_biorxiv.Params(**spec)
+        self.max_results = params.max_results
+        self.reader = chat_async_biorxiv.Reader(
+            category=params.category,
+            filter_keys=params.filter_keys,
+            sort=biorxiv.SortCriterion.Relevance,
+            top_k=params.top_k,
+            min_score=params.min_score,
+            args=params,
+        )
+        self.key_words = ",".join(self.reader.category)
+
+    def __str__(self) -> str:
+        return f"{self.reader.args.server}({','.join(self.reader.category)})"
+
+    async def fetch(self, session):
+        search = self.reader.get_biorxiv(max_results=self.max_results)
+        return [
+            result
+            async for result in self.reader.client.aresults(search, session=session)
+        ]
+
+
+def load_jobs(config: dict) -> list:
+    watch = config.get("Watch", {})
+    jobs = [ArxivJob(spec) for spec in watch.get("arxiv", [])]
+    jobs += [BiorxivJob(spec) for spec in watch.get("biorxiv", [])]
+    return jobs
+
+
+class Watcher:
+    """
+    Polls every job on a schedule within one event loop, keeping the readers,
+    their tokenizers and one pooled HTTP session alive between polls.
+    """
+
+    def __init__(self, jobs: list, interval_minutes: float, index: MetadataIndex):
+        self.jobs = jobs
+        self.interval_minutes = interval_minutes
+        self.index = index
+
+    async def run_job(self, job, session) -> int:
+        results = await job.fetch(session)
+        self.index.add(results)
+        new_results = [r for r in results if not self.index.is_processed(r)]
+        logger.info(f"{job}: {len(new_results)} new of {len(results)}")
+
+        new_results = job.reader.rank(new_results)
+        if not new_results:
+            return 0
+
+        reader = job.reader
+        paper_list = await reader.summarize_results(
+            reader.provider, new_results, reader.pdf_path(), session, job.key_words
+        )
+
+        # papers that failed to download or summarize are retried on the next poll;
+        # a bioRxiv result read from JATS or the PDF store never gets an
+        # entry_id, so results are matched on their provider's URL
+        summarized = {paper.url for paper in paper_list}
+        self.index.mark_processed(
+            r for r in new_results if reader.provider.metadata(r).url in summarized
+        )
+        return len(paper_list)
+
+    async def poll(self, session) -> None:
+        for job in self.jobs:
+            try:
+                count = await self.run_job(job, session)
+            except Exception as e:
+                logger.error(f"{job}: {e}")
+            else:
+                logger.info(f"{job}: summarized {count} papers")
+
+    async def run(self, once: bool = False) -> None:
+        async with create_session() as session:
+            while True:
+                await self.poll(session)
+                if once:
+                    return
+                logger.info(f"next poll in {self.interval_minutes} minutes")
+                await asyncio.sleep(self.interval_minutes * 60)
+
+
+def add_subcommand(parser):
+    name = "watch"
+    subparser = parser.add_parser(
+        name, help="Keep polling the queries of the [Watch] config section"
+    )
+
+    subparser.add_argument(
+        "--once",
+        action="store_true",
+        help="poll every query once and exit, e.g. when run from cron",
+    )
+
+    subparser.add_argument(
+        "--interval",
+        type=float,
+        metavar="",
+        help="minutes between polls, overrides interval_minutes of the config (default: 60)",
+    )
+
+    return name
+
+
+def main(args):
+    config, _ = load_config()
+    jobs = load_jobs(config)
+    if not jobs:
+        logger.error("No [Watch] queries found in chatre.toml")
+        raise SystemExit
+
+    interval = args.interval or config.get("Watch", {}).get("interval_minutes", 60)
+    try:
+        with MetadataIndex() as index:
+            watcher = Watcher(jobs, interval, index)
+            asyncio.run(watcher.run(once=args.once))
+    finally:
+        for job in jobs:
+            job.reader.close()
+
+    for job in jobs:
+        job.reader.show_token_usage()
+
+
+def cli(args):
+    parameters = WatchParams(**vars(args))
+    main(parameters)
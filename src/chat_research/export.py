@@ -16,15 +16,11 @@ def export(content: str, file_name: Path, keep_md: bool = False):
 
 
 def combine_md(md_files: list[Path], output_file: Path):
-    content = ""
-
-    for i in md_files:
-        with open(i, "r") as f:
-            content += f.read()
-        content += "\n"
-
-    with open(output_file, "w") as f:
-        f.write(content)
+    with open(output_file, "w") as out:
+        for i in md_files:
+            with open(i, "r") as f:
+                shutil.copyfileobj(f, out)
+            out.write("\n")
 
 
 def md2pdf(md_file: Path, pdf_file: Path) -> bool:
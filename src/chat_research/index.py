@@ -0,0 +1,372 @@
+"""
+Module containing the local full-text index of every fetched preprint.
+"""
+import sqlite3
+from datetime import datetime
+from pathlib import Path
+from typing import Iterable, List, NamedTuple, Optional
+
+from loguru import logger
+
+from .utils import CACHE_PATH
+
+INDEX_PATH = CACHE_PATH / "index.sqlite3"
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS papers (
+    rowid INTEGER PRIMARY KEY,
+    source TEXT NOT NULL,
+    paper_id TEXT NOT NULL,
+    version TEXT NOT NULL,
+    title TEXT NOT NULL,
+    abstract TEXT NOT NULL,
+    authors TEXT NOT NULL,
+    categories TEXT NOT NULL,
+    published TEXT,
+    updated TEXT,
+    url TEXT,
+    UNIQUE (source, paper_id, version)
+);
+CREATE VIRTUAL TABLE IF NOT EXISTS papers_fts USING fts5(
+    title, abstract, authors, categories,
+    content='papers', content_rowid='rowid'
+);
+CREATE TRIGGER IF NOT EXISTS papers_ai AFTER INSERT ON papers BEGIN
+    INSERT INTO papers_fts(rowid, title, abstract, authors, categories)
+    VALUES (new.rowid, new.title, new.abstract, new.authors, new.categories);
+END;
+CREATE TRIGGER IF NOT EXISTS papers_ad AFTER DELETE ON papers BEGIN
+    INSERT INTO papers_fts(papers_fts, rowid, title, abstract, authors, categories)
+    VALUES ('delete', old.rowid, old.title, old.abstract, old.authors, old.categories);
+END;
+CREATE TRIGGER IF NOT EXISTS papers_au AFTER UPDATE ON papers BEGIN
+    INSERT INTO papers_fts(papers_fts, rowid, title, abstract, authors, categories)
+    VALUES ('delete', old.rowid, old.title, old.abstract, old.authors, old.categories);
+    INSERT INTO papers_fts(rowid, title, abstract, authors, categories)
+    VALUES (new.rowid, new.title, new.abstract, new.authors, new.categories);
+END;
+CREATE TABLE IF NOT EXISTS processed (
+    source TEXT NOT NULL,
+    paper_id TEXT NOT NULL,
+    version TEXT NOT NULL,
+    processed_at TEXT NOT NULL,
+    PRIMARY KEY (source, paper_id, version)
+);
+CREATE TABLE IF NOT EXISTS sync_state (
+    search_key TEXT PRIMARY KEY,
+    high_water_mark TEXT NOT NULL,
+    synced_at TEXT NOT NULL
+);
+"""
+
+
+class Record(NamedTuple):
+    """
+    One indexed version of a paper.
+    """
+
+    source: str
+    paper_id: str
+    version: str
+    title: str
+    abstract: str
+    authors: str
+    categories: str
+    published: Optional[str]
+    updated: Optional[str]
+    url: Optional[str]
+
+
+def _isoformat(value) -> Optional[str]:
+    return value.isoformat() if isinstance(value, datetime) else value
+
+
+def record_from_result(result) -> Record:
+    """
+    Converts an arXiv or bioRxiv `Result` into an index record.
+
+    Args:
+        result: The search result.
+
+    Returns:
+        Record: The record to index.
+    """
+    if hasattr(result, "doi") and hasattr(result, "server"):
+        # bioRxiv / medRxiv
+        return Record(
+            source=result.server,
+            paper_id=result.doi,
+            version=str(result.version),
+            title=result.title,
+            abstract=result.abstract,
+            authors=result.authors,
+            categories=result.category.api_name,
+            published=_isoformat(result.date),
+            updated=_isoformat(result.date),
+            url=f"https://doi.org/{result.doi}",
+        )
+
+    short_id = result.get_short_id()
+    paper_id, _, version = short_id.rpartition("v")
+    if not paper_id or not version.isdigit():
+        paper_id, version = short_id, ""
+    return Record(
+        source="arxiv",
+        paper_id=paper_id,
+        version=version,
+        title=result.title,
+        abstract=result.summary,
+        authors=", ".join(str(author) for author in result.authors),
+        categories=" ".join(result.categories),
+        published=_isoformat(result.published),
+        updated=_isoformat(result.updated),
+        url=result.entry_id,
+    )
+
+
+def result_mark(result) -> str:
+    """
+    Returns the value a search's high-water mark is advanced to by a result.
+    """
+    if hasattr(result, "doi") and hasattr(result, "server"):
+        return _isoformat(result.date)
+    return _isoformat(result.updated)
+
+
+class MetadataIndex:
+    """
+    SQLite (FTS5) store of the metadata of every fetched preprint, with a
+    high-water mark per search so that later runs only handle what is new.
+    """
+
+    def __init__(self, path: Path = INDEX_PATH):
+        """
+        Opens the index, creating it if needed.
+
+        Args:
+            path (Path): The database file. Defaults to INDEX_PATH.
+        """
+        self.path = Path(path)
+        self.path.parent.mkdir(parents=True, exist_ok=True)
+        self.conn = sqlite3.connect(self.path)
+        self.conn.executescript(SCHEMA)
+
+    def close(self) -> None:
+        self.conn.close()
+
+    def __enter__(self) -> "MetadataIndex":
+        return self
+
+    def __exit__(self, *exc_info) -> None:
+        self.close()
+
+    def __len__(self) -> int:
+        return self.conn.execute("SELECT COUNT(*) FROM papers").fetchone()[0]
+
+    def add_records(self, records: Iterable[Record]) -> int:
+        """
+        Inserts or refreshes records in one transaction.
+
+        Args:
+            records (Iterable[Record]): The records to store.
+
+        Returns:
+            int: The number of records written.
+        """
+        with self.conn:
+            cursor = self.conn.executemany(
+                "INSERT INTO papers (source, paper_id, version, title, abstract, "
+                "authors, categories, published, updated, url) "
+                "VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?) "
+                "ON CONFLICT (source, paper_id, version) DO UPDATE SET "
+                "title = excluded.title, abstract = excluded.abstract, "
+                "authors = excluded.authors, categories = excluded.categories, "
+                "published = excluded.published, updated = excluded.updated, "
+                "url = excluded.url",
+                records,
+            )
+        return cursor.rowcount
+
+    def add(self, results: Iterable) -> int:
+        """
+        Stores arXiv or bioRxiv search results.
+
+        Args:
+            results (Iterable): The search results.
+
+        Returns:
+            int: The number of results written.
+        """
+        count = self.add_records(record_from_result(result) for result in results)
+        logger.debug(f"indexed {count} results")
+        return count
+
+    def contains(self, result) -> bool:
+        """
+        Returns whether this version of a result is already indexed.
+        """
+        record = record_from_result(result)
+        row = self.conn.execute(
+            "SELECT 1 FROM papers WHERE source = ? AND paper_id = ? AND version = ?",
+            (record.source, record.paper_id, record.version),
+        ).fetchone()
+        return row is not None
+
+    def is_processed(self, result) -> bool:
+        """
+        Returns whether this version of a result has been summarized before.
+        """
+        record = record_from_result(result)
+        row = self.conn.execute(
+            "SELECT 1 FROM processed WHERE source = ? AND paper_id = ? AND version = ?",
+            (record.source, record.paper_id, record.version),
+        ).fetchone()
+        return row is not None
+
+    def mark_processed(self, results: Iterable) -> None:
+        """
+        Records results as summarized, so they are skipped from now on.
+        """
+        now = datetime.now().isoformat()
+        with self.conn:
+            self.conn.executemany(
+                "INSERT OR IGNORE INTO processed "
+                "(source, paper_id, version, processed_at) VALUES (?, ?, ?, ?)",
+                (
+                    (record.source, record.paper_id, record.version, now)
+                    for record in map(record_from_result, results)
+                ),
+            )
+
+    def search(
+        self, query: str, limit: int = 20, source: Optional[str] = None
+    ) -> List[Record]:
+        """
+        Full-text search over titles, abstracts, authors and categories.
+
+        Args:
+            query (str): Words to match; every word must occur.
+            limit (int): The maximum number of records. Defaults to 20.
+            source (str, optional): Only return records of this source. Defaults to None.
+
+        Returns:
+            List[Record]: The matching records, best first.
+        """
+        # quote each word so user input is never parsed as FTS5 syntax
+        terms = " ".join(
+            '"{}"'.format(word.replace('"', '""')) for word in query.split()
+        )
+        if not terms:
+            return []
+
+        sql = (
+            "SELECT p.source, p.paper_id, p.version, p.title, p.abstract, p.authors, "
+            "p.categories, p.published, p.updated, p.url "
+            "FROM papers_fts JOIN papers p ON p.rowid = papers_fts.rowid "
+            "WHERE papers_fts MATCH ?"
+        )
+        params: list = [terms]
+        if source is not None:
+            sql += " AND p.source = ?"
+            params.append(source)
+        sql += " ORDER BY bm25(papers_fts) LIMIT ?"
+        params.append(limit)
+        return [Record(*row) for row in self.conn.execute(sql, params)]
+
+    def lookup(
+        self, source: str, paper_id: str, version: Optional[str] = None
+    ) -> Optional[Record]:
+        """
+        Returns the indexed record of a paper, its latest version if `version`
+        is not given.
+        """
+        sql = (
+            "SELECT source, paper_id, version, title, abstract, authors, "
+            "categories, published, updated, url FROM papers "
+            "WHERE source = ? AND paper_id = ?"
+        )
+        params: list = [source, paper_id]
+        if version is not None:
+            sql += " AND version = ?"
+            params.append(version)
+        sql += " ORDER BY CAST(version AS INTEGER) DESC LIMIT 1"
+        row = self.conn.execute(sql, params).fetchone()
+        return Record(*row) if row else None
+
+    def high_water_mark(self, search_key: str) -> Optional[str]:
+        """
+        Returns the high-water mark recorded for a search, if any.
+        """
+        row = self.conn.execute(
+            "SELECT high_water_mark FROM sync_state WHERE search_key = ?",
+            (search_key,),
+        ).fetchone()
+        return row[0] if row else None
+
+    def set_high_water_mark(self, search_key: str, mark: str) -> None:
+        """
+        Advances the high-water mark of a search; it never moves backwards.
+        """
+        with self.conn:
+            self.conn.execute(
+                "INSERT INTO sync_state (search_key, high_water_mark, synced_at) "
+                "VALUES (?, ?, ?) "
+                "ON CONFLICT (search_key) DO UPDATE SET "
+                "high_water_mark = max(high_water_mark, excluded.high_water_mark), "
+                "synced_at = excluded.synced_at",
+                (search_key, mark, datetime.now().isoformat()),
+            )
+
+    def is_new(self, result, mark: Optional[str]) -> bool:
+        """
+        Returns whether a result is new relative to a high-water mark: newer
+        than the mark, or as new as the mark but not indexed yet.
+        """
+        if mark is None:
+            return True
+        value = result_mark(result)
+        return value > mark or (value == mark and not self.contains(result))
+
+    def record_sync(self, search_key: str, results: List) -> None:
+        """
+        Indexes the results of a search and advances its high-water mark.
+        """
+        self.add(results)
+        if results:
+            self.set_high_water_mark(
+                search_key, max(result_mark(result) for result in results)
+            )
+
+    def sync(self, search_key: str, results: List) -> List:
+        """
+        Indexes the results of a search and returns only those that are new
+        since the previous sync of the same search.
+
+        See `is_new` for what counts as new.
+
+        Args:
+            search_key (str): Identifies the search, see `search_key`.
+            results (List): The fetched results.
+
+        Returns:
+            List: The new results, in their original order.
+        """
+        mark = self.high_water_mark(search_key)
+        new_results = [result for result in results if self.is_new(result, mark)]
+        self.record_sync(search_key, results)
+        logger.info(f"new since last sync: {len(new_results)}/{len(results)}")
+        return new_results
+
+
+def search_key(source: str, *parts) -> str:
+    """
+    Builds the key a search's high-water mark is stored under.
+
+    Args:
+        source (str): The provider, e.g. "arxiv" or "biorxiv".
+        *parts: What identifies the search, e.g. query and categories.
+
+    Returns:
+        str: The key.
+    """
+    return "|".join([source, *(str(part) for part in parts)])
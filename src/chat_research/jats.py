@@ -0,0 +1,161 @@
+"""
+Module containing the JATS XML reader, an alternative to PDF parsing for
+bioRxiv and medRxiv papers.
+"""
+import typing as t
+import xml.etree.ElementTree as ET
+
+from .paper_with_image import Section, Sections
+
+_SKIPPED = {"title", "label", "fig", "table-wrap", "xref", "disp-formula"}
+"""Elements whose text is left out of section texts."""
+
+_SEC_TYPES = {
+    "methods": "Methods",
+    "materials|methods": "Materials and Methods",
+    "results": "Results",
+    "discussion": "Discussion",
+    "conclusions": "Conclusion",
+}
+"""Canonical names of typed sections whose titles are not recognised."""
+
+
+def _local(tag: str) -> str:
+    return tag.rsplit("}", 1)[-1]
+
+
+def _text(element: ET.Element, skip: t.Collection[str] = _SKIPPED) -> str:
+    parts = [element.text or ""]
+    for child in element:
+        if _local(child.tag) not in skip:
+            parts.append(_text(child, skip))
+            if _local(child.tag) in ("p", "sec", "title"):
+                parts.append("\n")
+        parts.append(child.tail or "")
+    return "".join(parts)
+
+
+def _squash(text: str) -> str:
+    lines = (" ".join(line.split()) for line in text.split("\n"))
+    return "\n".join(line for line in lines if line)
+
+
+class JatsDocument(t.NamedTuple):
+    title: str
+    abstract: str
+    authors: t.List[str]
+    affiliations: t.List[str]
+    sections: t.Dict[str, str]
+
+
+class JatsParser:
+    """
+    Incremental JATS parser: feed it the XML as it arrives, then `close` it.
+
+    Each top-level `<sec>` of the body becomes one section named by its
+    `<title>`; it is dropped from the tree once read, so memory stays flat.
+    Title, abstract, authors and affiliations come from `<article-meta>`.
+    """
+
+    def __init__(self):
+        self._parser = ET.XMLPullParser(events=("start", "end"))
+        self._stack: t.List[str] = []
+        self.title = ""
+        self.abstract = ""
+        self.authors: t.List[str] = []
+        self.affiliations: t.List[str] = []
+        self.sections: t.Dict[str, str] = {}
+
+    def feed(self, data: bytes) -> None:
+        """
+        Raises:
+            xml.etree.ElementTree.ParseError: If the XML is malformed.
+        """
+        self._parser.feed(data)
+        self._handle_events()
+
+    def close(self) -> JatsDocument:
+        self._parser.close()
+        self._handle_events()
+        return JatsDocument(
+            self.title, self.abstract, self.authors, self.affiliations, self.sections
+        )
+
+    def _handle_events(self) -> None:
+        for event, element in self._parser.read_events():
+            tag = _local(element.tag)
+            if event == "start":
+                self._stack.append(tag)
+                continue
+
+            self._stack.pop()
+            parent = self._stack[-1] if self._stack else ""
+            if tag == "article-title" and parent == "title-group" and not self.title:
+                self.title = _squash(_text(element, ()))
+            elif tag == "abstract" and "article-meta" in self._stack:
+                if not self.abstract:
+                    self.abstract = _squash(_text(element))
+            elif tag == "name" and parent == "contrib":
+                given = element.findtext("{*}given-names") or ""
+                surname = element.findtext("{*}surname") or ""
+                self.authors.append(" ".join(filter(None, (given, surname))))
+            elif tag == "aff" and "article-meta" in self._stack:
+                self.affiliations.append(_squash(_text(element, ("label",))))
+            elif tag == "sec" and parent == "body":
+                self._add_section(element)
+                element.clear()
+            elif tag in ("ref-list", "back"):
+                element.clear()
+
+    def _add_section(self, element: ET.Element) -> None:
+        title = _squash(element.findtext("{*}title") or "")
+        sec_type = element.get("sec-type", "")
+        name = title
+        if sec_type in _SEC_TYPES and not _recognised(title):
+            name = _SEC_TYPES[sec_type]
+        if not name:
+            name = f"Section {len(self.sections) + 1}"
+        text = _squash(_text(element))
+        if name in self.sections:
+            self.sections[name] += "\n" + text
+        else:
+            self.sections[name] = text
+
+
+def _recognised(title: str) -> bool:
+    section = Section(title, "")
+    return (
+        section.is_method() or section.is_conclusion() or title in Section.section_list
+    )
+
+
+class JatsPaper:
+    """
+    A paper read from its JATS XML, with the same `sections` as `Paper`.
+    """
+
+    def __init__(
+        self, path, document: JatsDocument, title="", url="", abs="", authers=[]
+    ):
+        self.path = path
+        self.url = url
+        self.title = title or document.title
+        self.abs = document.abstract or abs
+        self.authers = document.authors or authers
+        self.affiliations = document.affiliations
+        self.first_image = ""
+
+        section_text_dict = {"Abstract": self.abs, **document.sections}
+        self.section_names = list(section_text_dict)
+        self.section_texts = section_text_dict
+        self.sections = Sections.from_dict(section_text_dict)
+        self.sections["titile"] = Section("title", self.title)
+        self.sections["paper_info"] = Section("paper_info", self.get_paper_info())
+
+    def __repr__(self):
+        return f"""JatsPaper(title={self.title}, url={self.url}, authers={self.authers} abs={self.abs})"""
+
+    __str__ = __repr__
+
+    def get_paper_info(self):
+        return "\n".join([self.title, ", ".join(self.authers), *self.affiliations])
@@ -0,0 +1,204 @@
+"""
+Module containing the LaTeX source reader, an alternative to PDF parsing for
+papers whose source is on arXiv.
+"""
+import gzip
+import io
+import re
+import tarfile
+import typing as t
+
+from loguru import logger
+
+from .paper_with_image import Section, Sections
+
+MAX_INPUT_DEPTH = 8
+"""`\\input` nesting beyond this depth is left unresolved."""
+
+_COMMENT = re.compile(r"(?<!\\)%.*")
+_INPUT = re.compile(r"\\(?:input|include|subfile)\s*\{([^}]+)\}")
+_SECTION = re.compile(r"\\section\*?\s*(?:\[[^\]]*\])?\s*\{")
+_ABSTRACT = re.compile(r"\\begin\{abstract\}(.*?)\\end\{abstract\}", re.DOTALL)
+_DROPPED_ENVIRONMENTS = re.compile(
+    r"\\begin\{(figure|table|tikzpicture|thebibliography)\*?\}.*?\\end\{\1\*?\}",
+    re.DOTALL,
+)
+_DROPPED_COMMANDS = re.compile(
+    r"\\(?:label|cite[tp]?|ref|eqref|vspace|hspace)\*?\{[^}]*\}"
+)
+_END = re.compile(r"\\bibliography\{|\\begin\{thebibliography\}|\\end\{document\}")
+
+
+def extract_tex(data: bytes) -> t.Optional[t.Dict[str, str]]:
+    """
+    Extracts the `.tex` files of an arXiv source download in memory.
+
+    arXiv serves a gzipped tarball, a single gzipped `.tex` file, or the PDF
+    itself when no source was submitted.
+
+    Returns:
+        dict: File names and contents, or None if there is no LaTeX source.
+    """
+    try:
+        with tarfile.open(fileobj=io.BytesIO(data), mode="r:*") as tar:
+            files = {}
+            for member in tar.getmembers():
+                if member.isfile() and member.name.endswith(".tex"):
+                    f = tar.extractfile(member)
+                    files[member.name] = f.read().decode("utf-8", "replace")
+            return files or None
+    except tarfile.TarError:
+        pass
+
+    try:
+        data = gzip.decompress(data)
+    except OSError:
+        pass
+    text = data.decode("utf-8", "replace")
+    if "\\documentclass" not in text:
+        return None
+    return {"main.tex": text}
+
+
+def strip_comments(text: str) -> str:
+    return "\n".join(_COMMENT.sub("", line) for line in text.split("\n"))
+
+
+def find_main(files: t.Dict[str, str]) -> t.Optional[str]:
+    """
+    Returns the name of the file holding `\\begin{document}`.
+    """
+    for name, text in files.items():
+        if "\\begin{document}" in strip_comments(text):
+            return name
+    return None
+
+
+def resolve_inputs(text: str, files: t.Dict[str, str], depth: int = 0) -> str:
+    """
+    Replaces `\\input`, `\\include` and `\\subfile` with the files they name.
+    """
+    text = strip_comments(text)
+    if depth >= MAX_INPUT_DEPTH:
+        return text
+
+    def replace(match):
+        name = match.group(1).strip()
+        for candidate in (name, name + ".tex"):
+            for path, content in files.items():
+                if path == candidate or path.endswith("/" + candidate):
+                    return resolve_inputs(content, files, depth + 1)
+        logger.debug(f"unresolved input {name}")
+        return ""
+
+    return _INPUT.sub(replace, text)
+
+
+def _braced(text: str, start: int) -> t.Tuple[str, int]:
+    """
+    Returns the content of the group opened just before `start`, and the
+    index after its closing brace.
+    """
+    depth = 1
+    index = start
+    while index < len(text) and depth:
+        if text[index] == "{" and text[index - 1] != "\\":
+            depth += 1
+        elif text[index] == "}" and text[index - 1] != "\\":
+            depth -= 1
+        index += 1
+    return text[start : index - 1], index
+
+
+def clean(text: str) -> str:
+    """
+    Drops figures, tables, labels and citations, which cost tokens without
+    helping a summary.
+    """
+    text = _DROPPED_ENVIRONMENTS.sub("", text)
+    text = _DROPPED_COMMANDS.sub("", text)
+    return re.sub(r"\n\s*\n+", "\n\n", text).strip()
+
+
+def get_title(text: str) -> str:
+    match = re.search(r"\\title\s*(?:\[[^\]]*\])?\s*\{", text)
+    if match is None:
+        return ""
+    title, _ = _braced(text, match.end())
+    return " ".join(re.sub(r"\\\\|\\[a-zA-Z]+\*?", " ", title).split())
+
+
+def split_sections(text: str) -> t.Dict[str, str]:
+    """
+    Splits a resolved document into its abstract and `\\section`s, by name.
+
+    Subsections stay within their section; the bibliography is dropped.
+    """
+    begin = text.find("\\begin{document}")
+    body = text[begin + len("\\begin{document}") :] if begin >= 0 else text
+    end = _END.search(body)
+    if end is not None:
+        body = body[: end.start()]
+
+    sections = {}
+    abstract = _ABSTRACT.search(body)
+    if abstract is not None:
+        sections["Abstract"] = clean(abstract.group(1))
+
+    matches = list(_SECTION.finditer(body))
+    for match, following in zip(matches, matches[1:] + [None]):
+        name, content_start = _braced(body, match.end())
+        name = " ".join(re.sub(r"\\[a-zA-Z]+\*?", " ", name).split())
+        content_end = following.start() if following is not None else len(body)
+        sections[name] = clean(body[content_start:content_end])
+    return sections
+
+
+class LatexError(Exception):
+    """
+    The source has no main `.tex` file.
+    """
+
+
+class LatexPaper:
+    """
+    A paper read from its LaTeX source, with the same `sections` as `Paper`.
+    """
+
+    def __init__(
+        self, path, files: t.Dict[str, str], title="", url="", abs="", authers=[]
+    ):
+        main = find_main(files)
+        if main is None:
+            raise LatexError("no file with \\begin{document}")
+
+        self.path = path
+        self.url = url
+        self.abs = abs
+        self.authers = authers
+        self.text = resolve_inputs(files[main], files)
+        self.title = title or get_title(self.text)
+        self.first_image = ""
+
+        section_text_dict = split_sections(self.text)
+        if "Abstract" not in section_text_dict and abs:
+            section_text_dict = {"Abstract": abs, **section_text_dict}
+        self.section_names = list(section_text_dict)
+        self.section_texts = section_text_dict
+        self.sections = Sections.from_dict(section_text_dict)
+        self.sections["titile"] = Section("title", self.title)
+        self.sections["paper_info"] = Section("paper_info", self.get_paper_info())
+
+    def __repr__(self):
+        return f"""LatexPaper(title={self.title}, url={self.url}, authers={self.authers} abs={self.abs})"""
+
+    __str__ = __repr__
+
+    def get_paper_info(self):
+        authors = re.search(r"\\author\s*(?:\[[^\]]*\])?\s*\{", self.text)
+        info = [self.title]
+        if authors is not None:
+            info.append(_braced(self.text, authors.end())[0])
+        elif self.authers:
+            info.append(", ".join(self.authers))
+        return "\n".join(info)
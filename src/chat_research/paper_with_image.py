@@ -140,14 +140,15 @@ class Sections:
 
 
 class Paper:
-    def __init__(self, path, title="", url="", abs="", authers=[]):
+    def __init__(self, path, title="", url="", abs="", authers=[], stream=None):
         self.url = url
         self.path = path
+        self.stream = stream  # the PDF bytes, when it was never written to `path`
         self.section_names = []
         self.section_texts = {}
         self.abs = abs
         self.title_page = 0
-        self.pdf = fitz.open(self.path)
+        self.pdf = self.open_pdf()
         self.title = self.get_title() if title == "" else title
 
         self.parse_pdf()
@@ -181,11 +182,16 @@ class Paper:
 
         return first_page_text
 
+    def open_pdf(self):
+        if self.stream is not None:
+            return fitz.open(stream=self.stream, filetype="pdf")
+        return fitz.open(self.path)
+
     def get_image_path(self, image_path=""):
         max_size = 0
         image_list = []
         ext = None
-        with fitz.Document(self.path) as my_pdf_file:
+        with self.open_pdf() as my_pdf_file:
             for page_number in range(1, len(my_pdf_file) + 1):
                 page = my_pdf_file[page_number - 1]
                 page.get_images()
@@ -0,0 +1,127 @@
+"""
+Module containing the staged pipeline used to download, parse, summarize and
+export papers within one event loop.
+"""
+import asyncio
+import time
+from typing import (
+    Any,
+    AsyncIterable,
+    Awaitable,
+    Callable,
+    Iterable,
+    List,
+    NamedTuple,
+    Union,
+)
+
+from loguru import logger
+
+_DONE = object()
+
+
+class Stage(NamedTuple):
+    """
+    One step of a pipeline, run by `workers` concurrent tasks.
+    """
+
+    name: str
+    func: Callable[[Any], Awaitable[Any]]
+    workers: int = 1
+
+
+class StageStats:
+    """
+    Items handled by a stage and the time its workers spent on them.
+    """
+
+    def __init__(self):
+        self.items = 0
+        self.failures = 0
+        self.busy_seconds = 0.0
+
+
+class Pipeline:
+    """
+    Runs items through stages connected by queues of at most `maxsize` items.
+
+    Every stage starts working on an item as soon as the previous stage hands
+    it over, so the stages overlap and the run takes about as long as its
+    slowest stage. Bounded queues keep a fast stage from running far ahead of
+    a slow one. An item whose stage raises is logged and dropped.
+    """
+
+    def __init__(self, stages: List[Stage], maxsize: int = 4):
+        if not stages:
+            raise ValueError("Pipeline needs at least one stage")
+        self.stages = stages
+        self.maxsize = maxsize
+        self.stats = {stage.name: StageStats() for stage in stages}
+
+    async def run(self, items: Union[Iterable, AsyncIterable]) -> List[Any]:
+        """
+        Feeds `items` to the first stage.
+
+        Returns:
+            List: The outputs of the last stage, in completion order.
+        """
+        queues = [asyncio.Queue(maxsize=self.maxsize) for _ in self.stages]
+        outputs: List[Any] = []
+
+        async def feed():
+            try:
+                if isinstance(items, AsyncIterable):
+                    async for item in items:
+                        await queues[0].put(item)
+                else:
+                    for item in items:
+                        await queues[0].put(item)
+            finally:
+                for _ in range(self.stages[0].workers):
+                    await queues[0].put(_DONE)
+
+        async def work(index: int):
+            stage = self.stages[index]
+            stats = self.stats[stage.name]
+            while (item := await queues[index].get()) is not _DONE:
+                start = time.perf_counter()
+                try:
+                    value = await stage.func(item)
+                except Exception as e:
+                    stats.failures += 1
+                    logger.warning(f"{stage.name}_error: {e}")
+                    continue
+                finally:
+                    stats.busy_seconds += time.perf_counter() - start
+                stats.items += 1
+                if index + 1 < len(self.stages):
+                    await queues[index + 1].put(value)
+                else:
+                    outputs.append(value)
+
+        async def run_stage(index: int):
+            await asyncio.gather(
+                *(work(index) for _ in range(self.stages[index].workers))
+            )
+            if index + 1 < len(self.stages):
+                for _ in range(self.stages[index + 1].workers):
+                    await queues[index + 1].put(_DONE)
+
+        start = time.perf_counter()
+        tasks = [asyncio.ensure_future(feed())]
+        tasks += [asyncio.ensure_future(run_stage(i)) for i in range(len(self.stages))]
+        try:
+            await asyncio.gather(*tasks)
+        finally:
+            for task in tasks:
+                task.cancel()
+        self.log_stats(time.perf_counter() - start)
+        return outputs
+
+    def log_stats(self, elapsed: float) -> None:
+        for name, stats in self.stats.items():
+            logger.info(
+                f"{name}: {stats.items} done, {stats.failures} failed, "
+                f"{stats.busy_seconds:.1f}s busy"
+            )
+        logger.info(f"pipeline finished in {elapsed:.1f}s")
@@ -0,0 +1,551 @@
+"""
+Result objects of the arXiv API, shared by the async client and the streaming
+Atom parser.
+"""
+import re
+import sys
+import time
+from calendar import timegm
+from datetime import datetime, timezone
+from pathlib import Path
+from typing import List, Optional
+
+import aiohttp
+import feedparser
+from loguru import logger
+
+from .download import default_manager
+
+_DEFAULT_TIME = datetime.min
+
+
+class Result:
+    """
+    An entry in an arXiv query results feed.
+
+    See [the arXiv API User's Manual: Details of Atom Results
+    Returned](https://arxiv.org/help/api/user-manual#_details_of_atom_results_returned).
+    """
+
+    __slots__ = (
+        "entry_id",
+        "updated",
+        "published",
+        "title",
+        "authors",
+        "summary",
+        "comment",
+        "journal_ref",
+        "doi",
+        "primary_category",
+        "categories",
+        "links",
+        "pdf_url",
+        "_raw",
+    )
+
+    headers = {
+        "User-Agent": "Mozilla/5.0 (X11; Linux x86_64) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/80.0.3987.163 "
+        "Safari/537.36",
+        "Connection": "keep-alive",
+    }
+    """HTTP headers for downloads, shared by every result."""
+
+    entry_id: str
+    """A url of the form `http://arxiv.org/abs/{id}`."""
+    updated: time.struct_time
+    """When the result was last updated."""
+    published: time.struct_time
+    """When the result was originally published."""
+    title: str
+    """The title of the result."""
+    authors: list
+    """The result's authors."""
+    summary: str
+    """The result abstract."""
+    comment: str
+    """The authors' comment if present."""
+    journal_ref: str
+    """A journal reference if present."""
+    doi: str
+    """A URL for the resolved DOI to an external resource if present."""
+    primary_category: str
+    """
+    The result's primary arXiv category. See [arXiv: Category
+    Taxonomy](https://arxiv.org/category_taxonomy).
+    """
+    categories: List[str]
+    """
+    All of the result's categories. See [arXiv: Category
+    Taxonomy](https://arxiv.org/category_taxonomy).
+    """
+    links: list
+    """Up to three URLs associated with this result."""
+    pdf_url: str
+    """The URL of a PDF version of this result if present among links."""
+    _raw: feedparser.FeedParserDict
+    """
+    The raw feedparser result object if this Result was constructed with
+    Result._from_feed_entry.
+    """
+
+    def __init__(
+        self,
+        entry_id: str,
+        updated: datetime = _DEFAULT_TIME,
+        published: datetime = _DEFAULT_TIME,
+        title: str = "",
+        authors: List["Author"] = [],
+        summary: str = "",
+        comment: str = "",
+        journal_ref: str = "",
+        doi: str = "",
+        primary_category: str = "",
+        categories: List[str] = [],
+        links: List["Link"] = [],
+        _raw: feedparser.FeedParserDict = None,
+        metadata_only: bool = False,
+    ):
+        """
+        Constructs an arXiv search result item.
+
+        In most cases, prefer using `Result._from_feed_entry` to parsing and
+        constructing `Result`s yourself.
+
+        With `metadata_only`, only `pdf_url` is kept from the links and the raw
+        feed entry is dropped.
+        """
+        self.entry_id = entry_id
+        self.updated = updated
+        self.published = published
+        self.title = title
+        self.authors = authors
+        self.summary = summary
+        self.comment = comment
+        self.journal_ref = journal_ref
+        self.doi = doi
+        # Category names repeat across results; share one string per name.
+        self.primary_category = (
+            sys.intern(primary_category) if primary_category else primary_category
+        )
+        self.categories = [sys.intern(category) for category in categories]
+        self.links = links
+        # Calculated members
+        self.pdf_url = Result._get_pdf_url(links)
+        # Debugging
+        self._raw = _raw
+        if metadata_only:
+            self.links = []
+            self._raw = None
+
+    @classmethod
+    def _from_feed_entry(
+        cls, entry: feedparser.FeedParserDict, metadata_only: bool = False
+    ) -> "Result":
+        """
+        Converts a feedparser entry for an arXiv search result feed into a
+        Result object.
+        """
+        if not hasattr(entry, "id"):
+            raise MissingFieldError("id")
+        # Title attribute may be absent for certain titles. Defaulting to "0" as
+        # it's the only title observed to cause this bug.
+        # https://github.com/lukasschwab/arxiv.py/issues/71
+        # title = entry.title if hasattr(entry, "title") else "0"
+        title = "0"
+        if hasattr(entry, "title"):
+            title = entry.title
+        else:
+            logger.warning(
+                "Result %s is missing title attribute; defaulting to '0'", entry.id
+            )
+
+        return cls(
+            entry_id=entry.id,
+            updated=Result._to_datetime(entry.updated_parsed),
+            published=Result._to_datetime(entry.published_parsed),
+            title=re.sub(r"\s+", " ", title),
+            authors=[Author._from_feed_author(a) for a in entry.authors],
+            summary=entry.summary,
+            comment=entry.get("arxiv_comment"),
+            journal_ref=entry.get("arxiv_journal_ref"),
+            doi=entry.get("arxiv_doi"),
+            primary_category=entry.arxiv_primary_category.get("term"),
+            categories=[tag.get("term") for tag in entry.tags],
+            links=[Link._from_feed_link(link) for link in entry.links],
+            _raw=entry,
+            metadata_only=metadata_only,
+        )
+
+    @classmethod
+    def from_snapshot_entry(cls, entry: dict, metadata_only: bool = False) -> "Result":
+        """
+        Converts one record of the arXiv metadata snapshot (the JSON-lines
+        dump distributed on Kaggle) into a Result object.
+
+        `published` and `updated` are the creation times of the first and last
+        listed versions.
+        """
+        if "id" not in entry:
+            raise MissingFieldError("id")
+
+        versions = entry.get("versions") or [{"version": "v1", "created": None}]
+        latest = versions[-1]["version"]
+        entry_id = f"http://arxiv.org/abs/{entry['id']}{latest}"
+
+        if entry.get("authors_parsed"):
+            authors = [
+                Author(" ".join(part for part in (first, last) if part))
+                for last, first, *_ in entry["authors_parsed"]
+            ]
+        else:
+            authors = [
+                Author(name.strip())
+                for name in re.split(r",| and ", entry.get("authors", ""))
+                if name.strip()
+            ]
+
+        categories = (entry.get("categories") or "").split()
+        return cls(
+            entry_id=entry_id,
+            updated=Result._snapshot_datetime(versions[-1].get("created")),
+            published=Result._snapshot_datetime(versions[0].get("created")),
+            title=re.sub(r"\s+", " ", entry.get("title") or "0").strip(),
+            authors=authors,
+            summary=(entry.get("abstract") or "").strip(),
+            comment=entry.get("comments"),
+            journal_ref=entry.get("journal-ref"),
+            doi=entry.get("doi"),
+            primary_category=categories[0] if categories else "",
+            categories=categories,
+            links=[
+                Link(entry_id, rel="alternate", content_type="text/html"),
+                Link(
+                    f"http://arxiv.org/pdf/{entry['id']}{latest}",
+                    title="pdf",
+                    rel="related",
+                    content_type="application/pdf",
+                ),
+            ],
+            metadata_only=metadata_only,
+        )
+
+    @classmethod
+    def from_record(cls, record, metadata_only: bool = False) -> "Result":
+        """
+        Rebuilds a Result object from a record of the local metadata index, see
+        `chat_research.index.Record`.
+        """
+        short_id = record.paper_id + (f"v{record.version}" if record.version else "")
+        entry_id = f"http://arxiv.org/abs/{short_id}"
+        categories = record.categories.split()
+        return cls(
+            entry_id=entry_id,
+            updated=Result._record_datetime(record.updated),
+            published=Result._record_datetime(record.published),
+            title=record.title,
+            authors=[
+                Author(name.strip())
+                for name in record.authors.split(", ")
+                if name.strip()
+            ],
+            summary=record.abstract,
+            primary_category=categories[0] if categories else "",
+            categories=categories,
+            links=[
+                Link(entry_id, rel="alternate", content_type="text/html"),
+                Link(
+                    f"http://arxiv.org/pdf/{short_id}",
+                    title="pdf",
+                    rel="related",
+                    content_type="application/pdf",
+                ),
+            ],
+            metadata_only=metadata_only,
+        )
+
+    @staticmethod
+    def _record_datetime(value: Optional[str]) -> datetime:
+        return datetime.fromisoformat(value) if value else _DEFAULT_TIME
+
+    @staticmethod
+    def _snapshot_datetime(created: Optional[str]) -> datetime:
+        """
+        Parses a snapshot version timestamp such as `Mon, 2 Apr 2007 19:18:42 GMT`.
+        """
+        if not created:
+            return _DEFAULT_TIME
+        return datetime.strptime(created, "%a, %d %b %Y %H:%M:%S %Z").replace(
+            tzinfo=timezone.utc
+        )
+
+    def __str__(self) -> str:
+        return self.entry_id
+
+    def __repr__(self) -> str:
+        return (
+            "{}(entry_id={}, updated={}, published={}, title={}, authors={}, "
+            "summary={}, comment={}, journal_ref={}, doi={}, "
+            "primary_category={}, categories={}, links={})"
+        ).format(
+            _classname(self),
+            repr(self.entry_id),
+            repr(self.updated),
+            repr(self.published),
+            repr(self.title),
+            repr(self.authors),
+            repr(self.summary),
+            repr(self.comment),
+            repr(self.journal_ref),
+            repr(self.doi),
+            repr(self.primary_category),
+            repr(self.categories),
+            repr(self.links),
+        )
+
+    def __eq__(self, other) -> bool:
+        if isinstance(other, Result):
+            return self.entry_id == other.entry_id
+        return False
+
+    def get_short_id(self) -> str:
+        """
+        Returns the short ID for this result.
+
+        + If the result URL is `"http://arxiv.org/abs/2107.05580v1"`,
+        `result.get_short_id()` returns `2107.05580v1`.
+
+        + If the result URL is `"http://arxiv.org/abs/quant-ph/0201082v1"`,
+        `result.get_short_id()` returns `"quant-ph/0201082v1"` (the pre-March
+        2007 arXiv identifier format).
+
+        For an explanation of the difference between arXiv's legacy and current
+        identifiers, see [Understanding the arXiv
+        identifier](https://arxiv.org/help/arxiv_identifier).
+        """
+        return self.entry_id.split("arxiv.org/abs/")[-1]
+
+    def _get_default_filename(self, extension: str = "pdf") -> str:
+        """
+        A default `to_filename` function for the extension given.
+        """
+        nonempty_title = self.title if self.title else "UNTITLED"
+        # Remove disallowed characters.
+        clean_title = "_".join(re.findall(r"\w+", nonempty_title))
+        return "{}.{}.{}".format(self.get_short_id(), clean_title, extension)
+
+    async def download_pdf(
+        self,
+        session: aiohttp.ClientSession,
+        dirpath: Path = Path("."),
+        filename: str = "",
+    ) -> Path:
+        """
+        Downloads the PDF for this result to the specified directory.
+
+        The filename is generated by calling `to_filename(self)`.
+        """
+        if not filename:
+            filename = self._get_default_filename()
+
+        if isinstance(dirpath, str):
+            dirpath = Path(dirpath)
+
+        path = dirpath / filename
+        logger.info(f"Downloading: {filename}")
+
+        return await default_manager().download(
+            session, self.pdf_url, path, self.headers
+        )
+
+    async def download_source(
+        self,
+        session: aiohttp.ClientSession,
+        dirpath: Path = Path("."),
+        filename: str = "",
+    ) -> Path:
+        """
+        Downloads the source tarfile for this result to the specified
+        directory.
+
+        The filename is generated by calling `to_filename(self)`.
+        """
+        if not filename:
+            filename = self._get_default_filename("tar.gz")
+
+        if isinstance(dirpath, str):
+            dirpath = Path(dirpath)
+
+        path = dirpath / filename
+        return await default_manager().download(
+            session, self.get_source_url(), path, self.headers
+        )
+
+    def get_source_url(self) -> str:
+        """
+        Returns the URL of the source tarfile for this result.
+        """
+        # Bodge: construct the source URL from the PDF URL.
+        return self.pdf_url.replace("/pdf/", "/src/")
+
+    @staticmethod
+    def _get_pdf_url(links: list) -> Optional[str]:
+        """
+        Finds the PDF link among a result's links and returns its URL.
+
+        Should only be called once for a given `Result`, in its constructor.
+        After construction, the URL should be available in `Result.pdf_url`.
+        """
+        pdf_urls = [link.href for link in links if link.title == "pdf"]
+
+        if len(pdf_urls) == 0:
+            return None
+        elif len(pdf_urls) > 1:
+            logger.warning("Result has multiple PDF links; using %s", pdf_urls[0])
+
+        return pdf_urls[0]
+
+    @staticmethod
+    def _to_datetime(ts: time.struct_time) -> datetime:
+        """
+        Converts a UTC time.struct_time into a time-zone-aware datetime.
+
+        This will be replaced with feedparser functionality [when it becomes
+        available](https://github.com/kurtmckee/feedparser/issues/212).
+        """
+        return datetime.fromtimestamp(timegm(ts), tz=timezone.utc)
+
+
+class Author(object):
+    """
+    A light inner class for representing a result's authors.
+    """
+
+    __slots__ = ("name",)
+
+    name: str
+    """The author's name."""
+
+    def __init__(self, name: str):
+        """
+        Constructs an `Author` with the specified name.
+
+        In most cases, prefer using `Author._from_feed_author` to parsing
+        and constructing `Author`s yourself.
+        """
+        self.name = name
+
+    @classmethod
+    def _from_feed_author(
+        cls,
+        feed_author: feedparser.FeedParserDict,
+    ) -> "Author":
+        """
+        Constructs an `Author` with the name specified in an author object
+        from a feed entry.
+
+        See usage in `Result._from_feed_entry`.
+        """
+        return Author(feed_author.name)
+
+    def __str__(self) -> str:
+        return self.name
+
+    def __repr__(self) -> str:
+        return "{}({})".format(_classname(self), repr(self.name))
+
+    def __eq__(self, other) -> bool:
+        if isinstance(other, Author):
+            return self.name == other.name
+        return False
+
+
+class Link:
+    """
+    A light inner class for representing a result's links.
+    """
+
+    __slots__ = ("href", "title", "rel", "content_type")
+
+    href: str
+    """The link's `href` attribute."""
+    title: str
+    """The link's title."""
+    rel: str
+    """The link's relationship to the `Result`."""
+    content_type: str
+    """The link's HTTP content type."""
+
+    def __init__(
+        self,
+        href: str,
+        title: Optional[str] = None,
+        rel: Optional[str] = None,
+        content_type: Optional[str] = None,
+    ):
+        """
+        Constructs a `Link` with the specified link metadata.
+
+        In most cases, prefer using `Link._from_feed_link` to parsing and
+        constructing `Link`s yourself.
+        """
+        self.href = href
+        self.title = sys.intern(title) if title else title
+        self.rel = sys.intern(rel) if rel else rel
+        self.content_type = sys.intern(content_type) if content_type else content_type
+
+    @classmethod
+    def _from_feed_link(cls, feed_link: feedparser.FeedParserDict) -> "Link":
+        """
+        Constructs a `Link` with link metadata specified in a link object
+        from a feed entry.
+
+        See usage in `Result._from_feed_entry`.
+        """
+        return cls(
+            href=feed_link.href,
+            title=feed_link.get("title"),
+            rel=feed_link.get("rel"),
+            content_type=feed_link.get("content_type"),
+        )
+
+    def __str__(self) -> str:
+        return self.href
+
+    def __repr__(self) -> str:
+        return "{}({}, title={}, rel={}, content_type={})".format(
+            _classname(self),
+            repr(self.href),
+            repr(self.title),
+            repr(self.rel),
+            repr(self.content_type),
+        )
+
+    def __eq__(self, other) -> bool:
+        if isinstance(other, Link):
+            return self.href == other.href
+        return False
+
+
+class MissingFieldError(Exception):
+    """
+    An error indicating an entry is unparseable because it lacks required
+    fields.
+    """
+
+    missing_field: str
+    """The required field missing from the would-be entry."""
+    message: str
+    """Message describing what caused this error."""
+
+    def __init__(self, missing_field):
+        self.missing_field = missing_field
+        self.message = "Entry from arXiv missing required info"
+
+    def __repr__(self) -> str:
+        return "{}({})".format(_classname(self), repr(self.missing_field))
+
+
+def _classname(o):
+    """A helper function for use in __repr__ methods: arxiv.Result.Link."""
+    return "arxiv.{}".format(o.__class__.__qualname__)
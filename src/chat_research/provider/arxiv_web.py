@@ -0,0 +1,185 @@
+"""
+Scraper of the arXiv web search listing (https://arxiv.org/search/), which
+lists the newest announcements first.
+"""
+import asyncio
+import datetime
+import importlib.util
+import re
+from pathlib import Path
+from typing import AsyncIterator, List, NamedTuple
+from urllib.parse import urlencode
+
+import aiohttp
+from bs4 import BeautifulSoup, SoupStrainer
+from loguru import logger
+
+from .base import PaperMetadata
+from .download import default_manager
+
+SEARCH_URL = "https://arxiv.org/search/?"
+PAGE_SIZE = 50
+
+# lxml is an optional speed-up; html.parser ships with Python
+PARSER = "lxml" if importlib.util.find_spec("lxml") is not None else "html.parser"
+
+_ARTICLES = SoupStrainer("li", class_="arxiv-result")
+_SUBMITTED = re.compile(r"Submitted\s+(\d{1,2} \w+, \d{4})")
+
+
+class WebResult(NamedTuple):
+    """
+    One entry of an arXiv search listing.
+    """
+
+    title: str
+    link: str
+    pdf_url: str
+    date: datetime.date
+    abstract: str
+    authors: List[str]
+
+
+def get_url(query: str, page: int) -> str:
+    """
+    Returns the URL of a listing page of the query, newest announcements first.
+    """
+    params = {
+        "query": query,
+        "searchtype": "all",
+        "abstracts": "show",
+        "order": "-announced_date_first",
+        "size": PAGE_SIZE,
+    }
+    if page > 0:
+        params["start"] = page * PAGE_SIZE
+    return SEARCH_URL + urlencode(params)
+
+
+def _text(element) -> str:
+    return " ".join(element.get_text(" ").split()) if element is not None else ""
+
+
+def parse_listing(html: str, parser: str = PARSER) -> List[WebResult]:
+    """
+    Parses the entries of a listing page.
+
+    Only the `<li class="arxiv-result">` elements are handed to the parser;
+    entries without a link or a submission date are skipped.
+    """
+    soup = BeautifulSoup(html, parser, parse_only=_ARTICLES)
+    results = []
+    for article in soup.find_all("li", class_="arxiv-result"):
+        title_link = article.select_one("p.list-title a")
+        date_match = None
+        for paragraph in article.find_all("p", class_="is-size-7"):
+            date_match = _SUBMITTED.search(_text(paragraph))
+            if date_match:
+                break
+        if title_link is None or date_match is None:
+            logger.debug("skipping incomplete listing entry")
+            continue
+
+        link = title_link.get("href")
+        pdf_links = [a.get("href") for a in article.select("p.list-title span a")]
+        pdf_links = [href for href in pdf_links if "/pdf/" in href]
+        abstract = _text(article.find("span", class_="abstract-full"))
+        results.append(
+            WebResult(
+                title=_text(article.find("p", class_="title")),
+                link=link,
+                pdf_url=pdf_links[0] if pdf_links else link.replace("/abs/", "/pdf/"),
+                date=datetime.datetime.strptime(
+                    date_match.group(1), "%d %B, %Y"
+                ).date(),
+                abstract=re.sub(r"\s*△ Less$", "", abstract),
+                authors=[_text(a) for a in article.select("p.authors a")],
+            )
+        )
+    return results
+
+
+class ArxivWebProvider:
+    """
+    Provider over the arXiv web listing, limited to the last `days` days.
+
+    Listing pages are fetched `page_concurrency` at a time over the caller's
+    session and parsed in the default executor; because the listing is sorted
+    by date, no further pages are requested once an entry is older than
+    `days` or a page comes back empty.
+    """
+
+    name = "arxiv"
+
+    def __init__(self, days: int = 1, page_num: int = 10, page_concurrency: int = 4):
+        self.days = days
+        self.page_num = page_num
+        self.page_concurrency = page_concurrency
+
+    async def _fetch_page(self, session, query, page) -> List[WebResult]:
+        url = get_url(query, page)
+        logger.info(f"Requesting listing page {url}")
+        async with session.get(url, raise_for_status=True) as response:
+            html = await response.text()
+        loop = asyncio.get_running_loop()
+        return await loop.run_in_executor(None, parse_listing, html)
+
+    async def search(
+        self, query, max_results, session: aiohttp.ClientSession
+    ) -> AsyncIterator[WebResult]:
+        oldest = datetime.date.today() - datetime.timedelta(days=self.days)
+        count = 0
+        next_page = 0
+        pending: List[asyncio.Future] = []
+        try:
+            while True:
+                while (
+                    next_page < self.page_num and len(pending) < self.page_concurrency
+                ):
+                    pending.append(
+                        asyncio.ensure_future(
+                            self._fetch_page(session, query, next_page)
+                        )
+                    )
+                    next_page += 1
+                if not pending:
+                    return
+
+                # pages are consumed in order so the date cut-off stays exact
+                results = await pending.pop(0)
+                if not results:
+                    return
+                for result in results:
+                    if result.date < oldest:
+                        logger.info(f"reached papers older than {self.days} days")
+                        return
+                    if count >= max_results:
+                        return
+                    count += 1
+                    yield result
+        finally:
+            for task in pending:
+                task.cancel()
+
+    async def resolve_pdf(self, result: WebResult, session) -> str:
+        return result.pdf_url
+
+    async def download(
+        self, result: WebResult, session, dirpath: Path, filename: str
+    ) -> Path:
+        logger.info(f"Downloading: {filename}")
+        return await default_manager().download(
+            session, result.pdf_url, Path(dirpath) / filename
+        )
+
+    def metadata(self, result: WebResult) -> PaperMetadata:
+        return PaperMetadata(
+            source=self.name,
+            key=result.link.rsplit("/abs/", 1)[-1],
+            title=result.title,
+            url=result.link,
+            abstract=result.abstract,
+            authors=result.authors,
+            date=datetime.datetime.combine(result.date, datetime.time()),
+            doi=None,
+        )
@@ -1,416 +1,25 @@
 import asyncio
-import re
 import time
-from calendar import timegm
-from datetime import datetime, timedelta, timezone
+from datetime import datetime, timedelta
 from enum import Enum
-from pathlib import Path
-from typing import Dict, Generator, List, Optional
+from typing import AsyncGenerator, Dict, Generator, List, Optional, Tuple
 from urllib.parse import urlencode
+from xml.etree.ElementTree import ParseError
 
-import aiofiles
 import aiohttp
 import feedparser
 from loguru import logger
 
-_DEFAULT_TIME = datetime.min
+from ..scheduler import RateLimiter
+from .arxiv_result import Author as Author
+from .arxiv_result import Link as Link
+from .arxiv_result import MissingFieldError, Result, _classname
+from .atom import AtomParser, parse_page
+from .cache import PageCache
+from .http import create_session
 
-
-class Result:
-    """
-    An entry in an arXiv query results feed.
-
-    See [the arXiv API User's Manual: Details of Atom Results
-    Returned](https://arxiv.org/help/api/user-manual#_details_of_atom_results_returned).
-    """
-
-    entry_id: str
-    """A url of the form `http://arxiv.org/abs/{id}`."""
-    updated: time.struct_time
-    """When the result was last updated."""
-    published: time.struct_time
-    """When the result was originally published."""
-    title: str
-    """The title of the result."""
-    authors: list
-    """The result's authors."""
-    summary: str
-    """The result abstract."""
-    comment: str
-    """The authors' comment if present."""
-    journal_ref: str
-    """A journal reference if present."""
-    doi: str
-    """A URL for the resolved DOI to an external resource if present."""
-    primary_category: str
-    """
-    The result's primary arXiv category. See [arXiv: Category
-    Taxonomy](https://arxiv.org/category_taxonomy).
-    """
-    categories: List[str]
-    """
-    All of the result's categories. See [arXiv: Category
-    Taxonomy](https://arxiv.org/category_taxonomy).
-    """
-    links: list
-    """Up to three URLs associated with this result."""
-    pdf_url: str
-    """The URL of a PDF version of this result if present among links."""
-    _raw: feedparser.FeedParserDict
-    """
-    The raw feedparser result object if this Result was constructed with
-    Result._from_feed_entry.
-    """
-
-    def __init__(
-        self,
-        entry_id: str,
-        updated: datetime = _DEFAULT_TIME,
-        published: datetime = _DEFAULT_TIME,
-        title: str = "",
-        authors: List["Author"] = [],
-        summary: str = "",
-        comment: str = "",
-        journal_ref: str = "",
-        doi: str = "",
-        primary_category: str = "",
-        categories: List[str] = [],
-        links: List["Link"] = [],
-        _raw: feedparser.FeedParserDict = None,
-    ):
-        """
-        Constructs an arXiv search result item.
-
-        In most cases, prefer using `Result._from_feed_entry` to parsing and
-        constructing `Result`s yourself.
-        """
-        self.entry_id = entry_id
-        self.updated = updated
-        self.published = published
-        self.title = title
-        self.authors = authors
-        self.summary = summary
-        self.comment = comment
-        self.journal_ref = journal_ref
-        self.doi = doi
-        self.primary_category = primary_category
-        self.categories = categories
-        self.links = links
-        # Calculated members
-        self.pdf_url = Result._get_pdf_url(links)
-        # Debugging
-        self._raw = _raw
-        self.headers = {
-            "User-Agent": "Mozilla/5.0 (X11; Linux x86_64) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/80.0.3987.163 "
-            "Safari/537.36",
-            "Connection": "keep-alive",
-        }
-
-    @classmethod
-    def _from_feed_entry(cls, entry: feedparser.FeedParserDict) -> "Result":
-        """
-        Converts a feedparser entry for an arXiv search result feed into a
-        Result object.
-        """
-        if not hasattr(entry, "id"):
-            raise MissingFieldError("id")
-        # Title attribute may be absent for certain titles. Defaulting to "0" as
-        # it's the only title observed to cause this bug.
-        # https://github.com/lukasschwab/arxiv.py/issues/71
-        # title = entry.title if hasattr(entry, "title") else "0"
-        title = "0"
-        if hasattr(entry, "title"):
-            title = entry.title
-        else:
-            logger.warning(
-                "Result %s is missing title attribute; defaulting to '0'", entry.id
-            )
-
-        return cls(
-            entry_id=entry.id,
-            updated=Result._to_datetime(entry.updated_parsed),
-            published=Result._to_datetime(entry.published_parsed),
-            title=re.sub(r"\s+", " ", title),
-            authors=[Author._from_feed_author(a) for a in entry.authors],
-            summary=entry.summary,
-            comment=entry.get("arxiv_comment"),
-            journal_ref=entry.get("arxiv_journal_ref"),
-            doi=entry.get("arxiv_doi"),
-            primary_category=entry.arxiv_primary_category.get("term"),
-            categories=[tag.get("term") for tag in entry.tags],
-            links=[Link._from_feed_link(link) for link in entry.links],
-            _raw=entry,
-        )
-
-    def __str__(self) -> str:
-        return self.entry_id
-
-    def __repr__(self) -> str:
-        return (
-            "{}(entry_id={}, updated={}, published={}, title={}, authors={}, "
-            "summary={}, comment={}, journal_ref={}, doi={}, "
-            "primary_category={}, categories={}, links={})"
-        ).format(
-            _classname(self),
-            repr(self.entry_id),
-            repr(self.updated),
-            repr(self.published),
-            repr(self.title),
-            repr(self.authors),
-            repr(self.summary),
-            repr(self.comment),
-            repr(self.journal_ref),
-            repr(self.doi),
-            repr(self.primary_category),
-            repr(self.categories),
-            repr(self.links),
-        )
-
-    def __eq__(self, other) -> bool:
-        if isinstance(other, Result):
-            return self.entry_id == other.entry_id
-        return False
-
-    def get_short_id(self) -> str:
-        """
-        Returns the short ID for this result.
-
-        + If the result URL is `"http://arxiv.org/abs/2107.05580v1"`,
-        `result.get_short_id()` returns `2107.05580v1`.
-
-        + If the result URL is `"http://arxiv.org/abs/quant-ph/0201082v1"`,
-        `result.get_short_id()` returns `"quant-ph/0201082v1"` (the pre-March
-        2007 arXiv identifier format).
-
-        For an explanation of the difference between arXiv's legacy and current
-        identifiers, see [Understanding the arXiv
-        identifier](https://arxiv.org/help/arxiv_identifier).
-        """
-        return self.entry_id.split("arxiv.org/abs/")[-1]
-
-    def _get_default_filename(self, extension: str = "pdf") -> str:
-        """
-        A default `to_filename` function for the extension given.
-        """
-        nonempty_title = self.title if self.title else "UNTITLED"
-        # Remove disallowed characters.
-        clean_title = "_".join(re.findall(r"\w+", nonempty_title))
-        return "{}.{}.{}".format(self.get_short_id(), clean_title, extension)
-
-    async def download_pdf(
-        self,
-        session: aiohttp.ClientSession,
-        dirpath: Path = Path("."),
-        filename: str = "",
-    ) -> Path:
-        """
-        Downloads the PDF for this result to the specified directory.
-
-        The filename is generated by calling `to_filename(self)`.
-        """
-        if not filename:
-            filename = self._get_default_filename()
-
-        if isinstance(dirpath, str):
-            dirpath = Path(dirpath)
-
-        path = dirpath / filename
-        logger.info(f"Downloading: {filename}")
-
-        async with session.get(
-            self.pdf_url, headers=self.headers, raise_for_status=True
-        ) as response:
-            async with aiofiles.open(path, "wb") as f:
-                async for chunk in response.content.iter_chunked(1024):
-                    await asyncio.sleep(0.001)
-                    await f.write(chunk)
-
-        return path
-
-    async def download_source(
-        self,
-        session: aiohttp.ClientSession,
-        dirpath: Path = Path("."),
-        filename: str = "",
-    ) -> Path:
-        """
-        Downloads the source tarfile for this result to the specified
-        directory.
-
-        The filename is generated by calling `to_filename(self)`.
-        """
-        if not filename:
-            filename = self._get_default_filename("tar.gz")
-
-        if isinstance(dirpath, str):
-            dirpath = Path(dirpath)
-
-        path = dirpath / filename
-
-        # Bodge: construct the source URL from the PDF URL.
-        source_url = self.pdf_url.replace("/pdf/", "/src/")
-        async with session.get(
-            source_url, headers=self.headers, raise_for_status=True
-        ) as response:
-            async with aiofiles.open(path, "wb") as f:
-                async for chunk in response.content.iter_chunked(1024):
-                    await asyncio.sleep(0.001)
-                    await f.write(chunk)
-
-        return path
-
-    @staticmethod
-    def _get_pdf_url(links: list) -> Optional[str]:
-        """
-        Finds the PDF link among a result's links and returns its URL.
-
-        Should only be called once for a given `Result`, in its constructor.
-        After construction, the URL should be available in `Result.pdf_url`.
-        """
-        pdf_urls = [link.href for link in links if link.title == "pdf"]
-
-        if len(pdf_urls) == 0:
-            return None
-        elif len(pdf_urls) > 1:
-            logger.warning("Result has multiple PDF links; using %s", pdf_urls[0])
-
-        return pdf_urls[0]
-
-    @staticmethod
-    def _to_datetime(ts: time.struct_time) -> datetime:
-        """
-        Converts a UTC time.struct_time into a time-zone-aware datetime.
-
-        This will be replaced with feedparser functionality [when it becomes
-        available](https://github.com/kurtmckee/feedparser/issues/212).
-        """
-        return datetime.fromtimestamp(timegm(ts), tz=timezone.utc)
-
-
-class Author(object):
-    """
-    A light inner class for representing a result's authors.
-    """
-
-    name: str
-    """The author's name."""
-
-    def __init__(self, name: str):
-        """
-        Constructs an `Author` with the specified name.
-
-        In most cases, prefer using `Author._from_feed_author` to parsing
-        and constructing `Author`s yourself.
-        """
-        self.name = name
-
-    @classmethod
-    def _from_feed_author(
-        cls,
-        feed_author: feedparser.FeedParserDict,
-    ) -> "Author":
-        """
-        Constructs an `Author` with the name specified in an author object
-        from a feed entry.
-
-        See usage in `Result._from_feed_entry`.
-        """
-        return Author(feed_author.name)
-
-    def __str__(self) -> str:
-        return self.name
-
-    def __repr__(self) -> str:
-        return "{}({})".format(_classname(self), repr(self.name))
-
-    def __eq__(self, other) -> bool:
-        if isinstance(other, Author):
-            return self.name == other.name
-        return False
-
-
-class Link:
-    """
-    A light inner class for representing a result's links.
-    """
-
-    href: str
-    """The link's `href` attribute."""
-    title: str
-    """The link's title."""
-    rel: str
-    """The link's relationship to the `Result`."""
-    content_type: str
-    """The link's HTTP content type."""
-
-    def __init__(
-        self,
-        href: str,
-        title: Optional[str] = None,
-        rel: Optional[str] = None,
-        content_type: Optional[str] = None,
-    ):
-        """
-        Constructs a `Link` with the specified link metadata.
-
-        In most cases, prefer using `Link._from_feed_link` to parsing and
-        constructing `Link`s yourself.
-        """
-        self.href = href
-        self.title = title
-        self.rel = rel
-        self.content_type = content_type
-
-    @classmethod
-    def _from_feed_link(cls, feed_link: feedparser.FeedParserDict) -> "Link":
-        """
-        Constructs a `Link` with link metadata specified in a link object
-        from a feed entry.
-
-        See usage in `Result._from_feed_entry`.
-        """
-        return cls(
-            href=feed_link.href,
-            title=feed_link.get("title"),
-            rel=feed_link.get("rel"),
-            content_type=feed_link.get("content_type"),
-        )
-
-    def __str__(self) -> str:
-        return self.href
-
-    def __repr__(self) -> str:
-        return "{}({}, title={}, rel={}, content_type={})".format(
-            _classname(self),
-            repr(self.href),
-            repr(self.title),
-            repr(self.rel),
-            repr(self.content_type),
-        )
-
-    def __eq__(self, other) -> bool:
-        if isinstance(other, Link):
-            return self.href == other.href
-        return False
-
-
-class MissingFieldError(Exception):
-    """
-    An error indicating an entry is unparseable because it lacks required
-    fields.
-    """
-
-    missing_field: str
-    """The required field missing from the would-be entry."""
-    message: str
-    """Message describing what caused this error."""
-
-    def __init__(self, missing_field):
-        self.missing_field = missing_field
-        self.message = "Entry from arXiv missing required info"
-
-    def __repr__(self) -> str:
-        return "{}({})".format(_classname(self), repr(self.missing_field))
+PAGE_CHUNK_BYTES = 64 * 1024
+"""Size of the chunks fed to the Atom parser while a page downloads."""
 
 
 class SortCriterion(Enum):
@@ -531,6 +140,17 @@ class Search(object):
         """
         return Client().results(self, offset=offset)
 
+    def aresults(
+        self, offset: int = 0, session: Optional[aiohttp.ClientSession] = None
+    ) -> AsyncGenerator[Result, None]:
+        """
+        Executes the specified search using the process-wide async arXiv API
+        client, so concurrent searches share its politeness delay.
+
+        For info on default behavior, see `AsyncClient.aresults`.
+        """
+        return default_client().aresults(self, offset=offset, session=session)
+
 
 class Client(object):
     """
@@ -717,6 +337,209 @@ class Client(object):
         return feed
 
 
+class AsyncClient(Client):
+    """
+    Specifies a strategy for fetching results from arXiv's API without blocking
+    the event loop.
+
+    Pages are fetched with aiohttp, the politeness delay is enforced by an async
+    `RateLimiter`, and page N+1 is prefetched while page N is being yielded.
+    Each page is fed to the streaming parser of `atom` chunk by chunk as it
+    downloads, so no raw feed entries are kept alive.
+    """
+
+    metadata_only: bool
+    """Whether results drop their links and raw entries, see `Result`."""
+    cache: Optional[PageCache]
+    """Serves repeated page requests from disk, if given."""
+
+    def __init__(
+        self,
+        page_size: int = 100,
+        delay_seconds: int = 3,
+        num_retries: int = 3,
+        metadata_only: bool = False,
+        cache: Optional[PageCache] = None,
+    ):
+        """
+        Constructs an async arXiv API client with the specified options.
+
+        See `Client.__init__` for the meaning of the options.
+        """
+        super().__init__(
+            page_size=page_size, delay_seconds=delay_seconds, num_retries=num_retries
+        )
+        self.metadata_only = metadata_only
+        self.cache = cache
+        self._limiter = RateLimiter(delay_seconds)
+
+    def close(self) -> None:
+        """
+        Closes the page cache, if any.
+        """
+        if self.cache is not None:
+            self.cache.close()
+
+    async def aresults(
+        self,
+        search: Search,
+        offset: int = 0,
+        session: Optional[aiohttp.ClientSession] = None,
+    ) -> AsyncGenerator[Result, None]:
+        """
+        Async counterpart of `Client.results`: yields the parsed `Result`s of
+        each page as soon as it arrives, until `max_results` results have been
+        yielded or there are no more search results.
+
+        If `session` is None, a session is created for the duration of the
+        search.
+        """
+        own_session = session is None
+        if own_session:
+            session = create_session()
+
+        prefetch = None
+        try:
+            total_results = search.max_results
+            page_size = min(self.page_size, search.max_results - offset)
+            page_url = self._format_url(search, offset, page_size)
+            total, results = await self._aparse_page(session, page_url, first_page=True)
+
+            # See `Client.results` for the empty first page workaround.
+            if len(results) == 0:
+                logger.info("Got empty results; stopping generation")
+                total_results = 0
+            else:
+                total_results = min(total_results, total)
+                logger.info(
+                    "Got first page; {} of {} results available".format(
+                        total_results, search.max_results
+                    )
+                )
+
+            while True:
+                offset += len(results)
+                if offset < total_results:
+                    page_size = min(self.page_size, total_results - offset)
+                    logger.info(
+                        "Prefetching {} results at offset {}".format(page_size, offset)
+                    )
+                    page_url = self._format_url(search, offset, page_size)
+                    prefetch = asyncio.ensure_future(
+                        self._aparse_page(session, page_url, first_page=False)
+                    )
+
+                for result in results:
+                    yield result
+
+                if prefetch is None:
+                    break
+                _, results = await prefetch
+                prefetch = None
+                if len(results) == 0:
+                    break
+        finally:
+            if prefetch is not None and not prefetch.done():
+                prefetch.cancel()
+            if own_session:
+                await session.close()
+
+    async def _aparse_page(
+        self, session: aiohttp.ClientSession, url: str, first_page: bool = True
+    ) -> Tuple[int, List[Result]]:
+        """
+        Fetches the specified URL and parses it while it downloads.
+
+        If a request fails or is unexpectedly empty, retries the request up to
+        `self.num_retries` times, waiting on the rate limiter before each try.
+
+        With a cache, fresh pages are returned without waiting on the limiter
+        and stale ones are revalidated; only good pages are stored.
+        """
+        if self.cache is not None:
+            body = self.cache.fresh(url)
+            if body is not None:
+                return await self._aparse(body)
+
+        last_err = None
+        for retry in range(self.num_retries + 1):
+            async with self._limiter:
+                logger.info(
+                    "Requesting page of results",
+                    extra={
+                        "url": url,
+                        "first_page": first_page,
+                        "retry": retry,
+                        "last_err": last_err.message if last_err is not None else None,
+                    },
+                )
+                headers = (
+                    self.cache.conditional_headers(url)
+                    if self.cache is not None
+                    else {}
+                )
+                try:
+                    async with session.get(url, headers=headers) as response:
+                        status = response.status
+                        if status == 304 and headers:
+                            return await self._aparse(self.cache.revalidated(url))
+                        if status != 200:
+                            feed = feedparser.parse(await response.read())
+                            feed["status"] = status
+                            last_err = HTTPError(url, retry, feed)
+                            continue
+                        chunks = [] if self.cache is not None else None
+                        parser = AtomParser(metadata_only=self.metadata_only)
+                        results = []
+                        async for data in response.content.iter_chunked(
+                            PAGE_CHUNK_BYTES
+                        ):
+                            results += parser.feed(data)
+                            if chunks is not None:
+                                chunks.append(data)
+                        results += parser.close()
+                except (aiohttp.ClientError, asyncio.TimeoutError) as e:
+                    last_err = ArxivError(url, retry, repr(e))
+                    continue
+                except ParseError as e:
+                    last_err = ArxivError(url, retry, f"malformed page: {e}")
+                    continue
+
+            if not first_page and not results:
+                last_err = UnexpectedEmptyPageError(url, retry)
+                continue
+            if chunks is not None:
+                self.cache.store(url, b"".join(chunks), response.headers)
+            return parser.total_results or 0, results
+
+        # Page was never returned in self.num_retries tries. Raise the last
+        # exception encountered.
+        raise last_err
+
+    async def _aparse(self, body: bytes) -> Tuple[int, List[Result]]:
+        """
+        Parses a whole page body, such as a cached one, in the default executor.
+        """
+        loop = asyncio.get_running_loop()
+        total, results = await loop.run_in_executor(
+            None, parse_page, body, self.metadata_only
+        )
+        return total or 0, results
+
+
+_default_client: Optional[AsyncClient] = None
+
+
+def default_client() -> AsyncClient:
+    """
+    Returns the process-wide async client used by `Search.aresults`.
+    """
+    global _default_client
+    if _default_client is None:
+        _default_client = AsyncClient()
+    return _default_client
+
+
 class ArxivError(Exception):
     """This package's base Exception class."""
 
@@ -803,8 +626,3 @@ class HTTPError(ArxivError):
         return "{}({}, {}, {})".format(
             _classname(self), repr(self.url), repr(self.retry), repr(self.status)
         )
-
-
-def _classname(o):
-    """A helper function for use in __repr__ methods: arxiv.Result.Link."""
-    return "arxiv.{}".format(o.__class__.__qualname__)
@@ -1,6 +1,6 @@
 import asyncio
-import json
 import re
+import sys
 import time
 import typing as t
 from calendar import timegm
@@ -8,15 +8,20 @@ from datetime import datetime, timezone
 from enum import Enum, auto
 from pathlib import Path
 from typing import Any, Optional
+from urllib.parse import urlencode
 
-import aiofiles
 import aiohttp
 import feedparser
-import requests
 import tenacity
 from loguru import logger
 from pydantic import BaseModel
 
+from ..scheduler import RateLimiter
+from .cache import PageCache
+from .download import default_manager
+from .http import create_session, get_json, loads
+from .resolver import DOI_BASE, PdfUrlResolver, default_resolver
+
 _DEFAULT_TIME = datetime.min
 
 
@@ -52,60 +57,50 @@ class Category(Enum):
 
     @classmethod
     def from_str(cls, category) -> "Category":
-        if category == "animal behavior and cogtition":
-            return cls.AnimalBeHaviorAndCognition
-        elif category == "biochemistry":
-            return cls.Biochemistry
-        elif category == "bioengineering":
-            return cls.Bioengineering
-        elif category == "bioinformatics":
-            return cls.Bioinformatics
-        elif category == "biophysics":
-            return cls.Biophysics
-        elif category == "cancer biology":
-            return cls.CancerBiology
-        elif category == "clinical trials":
-            return cls.ClinicalTrials
-        elif category == "developmental biology":
-            return cls.DevelopmentalBiology
-        elif category == "ecology":
-            return cls.Ecology
-        elif category == "epidemiology":
-            return cls.Epidemiology
-        elif category == "evolutionary biology":
-            return cls.EvolutionaryBiology
-        elif category == "genetics":
-            return cls.Genetics
-        elif category == "genomics":
-            return cls.Genomics
-        elif category == "immunology":
-            return cls.Immunology
-        elif category == "microbiology":
-            return cls.Microbiology
-        elif category == "molecular biology":
-            return cls.MolecularBiology
-        elif category == "neuroscience":
-            return cls.Neuroscience
-        elif category == "paleontology":
-            return cls.Paleontology
-        elif category == "pathology":
-            return cls.Pathology
-        elif category == "pharmacology and toxicology":
-            return cls.PharmacologyAndToxicology
-        elif category == "physiology":
-            return cls.Physiology
-        elif category == "plant biology":
-            return cls.PlantBiology
-        elif category == "scientific communication and education":
-            return cls.ScientificCommunicationAndEducation
-        elif category == "synthetic biology":
-            return cls.SyntheticBiology
-        elif category == "systems biology":
-            return cls.SystemsBiology
-        elif category == "zoology":
-            return cls.Zoology
-        else:
-            return cls.Unknown
+        return _CATEGORY_INDEX.get(category.strip().lower(), cls.Unknown)
+
+    @property
+    def api_name(self) -> str:
+        """The category as accepted by the `category` parameter of the bioRxiv API."""
+        return _API_NAMES[self]
+
+
+_CATEGORY_NAMES = {
+    Category.AnimalBeHaviorAndCognition: "animal behavior and cognition",
+    Category.Biochemistry: "biochemistry",
+    Category.Bioengineering: "bioengineering",
+    Category.Bioinformatics: "bioinformatics",
+    Category.Biophysics: "biophysics",
+    Category.CancerBiology: "cancer biology",
+    Category.CellBiology: "cell biology",
+    Category.ClinicalTrials: "clinical trials",
+    Category.DevelopmentalBiology: "developmental biology",
+    Category.Ecology: "ecology",
+    Category.Epidemiology: "epidemiology",
+    Category.EvolutionaryBiology: "evolutionary biology",
+    Category.Genetics: "genetics",
+    Category.Genomics: "genomics",
+    Category.Immunology: "immunology",
+    Category.Microbiology: "microbiology",
+    Category.MolecularBiology: "molecular biology",
+    Category.Neuroscience: "neuroscience",
+    Category.Paleontology: "paleontology",
+    Category.Pathology: "pathology",
+    Category.PharmacologyAndToxicology: "pharmacology and toxicology",
+    Category.Physiology: "physiology",
+    Category.PlantBiology: "plant biology",
+    Category.ScientificCommunicationAndEducation: "scientific communication and education",
+    Category.SyntheticBiology: "synthetic biology",
+    Category.SystemsBiology: "systems biology",
+    Category.Zoology: "zoology",
+}
+_CATEGORY_INDEX = {name: category for category, name in _CATEGORY_NAMES.items()}
+# keep accepting the historical misspelling used by the CLI
+_CATEGORY_INDEX["animal behavior and cogtition"] = Category.AnimalBeHaviorAndCognition
+_API_NAMES = {
+    category: name.replace(" ", "_") for category, name in _CATEGORY_NAMES.items()
+}
+_API_NAMES[Category.Unknown] = ""
 
 
 class Result:
@@ -123,6 +118,30 @@ class Result:
 
     """
 
+    __slots__ = (
+        "doi",
+        "title",
+        "authors",
+        "author_corresponding",
+        "author_corresponding_institution",
+        "version",
+        "category",
+        "jats_xml_path",
+        "abstract",
+        "published",
+        "server",
+        "pdf_url",
+        "entry_id",
+        "date",
+    )
+
+    headers = {
+        "User-Agent": "Mozilla/5.0 (X11; Linux x86_64) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/80.0.3987.163 "
+        "Safari/537.36",
+        "Connection": "keep-alive",
+    }
+    """HTTP headers for downloads, shared by every result."""
+
     def __init__(
         self,
         doi: str,
@@ -150,17 +169,11 @@ class Result:
         self.jats_xml_path = Result.validate_jats_xml(jats_xml_path)
         self.abstract = abstract
         self.published = published
-        self.server = server
+        self.server = sys.intern(server)
         self.pdf_url = pdf_url
         self.entry_id = entry_id
         self.date = Result.validate_date(date)
 
-        self.headers = {
-            "User-Agent": "Mozilla/5.0 (X11; Linux x86_64) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/80.0.3987.163 "
-            "Safari/537.36",
-            "Connection": "keep-alive",
-        }
-
     @staticmethod
     def validate_doi(doi):
         """Validate a DOI."""
@@ -220,9 +233,12 @@ class Result:
 
     def __eq__(self, other) -> bool:
         if isinstance(other, Result):
-            return self.doi == other.doi
+            return (self.doi, self.version) == (other.doi, other.version)
         return False
 
+    def __hash__(self) -> int:
+        return hash((self.doi, self.version))
+
     def get_short_id(self) -> str:
         """
         Returns the short ID for this result.
@@ -240,14 +256,18 @@ class Result:
         """
         return self.doi
 
-    async def get_pdf_url(self, session: aiohttp.ClientSession) -> str:
-        doi_base = "https://doi.org"
-        self.entry_id = f"{doi_base}/{self.doi}"
-
-        async with session.get(self.entry_id, headers=self.headers) as response:
-            content_path = f"{response.url}.pdf"
-            await asyncio.sleep(0.001)
-            return content_path
+    async def get_pdf_url(
+        self,
+        session: aiohttp.ClientSession,
+        resolver: Optional[PdfUrlResolver] = None,
+    ) -> str:
+        """
+        Resolves the PDF URL of this result, see `PdfUrlResolver`.
+        """
+        self.entry_id = f"{DOI_BASE}/{self.doi}"
+        if resolver is None:
+            resolver = default_resolver()
+        return await resolver.resolve(session, self.server, self.doi, self.version)
 
     def _get_default_filename(self, extension: str = "pdf") -> str:
         """
@@ -279,15 +299,9 @@ class Result:
 
         self.pdf_url = await self.get_pdf_url(session)
         logger.info(f"Downloading: {filename}")
-        async with session.get(
-            self.pdf_url, headers=self.headers, raise_for_status=True
-        ) as response:
-            async with aiofiles.open(path, "wb") as f:
-                async for chunk in response.content.iter_chunked(1024):
-                    await asyncio.sleep(0.001)
-                    await f.write(chunk)
-
-        return path
+        return await default_manager().download(
+            session, self.pdf_url, path, self.headers
+        )
 
     @staticmethod
     def _to_datetime(ts: time.struct_time) -> datetime:
@@ -358,6 +372,13 @@ class Search(BaseModel):
     end_date: Optional[str] = None
     days: Optional[int] = None
     server: str
+    categories: list[str] = []
+    """
+    Categories to restrict the search to; empty means every category.
+
+    Each category is requested from the API separately and results are
+    filtered again by `Result.category` before they are yielded.
+    """
     max_results: float
     """
     The maximum number of results to be returned in an execution of this
@@ -372,13 +393,21 @@ class Search(BaseModel):
     """The sort order for results."""
 
     def __repr__(self) -> str:
-        return "Search(start-date={}, end-date={}, days={}, max_results={})".format(
+        return "Search(start-date={}, end-date={}, days={}, categories={}, max_results={})".format(
             self.start_date,
             self.end_date,
             self.days,
+            self.categories,
             self.max_results,
         )
 
+    def category_filter(self) -> frozenset[Category]:
+        """
+        Returns the set of requested categories, empty if every category is
+        requested.
+        """
+        return frozenset(Category.from_str(c) for c in self.categories)
+
     # async def _result(
     #     self,
     #     offset: int,
@@ -409,6 +438,16 @@ class Search(BaseModel):
         """
         return Client().results(self, offset=offset)
 
+    def aresults(
+        self, offset: int = 0, session: Optional[aiohttp.ClientSession] = None
+    ) -> t.AsyncGenerator[Result, None]:
+        """
+        Executes the specified search using a default async bioRxiv API client.
+
+        For info on default behavior, see `Client.aresults`.
+        """
+        return Client().aresults(self, offset=offset, session=session)
+
 
 class Client(BaseModel):
     """
@@ -428,68 +467,193 @@ class Client(BaseModel):
     _last_request_dt: datetime
     """
 
-    biorxiv_api: str = "https://api.biorxiv.org/details/biorxiv"
+    biorxiv_api: str = "https://api.biorxiv.org/details"
+    page_size: int = 100
+    max_concurrency: int = 4
     delay_seconds: int = 3
     num_retries: int = 3
+    limiter: Optional[RateLimiter] = None
+    """Spaces out the API requests of this client, if given."""
+    cache: Optional[PageCache] = None
+    """Serves repeated requests from disk, if given."""
     _last_request_dt: Optional[datetime] = None
 
+    class Config:
+        arbitrary_types_allowed = True
+
     def __repr__(self) -> str:
-        return "Client(delay_seconds={}, num_retries={})".format(
-            self.delay_seconds,
+        return "Client(page_size={}, max_concurrency={}, num_retries={})".format(
+            self.page_size,
+            self.max_concurrency,
             self.num_retries,
         )
 
+    def close(self) -> None:
+        """
+        Closes the page cache, if any.
+        """
+        if self.cache is not None:
+            self.cache.close()
+
     def results(self, search: Search, offset: int = 0):
         """
-        Uses this client configuration to fetch one page of the search results
-        at a time, yielding the parsed `Result`s, until `max_results` results
-        have been yielded or there are no more search results.
+        Synchronous wrapper of `Client.aresults`, yielding the parsed
+        `Result`s once the whole search has completed.
 
-        If all tries fail, raises an `UnexpectedEmptyPageError` or `HTTPError`.
+        Must not be called from a running event loop.
 
         Setting a nonzero `offset` discards leading records in the result set.
         When `offset` is greater than or equal to `search.max_results`, the full
         result set is discarded.
+        """
 
-        For more on using generators, see
-        [Generators](https://wiki.python.org/moin/Generators).
+        async def collect():
+            return [result async for result in self.aresults(search, offset)]
+
+        yield from asyncio.run(collect())
+
+    async def aresults(
+        self,
+        search: Search,
+        offset: int = 0,
+        session: Optional[aiohttp.ClientSession] = None,
+    ) -> t.AsyncGenerator[Result, None]:
+        """
+        Async counterpart of `Client.results`.
+
+        The category filter of the search is pushed into the API request, one
+        paginated query per category, and results of other categories are
+        dropped before they are yielded.
+
+        If `session` is None, a session is created for the duration of the
+        search.
         """
+        own_session = session is None
+        if own_session:
+            session = create_session()
 
-        # total_results may be reduced according to the feed's
-        total_results = search.max_results
-        entries = self._request(self._format_url(search))
+        try:
+            wanted = search.category_filter()
+            remaining = search.max_results
+            for category in self._api_categories(wanted):
+                pages = self._aresults_for(search, category, offset, session)
+                try:
+                    async for result in pages:
+                        if remaining <= 0:
+                            break
+                        if wanted and result.category not in wanted:
+                            continue
+                        remaining -= 1
+                        yield result
+                finally:
+                    await pages.aclose()
+        finally:
+            if own_session:
+                await session.close()
+
+    async def _aresults_for(
+        self,
+        search: Search,
+        category: Optional[str],
+        offset: int,
+        session: aiohttp.ClientSession,
+    ) -> t.AsyncGenerator[Result, None]:
+        """
+        Fetches every page of one API query.
+
+        The first page tells the total number of records in the interval; the
+        remaining cursors are then fetched concurrently, at most
+        `max_concurrency` at a time, and their `Result`s are yielded as pages
+        land, so results are not necessarily in API order.
+        """
+        tasks = []
+        try:
+            limit = search.max_results
+            first_page = await self._arequest(
+                session, self._format_url(search, offset, category)
+            )
+            total_results = self._total_results(first_page, offset, limit)
+            entries = first_page.get("collection", [])
+            logger.info(
+                "Got first page; {} of {} results available".format(
+                    total_results, search.max_results
+                )
+            )
 
-        for entry in entries["collection"]:
-            if offset < total_results:
-                entry_result = Result.from_api_entry(entry)
-                total_results -= 1
-                yield entry_result
-            else:
-                break
+            cursors = range(offset + len(entries), int(total_results), self.page_size)
+            semaphore = asyncio.Semaphore(self.max_concurrency)
+
+            async def fetch(cursor):
+                async with semaphore:
+                    page = await self._arequest(
+                        session, self._format_url(search, cursor, category)
+                    )
+                return cursor, page.get("collection", [])
+
+            if entries:
+                tasks = [asyncio.ensure_future(fetch(c)) for c in cursors]
+
+            for entry in entries[: max(int(total_results) - offset, 0)]:
+                yield Result.from_api_entry(entry)
+
+            for done in asyncio.as_completed(tasks):
+                cursor, entries = await done
+                for entry in entries[: max(int(total_results) - cursor, 0)]:
+                    yield Result.from_api_entry(entry)
+        finally:
+            for task in tasks:
+                task.cancel()
+
+    @staticmethod
+    def _api_categories(wanted: frozenset[Category]) -> list[Optional[str]]:
+        """
+        Returns the `category` parameters to query, `[None]` for every category.
+        """
+        names = sorted(c.api_name for c in wanted if c is not Category.Unknown)
+        return names or [None]
+
+    @staticmethod
+    def _total_results(page: dict[str, Any], offset: int, limit: float) -> float:
+        """
+        Reads the total number of records from a page's `messages` block and
+        caps it to `offset + limit`.
+        """
+        messages = page.get("messages") or [{}]
+        total = int(messages[0].get("total", 0) or 0)
+        return min(total, offset + limit)
 
     @tenacity.retry(
         wait=tenacity.wait_exponential(multiplier=1, min=4, max=10),
         stop=tenacity.stop_after_attempt(5),
         reraise=True,
     )
-    def _request(self, url) -> dict[str, Any]:
-        response = requests.get(url)
-        response.raise_for_status()
-        content = response.content.strip().decode()
-        content = json.loads(content)
-        return content
-
-    def _format_url(self, search: Search) -> str:
+    async def _arequest(self, session: aiohttp.ClientSession, url) -> dict[str, Any]:
+        if self.cache is not None and (body := self.cache.fresh(url)) is not None:
+            return await loads(body)
+        if self.limiter is not None:
+            await self.limiter.acquire()
+        logger.info(f"Requesting page of results {url}")
+        if self.cache is not None:
+            return await loads(await self.cache.get(session, url))
+        return await get_json(session, url)
+
+    def _format_url(
+        self, search: Search, cursor: int = 0, category: Optional[str] = None
+    ) -> str:
         """
         Construct a request API for search that returns up to `page_size`
-        results starting with the result at index `start`.
+        results starting with the result at index `cursor`, restricted to
+        `category` if given.
         """
-
-        return (
-            f"{self.biorxiv_api}/{search.days}d"
+        interval = (
+            f"{search.days}d"
             if search.days is not None
-            else f"{self.biorxiv_api}/{search.start_date}/{search.end_date}"
+            else f"{search.start_date}/{search.end_date}"
         )
+        url = f"{self.biorxiv_api}/{search.server}/{interval}/{cursor}"
+        if category:
+            url += "?" + urlencode({"category": category})
+        return url
 
 
 class ArxivError(Exception):
@@ -0,0 +1,151 @@
+"""
+Streaming parser for arXiv API Atom feeds.
+
+Builds `Result`, `Author` and `Link` objects directly from an incremental XML
+parser, entry by entry, without materializing a feedparser tree or keeping the
+raw entries alive.
+"""
+import re
+import xml.etree.ElementTree as ET
+from datetime import datetime, timezone
+from typing import Iterable, List, Optional, Tuple
+
+from loguru import logger
+
+from .arxiv_result import Author, Link, MissingFieldError, Result
+
+ATOM = "{http://www.w3.org/2005/Atom}"
+ARXIV = "{http://arxiv.org/schemas/atom}"
+OPENSEARCH = "{http://a9.com/-/spec/opensearch/1.1/}"
+
+_ENTRY = ATOM + "entry"
+_TOTAL_RESULTS = OPENSEARCH + "totalResults"
+
+
+def _parse_datetime(text: Optional[str]) -> datetime:
+    """
+    Converts an Atom timestamp such as `2023-05-01T17:59:58Z` into a
+    time-zone-aware datetime.
+    """
+    if not text:
+        raise MissingFieldError("updated")
+    return datetime.strptime(text.strip(), "%Y-%m-%dT%H:%M:%SZ").replace(
+        tzinfo=timezone.utc
+    )
+
+
+def _text(element: ET.Element, tag: str) -> Optional[str]:
+    child = element.find(tag)
+    return child.text if child is not None else None
+
+
+def result_from_element(entry: ET.Element, metadata_only: bool = False) -> Result:
+    """
+    Converts an Atom `<entry>` element of an arXiv search result feed into a
+    Result object.
+    """
+    entry_id = _text(entry, ATOM + "id")
+    if entry_id is None:
+        raise MissingFieldError("id")
+
+    title = _text(entry, ATOM + "title")
+    if title is None:
+        logger.warning(
+            "Result {} is missing title attribute; defaulting to '0'", entry_id
+        )
+        title = "0"
+
+    primary_category = entry.find(ARXIV + "primary_category")
+    return Result(
+        entry_id=entry_id.strip(),
+        updated=_parse_datetime(_text(entry, ATOM + "updated")),
+        published=_parse_datetime(_text(entry, ATOM + "published")),
+        title=re.sub(r"\s+", " ", title).strip(),
+        authors=[
+            Author((author.findtext(ATOM + "name") or "").strip())
+            for author in entry.iterfind(ATOM + "author")
+        ],
+        summary=(_text(entry, ATOM + "summary") or "").strip(),
+        comment=_text(entry, ARXIV + "comment"),
+        journal_ref=_text(entry, ARXIV + "journal_ref"),
+        doi=_text(entry, ARXIV + "doi"),
+        primary_category=(
+            primary_category.get("term") if primary_category is not None else None
+        ),
+        categories=[tag.get("term") for tag in entry.iterfind(ATOM + "category")],
+        links=[
+            Link(
+                href=link.get("href"),
+                title=link.get("title"),
+                rel=link.get("rel"),
+                content_type=link.get("type"),
+            )
+            for link in entry.iterfind(ATOM + "link")
+        ],
+        metadata_only=metadata_only,
+    )
+
+
+class AtomParser:
+    """
+    Incremental parser for one page of an arXiv API feed.
+
+    Feed it the page body in chunks; every completed `<entry>` is converted to
+    a `Result` and then dropped from the element tree.
+    """
+
+    total_results: Optional[int]
+    """The feed's opensearch:totalResults value, once it has been parsed."""
+
+    def __init__(self, metadata_only: bool = False):
+        self.metadata_only = metadata_only
+        self._parser = ET.XMLPullParser(events=("start", "end"))
+        self._root: Optional[ET.Element] = None
+        self.total_results = None
+
+    def feed(self, data: bytes) -> List[Result]:
+        """
+        Feeds a chunk of the page body and returns the entries it completed.
+        """
+        self._parser.feed(data)
+        return list(self._drain())
+
+    def close(self) -> List[Result]:
+        """
+        Signals the end of the page body and returns the remaining entries.
+        """
+        self._parser.close()
+        return list(self._drain())
+
+    def _drain(self) -> Iterable[Result]:
+        for event, element in self._parser.read_events():
+            if event == "start":
+                if self._root is None:
+                    self._root = element
+                continue
+
+            if element.tag == _TOTAL_RESULTS:
+                self.total_results = int(element.text.strip())
+            elif element.tag == _ENTRY:
+                try:
+                    yield result_from_element(element, self.metadata_only)
+                except MissingFieldError:
+                    logger.warning("Skipping partial result")
+                finally:
+                    # release the parsed entry right away
+                    self._root.remove(element)
+
+
+def parse_page(
+    body: bytes, metadata_only: bool = False
+) -> Tuple[Optional[int], List[Result]]:
+    """
+    Parses a whole page body.
+
+    Returns:
+        The feed's total number of results and the parsed `Result`s.
+    """
+    parser = AtomParser(metadata_only=metadata_only)
+    results = parser.feed(body)
+    results.extend(parser.close())
+    return parser.total_results, results
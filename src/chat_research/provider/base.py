@@ -0,0 +1,293 @@
+"""
+Common interface of the paper sources, and concurrent search over several of them.
+"""
+import asyncio
+import datetime
+import os
+import re
+from pathlib import Path
+from typing import (
+    Any,
+    AsyncIterator,
+    Iterable,
+    List,
+    NamedTuple,
+    Optional,
+    Protocol,
+    Tuple,
+    runtime_checkable,
+)
+
+import aiohttp
+from loguru import logger
+
+from ..ranker import rank_results, tokenize
+from ..scheduler import RateLimiter
+from . import async_arxiv, async_biorxiv
+
+
+class PaperMetadata(NamedTuple):
+    """
+    What a reader needs to know about a search result, whatever its source.
+    """
+
+    source: str
+    key: str
+    """Identifies the paper within its source, e.g. an arXiv ID or a DOI."""
+    title: str
+    url: str
+    abstract: str
+    authors: List[str]
+    date: Optional[datetime.datetime]
+    doi: Optional[str]
+
+
+@runtime_checkable
+class Provider(Protocol):
+    """
+    A source of papers: searches it, resolves and downloads PDFs, and describes
+    its results as `PaperMetadata`.
+    """
+
+    name: str
+
+    def search(
+        self, query: str, max_results: int, session: aiohttp.ClientSession
+    ) -> AsyncIterator[Any]:
+        """Yields the source's results for a query."""
+        ...
+
+    async def resolve_pdf(self, result, session: aiohttp.ClientSession) -> str:
+        """Returns the URL or path of a result's PDF."""
+        ...
+
+    async def download(
+        self, result, session: aiohttp.ClientSession, dirpath: Path, filename: str
+    ) -> Path:
+        """Stores a result's PDF in `dirpath` and returns its path."""
+        ...
+
+    def metadata(self, result) -> PaperMetadata:
+        """Describes a result."""
+        ...
+
+
+def _clean(text: str) -> str:
+    return text.replace("-\n", "-").replace("\n", " ")
+
+
+class ArxivProvider:
+    """
+    arXiv API search; requests are spaced out by the client's own limiter.
+    """
+
+    name = "arxiv"
+
+    def __init__(
+        self,
+        sort_by: async_arxiv.SortCriterion = async_arxiv.SortCriterion.Relevance,
+        delay_seconds: float = 3,
+    ):
+        self.sort_by = sort_by
+        self.client = async_arxiv.AsyncClient(delay_seconds=delay_seconds)
+
+    @staticmethod
+    def format_query(query: str) -> str:
+        """
+        Turns plain words into an arXiv query matching all of them; queries
+        that already use field prefixes such as `ti:` are kept.
+        """
+        if ":" in query:
+            return query
+        return " AND ".join(f"all:{word}" for word in query.split())
+
+    def search(self, query, max_results, session):
+        search = async_arxiv.Search(
+            query=self.format_query(query),
+            max_results=max_results,
+            sort_by=self.sort_by,
+            sort_order=async_arxiv.SortOrder.Descending,
+        )
+        return self.client.aresults(search, session=session)
+
+    async def resolve_pdf(self, result, session) -> str:
+        return result.pdf_url
+
+    async def download(self, result, session, dirpath, filename) -> Path:
+        return await result.download_pdf(session, Path(dirpath).as_posix(), filename)
+
+    def metadata(self, result) -> PaperMetadata:
+        return PaperMetadata(
+            source=self.name,
+            key=result.get_short_id(),
+            title=result.title,
+            url=result.entry_id,
+            abstract=_clean(result.summary),
+            authors=[str(author) for author in result.authors],
+            date=result.updated,
+            doi=result.doi,
+        )
+
+
+class BiorxivProvider:
+    """
+    bioRxiv API search over the last `days` days of `categories`.
+
+    The API has no full-text search, so the interval is fetched and results
+    are kept by the BM25 relevance of their title and abstract to the query.
+    """
+
+    name = "biorxiv"
+
+    def __init__(
+        self,
+        categories: Iterable[str] = (),
+        days: int = 2,
+        delay_seconds: float = 1,
+    ):
+        self.categories = list(categories)
+        self.days = days
+        self.limiter = RateLimiter(delay_seconds)
+        self.client = async_biorxiv.Client(limiter=self.limiter)
+
+    async def search(self, query, max_results, session):
+        search = async_biorxiv.Search(
+            days=self.days,
+            server=self.name,
+            categories=self.categories,
+            max_results=float("inf"),
+        )
+        results = [r async for r in self.client.aresults(search, session=session)]
+        documents = [r.title + " " + _clean(r.abstract) for r in results]
+        for result in rank_results(results, documents, query, top_k=max_results):
+            yield result
+
+    async def resolve_pdf(self, result, session) -> str:
+        return await result.get_pdf_url(session)
+
+    async def download(self, result, session, dirpath, filename) -> Path:
+        return await result.download_pdf(session, Path(dirpath).as_posix(), filename)
+
+    def metadata(self, result) -> PaperMetadata:
+        return PaperMetadata(
+            source=self.name,
+            key=f"{result.doi}v{result.version}",
+            title=result.title,
+            url=f"https://doi.org/{result.doi}",
+            abstract=_clean(result.abstract),
+            authors=[author.strip() for author in result.authors.split(";")],
+            date=result.date,
+            doi=result.doi,
+        )
+
+
+class MedrxivProvider(BiorxivProvider):
+    """
+    medRxiv, served by the same API as bioRxiv.
+    """
+
+    name = "medrxiv"
+
+
+class LocalResult(NamedTuple):
+    path: Path
+
+
+class LocalProvider:
+    """
+    PDFs below a local folder, matched by the words of their file names.
+    """
+
+    name = "local"
+
+    def __init__(self, root: Path):
+        self.root = Path(root)
+
+    async def search(self, query, max_results, session):
+        words = set(tokenize(query))
+        count = 0
+        for dirpath, _, filenames in os.walk(self.root):
+            for filename in sorted(filenames):
+                if not filename.endswith(".pdf") or count >= max_results:
+                    continue
+                if words and not words & set(tokenize(filename)):
+                    continue
+                count += 1
+                yield LocalResult(Path(dirpath) / filename)
+
+    async def resolve_pdf(self, result, session) -> str:
+        return result.path.resolve().as_uri()
+
+    async def download(self, result, session, dirpath, filename) -> Path:
+        # already on disk
+        return result.path
+
+    def metadata(self, result) -> PaperMetadata:
+        mtime = result.path.stat().st_mtime
+        return PaperMetadata(
+            source=self.name,
+            key=result.path.as_posix(),
+            title="",
+            url=result.path.resolve().as_uri(),
+            abstract="",
+            authors=[],
+            date=datetime.datetime.fromtimestamp(mtime),
+            doi=None,
+        )
+
+
+def dedupe_key(metadata: PaperMetadata) -> str:
+    """
+    Returns the key under which the same paper from several sources collides:
+    its DOI if known, otherwise its normalized title.
+    """
+    if metadata.doi:
+        return "doi:" + metadata.doi.lower()
+    if metadata.title:
+        return "title:" + " ".join(re.findall(r"\w+", metadata.title.lower()))
+    return f"{metadata.source}:{metadata.key}"
+
+
+async def multi_search(
+    providers: List[Provider],
+    query: str,
+    max_results: int,
+    session: aiohttp.ClientSession,
+) -> AsyncIterator[Tuple[Provider, Any]]:
+    """
+    Searches every provider concurrently and yields `(provider, result)`
+    pairs as they arrive, skipping papers already yielded by another provider.
+
+    A failing provider is logged and does not stop the others.
+    """
+    queue: asyncio.Queue = asyncio.Queue(maxsize=max(max_results, 1))
+    done = object()
+
+    async def produce(provider):
+        try:
+            async for result in provider.search(query, max_results, session):
+                await queue.put((provider, result))
+        except Exception as e:
+            logger.error(f"{provider.name} search failed: {e}")
+        finally:
+            await queue.put(done)
+
+    tasks = [asyncio.ensure_future(produce(provider)) for provider in providers]
+    seen = set()
+    running = len(tasks)
+    try:
+        while running:
+            item = await queue.get()
+            if item is done:
+                running -= 1
+                continue
+            provider, result = item
+            key = dedupe_key(provider.metadata(result))
+            if key in seen:
+                logger.debug(f"duplicate from {provider.name}: {key}")
+                continue
+            seen.add(key)
+            yield provider, result
+    finally:
+        for task in tasks:
+            task.cancel()
@@ -0,0 +1,134 @@
+"""
+On-disk cache of raw API result pages, keyed on the request URL.
+"""
+import gzip
+import sqlite3
+import time
+from pathlib import Path
+from typing import Mapping, NamedTuple, Optional
+
+import aiohttp
+from loguru import logger
+
+from ..utils import CACHE_PATH
+
+MAX_AGE_SECONDS = 7 * 24 * 3600
+"""Pages not refreshed for this long are dropped when a cache is opened."""
+
+
+class CachedPage(NamedTuple):
+    body: bytes
+    etag: Optional[str]
+    last_modified: Optional[str]
+    fetched_at: float
+
+
+class PageCache:
+    """
+    Stores gzip-compressed page bodies with the validators the server sent.
+
+    Pages younger than `ttl_seconds` are served without any request. Older
+    pages are revalidated with `If-None-Match`/`If-Modified-Since` when the
+    server sent an `ETag`/`Last-Modified`, so an unchanged page costs a 304
+    instead of a full body.
+    """
+
+    def __init__(self, ttl_seconds: float, path: Path = CACHE_PATH / "pages.sqlite3"):
+        self.ttl_seconds = ttl_seconds
+        self.path = Path(path)
+        self.path.parent.mkdir(parents=True, exist_ok=True)
+        self.conn = sqlite3.connect(self.path)
+        with self.conn:
+            self.conn.execute(
+                "CREATE TABLE IF NOT EXISTS pages ("
+                "url TEXT PRIMARY KEY, body BLOB NOT NULL, etag TEXT, "
+                "last_modified TEXT, fetched_at REAL NOT NULL)"
+            )
+            self.conn.execute(
+                "DELETE FROM pages WHERE fetched_at < ?",
+                (time.time() - max(MAX_AGE_SECONDS, ttl_seconds),),
+            )
+
+    def close(self) -> None:
+        self.conn.close()
+
+    def __enter__(self) -> "PageCache":
+        return self
+
+    def __exit__(self, *exc_info) -> None:
+        self.close()
+
+    def lookup(self, url: str) -> Optional[CachedPage]:
+        row = self.conn.execute(
+            "SELECT body, etag, last_modified, fetched_at FROM pages WHERE url = ?",
+            (url,),
+        ).fetchone()
+        if row is None:
+            return None
+        body, etag, last_modified, fetched_at = row
+        return CachedPage(gzip.decompress(body), etag, last_modified, fetched_at)
+
+    def fresh(self, url: str) -> Optional[bytes]:
+        """
+        Returns the cached body of a URL if it is younger than the TTL.
+        """
+        page = self.lookup(url)
+        if page is not None and time.time() - page.fetched_at < self.ttl_seconds:
+            logger.info(f"Using cached page {url}")
+            return page.body
+        return None
+
+    def conditional_headers(self, url: str) -> dict[str, str]:
+        """
+        Returns the revalidation headers for a stale cached URL, if any.
+        """
+        page = self.lookup(url)
+        headers = {}
+        if page is not None:
+            if page.etag:
+                headers["If-None-Match"] = page.etag
+            if page.last_modified:
+                headers["If-Modified-Since"] = page.last_modified
+        return headers
+
+    def revalidated(self, url: str) -> bytes:
+        """
+        Marks a cached URL as fresh again after a 304 and returns its body.
+        """
+        with self.conn:
+            self.conn.execute(
+                "UPDATE pages SET fetched_at = ? WHERE url = ?", (time.time(), url)
+            )
+        logger.info(f"Revalidated cached page {url}")
+        return self.lookup(url).body
+
+    def store(self, url: str, body: bytes, headers: Mapping[str, str]) -> None:
+        with self.conn:
+            self.conn.execute(
+                "INSERT OR REPLACE INTO pages "
+                "(url, body, etag, last_modified, fetched_at) VALUES (?, ?, ?, ?, ?)",
+                (
+                    url,
+                    gzip.compress(body),
+                    headers.get("ETag"),
+                    headers.get("Last-Modified"),
+                    time.time(),
+                ),
+            )
+
+    async def get(self, session: aiohttp.ClientSession, url: str) -> bytes:
+        """
+        Fetches a URL through the cache, raising for non-2xx statuses.
+        """
+        body = self.fresh(url)
+        if body is not None:
+            return body
+
+        headers = self.conditional_headers(url)
+        async with session.get(url, headers=headers) as response:
+            if response.status == 304 and headers:
+                return self.revalidated(url)
+            response.raise_for_status()
+            body = await response.read()
+            self.store(url, body, response.headers)
+            return body
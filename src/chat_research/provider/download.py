@@ -0,0 +1,245 @@
+"""
+Streaming file downloads shared by the providers.
+"""
+import asyncio
+import os
+import time
+from pathlib import Path
+from typing import AsyncIterator, Dict, Mapping, Optional
+from urllib.parse import urlsplit
+
+import aiohttp
+from loguru import logger
+
+MIN_CHUNK_BYTES = 64 * 1024
+"""Smallest write, used at the start of every download."""
+MAX_CHUNK_BYTES = 4 * 1024 * 1024
+"""Largest write, reached on fast connections."""
+CHUNK_SECONDS = 0.25
+"""Target time to fill one chunk; chunks grow or shrink towards it."""
+PER_HOST = 4
+"""Default number of concurrent downloads from one host."""
+
+
+class HostStats:
+    """
+    Bytes moved from one host and the time any download from it was running.
+    """
+
+    def __init__(self):
+        self.files = 0
+        self.bytes = 0
+        self.seconds = 0.0
+        self._active = 0
+        self._since = 0.0
+
+    def begin(self) -> None:
+        if self._active == 0:
+            self._since = time.perf_counter()
+        self._active += 1
+
+    def end(self, written: int) -> None:
+        self._active -= 1
+        if self._active == 0:
+            self.seconds += time.perf_counter() - self._since
+        self.files += 1
+        self.bytes += written
+
+    @property
+    def mb_per_second(self) -> float:
+        return self.bytes / 1e6 / self.seconds if self.seconds else 0.0
+
+
+class DownloadManager:
+    """
+    Downloads files with at most `per_host` concurrent transfers per host.
+
+    Data is written in chunks that double while the connection fills them in
+    less than `CHUNK_SECONDS` and halve when it does not, between
+    `MIN_CHUNK_BYTES` and `MAX_CHUNK_BYTES`. A file is written to a `.part`
+    file next to its target and renamed into place once complete; a `.part`
+    file left by an interrupted download is resumed with a `Range` request.
+    """
+
+    def __init__(
+        self,
+        per_host: int = PER_HOST,
+        min_chunk: int = MIN_CHUNK_BYTES,
+        max_chunk: int = MAX_CHUNK_BYTES,
+    ):
+        self.per_host = per_host
+        self.min_chunk = min_chunk
+        self.max_chunk = max_chunk
+        self.stats: Dict[str, HostStats] = {}
+        self._semaphores: Dict[str, asyncio.Semaphore] = {}
+        self._loop: Optional[asyncio.AbstractEventLoop] = None
+
+    def _semaphore(self, host: str) -> asyncio.Semaphore:
+        # semaphores are bound to the event loop they were first used in,
+        # and each `asyncio.run` starts a new one
+        loop = asyncio.get_running_loop()
+        if loop is not self._loop:
+            self._loop = loop
+            self._semaphores = {}
+        if host not in self._semaphores:
+            self._semaphores[host] = asyncio.Semaphore(self.per_host)
+        return self._semaphores[host]
+
+    async def download(
+        self,
+        session: aiohttp.ClientSession,
+        url: str,
+        path: Path,
+        headers: Optional[Mapping[str, str]] = None,
+    ) -> Path:
+        """
+        Downloads `url` to `path` and returns `path`.
+
+        Raises:
+            aiohttp.ClientResponseError: For non-2xx statuses.
+        """
+        path = Path(path)
+        part = path.with_name(path.name + ".part")
+        host = urlsplit(url).hostname or ""
+        stats = self.stats.setdefault(host, HostStats())
+
+        async with self._semaphore(host):
+            stats.begin()
+            written = 0
+            start = time.perf_counter()
+            try:
+                written = await self._fetch(session, url, part, headers)
+            finally:
+                stats.end(written)
+            elapsed = time.perf_counter() - start
+
+        os.replace(part, path)
+        logger.debug(
+            f"Downloaded {path.name}: {written / 1e6:.2f} MB "
+            f"at {written / 1e6 / max(elapsed, 1e-9):.2f} MB/s"
+        )
+        return path
+
+    async def read(
+        self,
+        session: aiohttp.ClientSession,
+        url: str,
+        headers: Optional[Mapping[str, str]] = None,
+    ) -> bytes:
+        """
+        Downloads `url` into memory, under the same per-host limit.
+
+        Raises:
+            aiohttp.ClientResponseError: For non-2xx statuses.
+        """
+        host = urlsplit(url).hostname or ""
+        stats = self.stats.setdefault(host, HostStats())
+
+        async with self._semaphore(host):
+            stats.begin()
+            body = b""
+            try:
+                async with session.get(
+                    url, headers=headers, raise_for_status=True
+                ) as response:
+                    body = await response.read()
+            finally:
+                stats.end(len(body))
+        return body
+
+    async def stream(
+        self,
+        session: aiohttp.ClientSession,
+        url: str,
+        headers: Optional[Mapping[str, str]] = None,
+    ) -> AsyncIterator[bytes]:
+        """
+        Yields the body of `url` as it arrives, under the same per-host limit.
+
+        Raises:
+            aiohttp.ClientResponseError: For non-2xx statuses.
+        """
+        host = urlsplit(url).hostname or ""
+        stats = self.stats.setdefault(host, HostStats())
+
+        async with self._semaphore(host):
+            stats.begin()
+            size = 0
+            try:
+                async with session.get(
+                    url, headers=headers, raise_for_status=True
+                ) as response:
+                    async for data in response.content.iter_chunked(self.min_chunk):
+                        size += len(data)
+                        yield data
+            finally:
+                stats.end(size)
+
+    async def _fetch(self, session, url, part: Path, headers) -> int:
+        offset = part.stat().st_size if part.exists() else 0
+        request_headers = dict(headers or {})
+        if offset:
+            request_headers["Range"] = f"bytes={offset}-"
+
+        async with session.get(url, headers=request_headers) as response:
+            if response.status == 416 and offset:
+                # the part file is stale or already complete; start over
+                part.unlink()
+                return await self._fetch(session, url, part, headers)
+            response.raise_for_status()
+            if response.status != 206:
+                # the server ignored the range
+                offset = 0
+            elif offset:
+                logger.info(f"Resuming {part.name} at {offset} bytes")
+            return await self._write(response, part, append=offset > 0)
+
+    async def _write(
+        self, response: aiohttp.ClientResponse, part: Path, append: bool
+    ) -> int:
+        loop = asyncio.get_running_loop()
+        chunk_size = self.min_chunk
+        written = 0
+        buffer = bytearray()
+        with open(part, "ab" if append else "wb") as f:
+            filled_at = time.perf_counter()
+            async for data in response.content.iter_any():
+                buffer += data
+                if len(buffer) < chunk_size:
+                    continue
+                now = time.perf_counter()
+                if now - filled_at < CHUNK_SECONDS / 2:
+                    chunk_size = min(chunk_size * 2, self.max_chunk)
+                elif now - filled_at > CHUNK_SECONDS * 2:
+                    chunk_size = max(chunk_size // 2, self.min_chunk)
+                await loop.run_in_executor(None, f.write, bytes(buffer))
+                written += len(buffer)
+                buffer.clear()
+                filled_at = time.perf_counter()
+            if buffer:
+                await loop.run_in_executor(None, f.write, bytes(buffer))
+                written += len(buffer)
+        return written
+
+    def log_throughput(self) -> None:
+        """
+        Logs the average download rate of every host so far.
+        """
+        for host, stats in sorted(self.stats.items()):
+            logger.info(
+                f"{host}: {stats.files} files, {stats.bytes / 1e6:.1f} MB, "
+                f"{stats.mb_per_second:.2f} MB/s"
+            )
+
+
+_default_manager: Optional[DownloadManager] = None
+
+
+def default_manager() -> DownloadManager:
+    """
+    Returns the process-wide download manager.
+    """
+    global _default_manager
+    if _default_manager is None:
+        _default_manager = DownloadManager()
+    return _default_manager
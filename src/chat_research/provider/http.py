@@ -0,0 +1,70 @@
+"""
+Shared, pooled HTTP layer of the providers.
+"""
+import asyncio
+import json
+from typing import Any
+
+import aiohttp
+
+DEFAULT_HEADERS = {
+    "User-Agent": "Mozilla/5.0 (X11; Linux x86_64) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/80.0.3987.163 "
+    "Safari/537.36",
+}
+
+LIMIT = 64
+"""Maximum number of open connections of a session."""
+LIMIT_PER_HOST = 8
+"""Maximum number of open connections to a single host."""
+DNS_CACHE_SECONDS = 300
+"""How long resolved host names are cached."""
+KEEPALIVE_SECONDS = 30
+"""How long idle connections are kept open for reuse."""
+OFFLOAD_JSON_BYTES = 256 * 1024
+"""Bodies larger than this are decoded in the default executor."""
+
+
+def create_session(
+    limit: int = LIMIT,
+    limit_per_host: int = LIMIT_PER_HOST,
+    read_timeout: float = 60,
+) -> aiohttp.ClientSession:
+    """
+    Creates a pooled session with keep-alive, a per-host connection limit and
+    DNS caching, to be shared by searches and downloads.
+
+    Must be called from a running event loop.
+    """
+    connector = aiohttp.TCPConnector(
+        limit=limit,
+        limit_per_host=limit_per_host,
+        ttl_dns_cache=DNS_CACHE_SECONDS,
+        use_dns_cache=True,
+        keepalive_timeout=KEEPALIVE_SECONDS,
+    )
+    return aiohttp.ClientSession(
+        connector=connector,
+        headers=DEFAULT_HEADERS,
+        # no total timeout: requests may queue behind the per-host limit
+        timeout=aiohttp.ClientTimeout(
+            total=None, sock_connect=30, sock_read=read_timeout
+        ),
+    )
+
+
+async def loads(body: bytes) -> Any:
+    """
+    Decodes a JSON body, off the event loop when it is large.
+    """
+    if len(body) < OFFLOAD_JSON_BYTES:
+        return json.loads(body)
+    loop = asyncio.get_running_loop()
+    return await loop.run_in_executor(None, json.loads, body)
+
+
+async def get_json(session: aiohttp.ClientSession, url: str) -> Any:
+    """
+    Fetches and decodes a JSON document, raising for non-2xx statuses.
+    """
+    async with session.get(url, raise_for_status=True) as response:
+        return await loads(await response.read())
@@ -0,0 +1,143 @@
+"""
+Resolution of bioRxiv/medRxiv DOIs to PDF URLs, backed by a persistent cache.
+"""
+import asyncio
+import re
+import sqlite3
+import threading
+from pathlib import Path
+from typing import Optional
+
+import aiohttp
+from loguru import logger
+
+from ..utils import CACHE_PATH
+
+CONTENT_URLS = {
+    "biorxiv": "https://www.biorxiv.org/content/{doi}v{version}.full.pdf",
+    "medrxiv": "https://www.medrxiv.org/content/{doi}v{version}.full.pdf",
+}
+"""PDF URL patterns of the servers whose layout is known."""
+DOI_BASE = "https://doi.org"
+LANDING_PAGE_BYTES = 256 * 1024
+"""The `citation_pdf_url` tag is looked for in this much of a landing page."""
+
+_CITATION_PDF_URL = re.compile(
+    rb"""<meta[^>]+name=["']citation_pdf_url["'][^>]+content=["']([^"']+)["']""",
+    re.IGNORECASE,
+)
+
+
+class PdfUrlResolver:
+    """
+    Maps a DOI and version to the URL of the PDF.
+
+    URLs are built from `CONTENT_URLS` when the server is known and checked
+    with a HEAD request. When the check answers 404, or the server is unknown,
+    the DOI is followed to the landing page and its `citation_pdf_url` tag is
+    read. Checked URLs are stored on disk so that later runs skip the round
+    trips; the database is only touched from the default executor.
+    """
+
+    def __init__(self, path: Path = CACHE_PATH / "pdf_urls.sqlite3"):
+        self.path = Path(path)
+        self._conn: Optional[sqlite3.Connection] = None
+        self._lock = threading.Lock()
+
+    @property
+    def conn(self) -> sqlite3.Connection:
+        if self._conn is None:
+            self.path.parent.mkdir(parents=True, exist_ok=True)
+            self._conn = sqlite3.connect(self.path, check_same_thread=False)
+            self._conn.execute(
+                "CREATE TABLE IF NOT EXISTS pdf_urls ("
+                "doi TEXT NOT NULL, version TEXT NOT NULL, url TEXT NOT NULL, "
+                "PRIMARY KEY (doi, version))"
+            )
+        return self._conn
+
+    def close(self) -> None:
+        if self._conn is not None:
+            self._conn.close()
+            self._conn = None
+
+    @staticmethod
+    def pattern_url(server: str, doi: str, version) -> Optional[str]:
+        """
+        Builds the PDF URL without any request, if the server's layout is known.
+        """
+        pattern = CONTENT_URLS.get((server or "").lower())
+        if pattern is None or not version:
+            return None
+        return pattern.format(doi=doi, version=version)
+
+    def cached(self, doi: str, version) -> Optional[str]:
+        with self._lock:
+            row = self.conn.execute(
+                "SELECT url FROM pdf_urls WHERE doi = ? AND version = ?",
+                (doi, str(version)),
+            ).fetchone()
+        return row[0] if row else None
+
+    def store(self, doi: str, version, url: str) -> None:
+        with self._lock, self.conn:
+            self.conn.execute(
+                "INSERT OR REPLACE INTO pdf_urls (doi, version, url) VALUES (?, ?, ?)",
+                (doi, str(version), url),
+            )
+
+    async def resolve(
+        self, session: aiohttp.ClientSession, server: str, doi: str, version
+    ) -> str:
+        """
+        Returns the PDF URL of the given DOI and version.
+        """
+        loop = asyncio.get_running_loop()
+        url = await loop.run_in_executor(None, self.cached, doi, version)
+        if url is not None:
+            return url
+
+        url = self.pattern_url(server, doi, version)
+        if url is not None:
+            async with session.head(url, allow_redirects=True) as response:
+                status = response.status
+            if status == 404:
+                logger.info(f"{url} not found, reading the landing page")
+                url = None
+            elif status >= 400:
+                # not a verdict on the URL, e.g. rate limiting; do not cache it
+                return url
+
+        if url is None:
+            url = await self.landing_pdf_url(session, doi)
+        await loop.run_in_executor(None, self.store, doi, version, url)
+        return url
+
+    @staticmethod
+    async def landing_pdf_url(session: aiohttp.ClientSession, doi: str) -> str:
+        """
+        Follows the DOI to the landing page and returns its `citation_pdf_url`,
+        or the landing page URL with `.pdf` appended if it has none.
+        """
+        logger.info(f"Resolving {DOI_BASE}/{doi}")
+        async with session.get(f"{DOI_BASE}/{doi}", allow_redirects=True) as response:
+            response.raise_for_status()
+            head = await response.content.read(LANDING_PAGE_BYTES)
+            landing = str(response.url)
+        match = _CITATION_PDF_URL.search(head)
+        if match is None:
+            return f"{landing}.pdf"
+        return match.group(1).decode()
+
+
+_default_resolver: Optional[PdfUrlResolver] = None
+
+
+def default_resolver() -> PdfUrlResolver:
+    """
+    Returns the process-wide resolver using the on-disk cache in `CACHE_PATH`.
+    """
+    global _default_resolver
+    if _default_resolver is None:
+        _default_resolver = PdfUrlResolver()
+    return _default_resolver
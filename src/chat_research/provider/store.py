@@ -0,0 +1,238 @@
+"""
+Content-addressed store of downloaded PDFs, shared by every run.
+"""
+import asyncio
+import hashlib
+import os
+import re
+import shutil
+import sqlite3
+from datetime import datetime
+from pathlib import Path
+from typing import NamedTuple, Optional, Tuple
+
+from loguru import logger
+
+from ..utils import CACHE_PATH
+
+STORE_PATH = CACHE_PATH / "pdfs"
+MAX_BYTES = 2 * 1024**3
+"""Least recently used PDFs are dropped once the store grows beyond this."""
+
+_VERSION = re.compile(r"^(?P<id>.+?)v(?P<version>\d+)$")
+
+
+def split_version(key: str) -> Tuple[str, str]:
+    """
+    Splits a provider key such as `2305.00001v2` into its ID and version.
+    """
+    match = _VERSION.match(key)
+    if match is None:
+        return key, ""
+    return match["id"], match["version"]
+
+
+def sha256_file(path: Path) -> str:
+    digest = hashlib.sha256()
+    with open(path, "rb") as f:
+        for block in iter(lambda: f.read(1024 * 1024), b""):
+            digest.update(block)
+    return digest.hexdigest()
+
+
+class StoredPdf(NamedTuple):
+    source: str
+    paper_id: str
+    version: str
+    sha256: str
+    size: int
+
+
+class PdfStore:
+    """
+    Keeps one copy of each PDF under `objects/`, named by its SHA-256, with a
+    catalog mapping provider IDs and versions to hashes.
+
+    Run folders get hardlinks to the stored files (copies across file
+    systems), so a paper already stored in its current version is never
+    downloaded again.
+    """
+
+    def __init__(self, root: Path = STORE_PATH, max_bytes: int = MAX_BYTES):
+        self.root = Path(root)
+        self.max_bytes = max_bytes
+        (self.root / "objects").mkdir(parents=True, exist_ok=True)
+        (self.root / "tmp").mkdir(exist_ok=True)
+        self.conn = sqlite3.connect(self.root / "catalog.sqlite3")
+        with self.conn:
+            self.conn.execute(
+                "CREATE TABLE IF NOT EXISTS pdfs ("
+                "source TEXT NOT NULL, paper_id TEXT NOT NULL, "
+                "version TEXT NOT NULL, sha256 TEXT NOT NULL, size INTEGER NOT NULL, "
+                "used_at TEXT NOT NULL, PRIMARY KEY (source, paper_id, version))"
+            )
+
+    def close(self) -> None:
+        self.conn.close()
+
+    def object_path(self, sha256: str) -> Path:
+        return self.root / "objects" / sha256[:2] / f"{sha256}.pdf"
+
+    def lookup(self, source: str, paper_id: str, version: str) -> Optional[StoredPdf]:
+        """
+        Returns the stored PDF of a paper version, if its file still exists.
+        """
+        row = self.conn.execute(
+            "SELECT source, paper_id, version, sha256, size FROM pdfs "
+            "WHERE source = ? AND paper_id = ? AND version = ?",
+            (source, paper_id, version),
+        ).fetchone()
+        if row is None:
+            return None
+        stored = StoredPdf(*row)
+        if not self.object_path(stored.sha256).exists():
+            return None
+        with self.conn:
+            self.conn.execute(
+                "UPDATE pdfs SET used_at = ? "
+                "WHERE source = ? AND paper_id = ? AND version = ?",
+                (datetime.now().isoformat(), source, paper_id, version),
+            )
+        return stored
+
+    def add(
+        self,
+        source: str,
+        paper_id: str,
+        version: str,
+        path: Path,
+        sha256: Optional[str] = None,
+    ) -> StoredPdf:
+        """
+        Moves a downloaded file into the store and records it.
+        """
+        if sha256 is None:
+            sha256 = sha256_file(path)
+        target = self.object_path(sha256)
+        target.parent.mkdir(exist_ok=True)
+        if target.exists():
+            # same content under another ID or version
+            os.unlink(path)
+        else:
+            os.replace(path, target)
+        stored = StoredPdf(source, paper_id, version, sha256, target.stat().st_size)
+        with self.conn:
+            self.conn.execute(
+                "INSERT OR REPLACE INTO pdfs "
+                "(source, paper_id, version, sha256, size, used_at) "
+                "VALUES (?, ?, ?, ?, ?, ?)",
+                (*stored, datetime.now().isoformat()),
+            )
+        return stored
+
+    def size(self) -> int:
+        """
+        Returns the total size of the stored files.
+        """
+        row = self.conn.execute(
+            "SELECT COALESCE(SUM(size), 0) FROM (SELECT DISTINCT sha256, size FROM pdfs)"
+        ).fetchone()
+        return row[0]
+
+    def gc(self, max_bytes: Optional[int] = None) -> int:
+        """
+        Drops least recently used entries until the store fits in `max_bytes`.
+
+        Files are only deleted once no entry refers to them; files already
+        placed in run folders are hardlinks or copies and keep their data.
+
+        Returns:
+            int: The number of bytes freed.
+        """
+        if max_bytes is None:
+            max_bytes = self.max_bytes
+        total = self.size()
+        freed = 0
+        rows = self.conn.execute(
+            "SELECT source, paper_id, version, sha256, size FROM pdfs "
+            "ORDER BY used_at"
+        ).fetchall()
+        for row in rows:
+            if total - freed <= max_bytes:
+                break
+            stored = StoredPdf(*row)
+            with self.conn:
+                self.conn.execute(
+                    "DELETE FROM pdfs WHERE source = ? AND paper_id = ? AND version = ?",
+                    stored[:3],
+                )
+            shared = self.conn.execute(
+                "SELECT 1 FROM pdfs WHERE sha256 = ?", (stored.sha256,)
+            ).fetchone()
+            if shared is None:
+                self.object_path(stored.sha256).unlink(missing_ok=True)
+                freed += stored.size
+        if freed:
+            logger.info(f"Removed {freed / 1e6:.1f} MB from the PDF store")
+        return freed
+
+    def link(self, stored: StoredPdf, path: Path) -> Path:
+        """
+        Places a stored PDF at `path`, replacing any existing file.
+        """
+        path = Path(path)
+        path.unlink(missing_ok=True)
+        source = self.object_path(stored.sha256)
+        try:
+            os.link(source, path)
+        except OSError:
+            # across file systems; a symlink would dangle once `gc` drops the object
+            shutil.copy2(source, path)
+        return path
+
+    def find(self, metadata) -> Optional[Path]:
+        """
+        Returns the stored file of a result's paper version, if any.
+        """
+        paper_id, version = split_version(metadata.key)
+        stored = self.lookup(metadata.source, paper_id, version)
+        return self.object_path(stored.sha256) if stored is not None else None
+
+    async def fetch(self, provider, result, session, dirpath: Path, filename: str):
+        """
+        Places the PDF of a search result at `dirpath / filename`, downloading it
+        through the provider only when its version is not stored yet.
+        """
+        metadata = provider.metadata(result)
+        paper_id, version = split_version(metadata.key)
+        stored = self.lookup(metadata.source, paper_id, version)
+        if stored is not None:
+            logger.info(f"Using stored PDF of {metadata.key}")
+            return self.link(stored, Path(dirpath) / filename)
+
+        # one folder per paper version, kept on failure so a partial download
+        # is resumed by the next run
+        name = hashlib.sha1(f"{metadata.source}:{metadata.key}".encode()).hexdigest()
+        tmpdir = self.root / "tmp" / name
+        tmpdir.mkdir(exist_ok=True)
+        path = Path(await provider.download(result, session, tmpdir, filename))
+        loop = asyncio.get_running_loop()
+        sha256 = await loop.run_in_executor(None, sha256_file, path)
+        stored = self.add(metadata.source, paper_id, version, path, sha256)
+        shutil.rmtree(tmpdir, ignore_errors=True)
+        if self.size() > self.max_bytes:
+            self.gc()
+        return self.link(stored, Path(dirpath) / filename)
+
+
+_default_store: Optional[PdfStore] = None
+
+
+def default_store() -> PdfStore:
+    """
+    Returns the process-wide store in `STORE_PATH`.
+    """
+    global _default_store
+    if _default_store is None:
+        _default_store = PdfStore()
+    return _default_store
@@ -0,0 +1,195 @@
+"""
+Module containing a local BM25 ranker used to pre-filter search results before download.
+"""
+import re
+from typing import List, Optional, Sequence, Tuple
+
+import numpy as np
+
+TOKEN_PATTERN = re.compile(r"[a-z0-9]+(?:[-'][a-z0-9]+)*")
+
+
+def tokenize(text: str) -> List[str]:
+    """
+    Splits a text into lowercase word tokens.
+
+    Args:
+        text (str): The text to tokenize.
+
+    Returns:
+        List[str]: The tokens of the text.
+    """
+    return TOKEN_PATTERN.findall(text.lower())
+
+
+class BM25Ranker:
+    """
+    Okapi BM25 ranker over a fixed set of documents.
+
+    The corpus is stored as a sparse term-document matrix in compressed sparse
+    column layout (one column per term), so that a query only touches the
+    non-zero entries of its own terms and the whole candidate set is scored in
+    a handful of vectorized NumPy operations.
+    """
+
+    def __init__(self, k1: float = 1.5, b: float = 0.75):
+        """
+        Initializes the ranker with the BM25 free parameters.
+
+        Args:
+            k1 (float): Term frequency saturation. Defaults to 1.5.
+            b (float): Document length normalization. Defaults to 0.75.
+        """
+        self.k1 = k1
+        self.b = b
+        self.vocabulary = {}
+        self.num_docs = 0
+        self._indptr = np.zeros(1, dtype=np.int64)
+        self._doc_ids = np.zeros(0, dtype=np.int64)
+        self._weights = np.zeros(0, dtype=np.float64)
+
+    def fit(self, documents: Sequence[str]) -> "BM25Ranker":
+        """
+        Builds the weighted term-document matrix for the documents.
+
+        Args:
+            documents (Sequence[str]): The documents to index.
+
+        Returns:
+            BM25Ranker: The fitted ranker.
+        """
+        vocabulary = {}
+        doc_ids = []
+        term_ids = []
+        for doc_id, document in enumerate(documents):
+            tokens = tokenize(document)
+            doc_ids.extend([doc_id] * len(tokens))
+            term_ids.extend(vocabulary.setdefault(t, len(vocabulary)) for t in tokens)
+
+        num_docs = len(documents)
+        num_terms = len(vocabulary)
+        self.vocabulary = vocabulary
+        self.num_docs = num_docs
+
+        if num_terms == 0:
+            self._indptr = np.zeros(1, dtype=np.int64)
+            self._doc_ids = np.zeros(0, dtype=np.int64)
+            self._weights = np.zeros(0, dtype=np.float64)
+            return self
+
+        doc_array = np.asarray(doc_ids, dtype=np.int64)
+        term_array = np.asarray(term_ids, dtype=np.int64)
+
+        # collapse (term, doc) occurrences into sorted unique pairs with counts
+        keys, tf = np.unique(term_array * num_docs + doc_array, return_counts=True)
+        terms = keys // num_docs
+        docs = keys % num_docs
+
+        doc_len = np.bincount(doc_array, minlength=num_docs).astype(np.float64)
+        avg_len = doc_len.mean() if doc_len.mean() > 0 else 1.0
+        df = np.bincount(terms, minlength=num_terms)
+        idf = np.log1p((num_docs - df + 0.5) / (df + 0.5))
+
+        norm = self.k1 * (1.0 - self.b + self.b * doc_len / avg_len)
+        self._weights = idf[terms] * tf * (self.k1 + 1.0) / (tf + norm[docs])
+        self._doc_ids = docs
+        self._indptr = np.concatenate(([0], np.cumsum(df)))
+        return self
+
+    def score(self, query: str) -> np.ndarray:
+        """
+        Scores every indexed document against the query.
+
+        Args:
+            query (str): The query text.
+
+        Returns:
+            np.ndarray: One BM25 score per document, in index order.
+        """
+        term_ids = {self.vocabulary[t] for t in tokenize(query) if t in self.vocabulary}
+        if not term_ids:
+            return np.zeros(self.num_docs, dtype=np.float64)
+
+        columns = [
+            np.arange(self._indptr[t], self._indptr[t + 1]) for t in sorted(term_ids)
+        ]
+        entries = np.concatenate(columns)
+        return np.bincount(
+            self._doc_ids[entries],
+            weights=self._weights[entries],
+            minlength=self.num_docs,
+        )
+
+    def rank(
+        self,
+        query: str,
+        top_k: Optional[int] = None,
+        min_score: Optional[float] = None,
+    ) -> List[Tuple[int, float]]:
+        """
+        Ranks the indexed documents against the query.
+
+        Documents without any query term are never returned.
+
+        Args:
+            query (str): The query text.
+            top_k (int, optional): Keep at most this many documents. Defaults to None.
+            min_score (float, optional): Drop documents scoring below this value. Defaults to None.
+
+        Returns:
+            List[Tuple[int, float]]: (document index, score) pairs, best first.
+        """
+        scores = self.score(query)
+        keep = scores > 0
+        if min_score is not None:
+            keep &= scores >= min_score
+        candidates = np.flatnonzero(keep)
+
+        # stable sort keeps the API order for ties
+        order = candidates[np.argsort(-scores[candidates], kind="stable")]
+        if top_k is not None:
+            order = order[:top_k]
+        return [(int(i), float(scores[i])) for i in order]
+
+
+def rank_results(
+    results: Sequence,
+    documents: Sequence[str],
+    query: str,
+    top_k: Optional[int] = None,
+    min_score: Optional[float] = None,
+    required: Optional[Sequence[str]] = None,
+) -> List:
+    """
+    Ranks search results by the BM25 relevance of their documents to a query.
+
+    Results whose document does not contain every `required` key
+    (case-insensitively) are dropped before ranking.
+
+    Args:
+        results (Sequence): The search results.
+        documents (Sequence[str]): The title and abstract text of each result.
+        query (str): The query text.
+        top_k (int, optional): Keep at most this many results. Defaults to None.
+        min_score (float, optional): Drop results scoring below this value. Defaults to None.
+        required (Sequence[str], optional): Keys every kept document must contain. Defaults to None.
+
+    Returns:
+        List: The retained results, most relevant first.
+    """
+    if required:
+        keys = [key.lower() for key in required]
+        kept = [
+            (result, document)
+            for result, document in zip(results, documents)
+            if all(key in document.lower() for key in keys)
+        ]
+        results = [result for result, _ in kept]
+        documents = [document for _, document in kept]
+
+    if not query.strip():
+        return list(results)[:top_k] if top_k is not None else list(results)
+
+    ranker = BM25Ranker().fit(documents)
+    ranked = ranker.rank(query, top_k=top_k, min_score=min_score)
+    return [results[index] for index, _ in ranked]
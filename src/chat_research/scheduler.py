@@ -0,0 +1,82 @@
+"""
+Module containing the shared request scheduling primitives used by the async readers.
+"""
+import asyncio
+import itertools
+from typing import Iterable, Iterator, Optional
+
+from loguru import logger
+
+
+class KeyPool:
+    """
+    Round-robin pool of OpenAI API keys shared by concurrent requests.
+    """
+
+    def __init__(self, keys: Iterable[str]):
+        """
+        Initializes the pool with the API keys to rotate through.
+
+        Args:
+            keys (Iterable[str]): The API keys.
+        """
+        self._keys = list(keys)
+        if not self._keys:
+            raise ValueError("KeyPool needs at least one API key")
+        self._cycle: Iterator[str] = itertools.cycle(self._keys)
+
+    def __len__(self) -> int:
+        return len(self._keys)
+
+    def next_key(self) -> str:
+        """
+        Returns the next API key in round-robin order.
+
+        Returns:
+            str: The API key to use for the next request.
+        """
+        return next(self._cycle)
+
+
+class RateLimiter:
+    """
+    Async limiter enforcing a minimum delay between consecutive requests.
+
+    Waiting callers sleep on the event loop instead of blocking it.
+    """
+
+    def __init__(self, delay_seconds: float):
+        """
+        Initializes the limiter with the minimum delay between requests.
+
+        Args:
+            delay_seconds (float): Minimum number of seconds between two requests.
+        """
+        self.delay_seconds = delay_seconds
+        self._last_request: Optional[float] = None
+        self._lock: Optional[asyncio.Lock] = None
+        self._loop: Optional[asyncio.AbstractEventLoop] = None
+
+    async def __aenter__(self) -> "RateLimiter":
+        await self.acquire()
+        return self
+
+    async def __aexit__(self, *exc_info) -> None:
+        return None
+
+    async def acquire(self) -> None:
+        """
+        Waits until a request may be sent without violating the delay.
+        """
+        loop = asyncio.get_running_loop()
+        if self._lock is None or self._loop is not loop:
+            self._lock = asyncio.Lock()
+            self._loop = loop
+
+        async with self._lock:
+            if self._last_request is not None:
+                to_sleep = self._last_request + self.delay_seconds - loop.time()
+                if to_sleep > 0:
+                    logger.debug(f"Sleeping for {to_sleep:.3f} seconds")
+                    await asyncio.sleep(to_sleep)
+            self._last_request = loop.time()
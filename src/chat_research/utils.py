@@ -7,6 +7,7 @@ from loguru import logger
 CONFIG_FILE_NAME = "chatre.toml"
 DEFAULT_PATH = Path.cwd() / CONFIG_FILE_NAME
 GLOBAL_PATH = Path.home() / ".config" / "chatre" / CONFIG_FILE_NAME
+CACHE_PATH = Path.home() / ".cache" / "chatre"
 
 
 def report_token_usage(response):
@@ -0,0 +1,27 @@
+import datetime
+from pathlib import Path
+
+import pytest
+
+from chat_research.provider.arxiv_web import parse_listing
+
+LISTING = (Path(__file__).parent / "data" / "arxiv_listing.html").read_text()
+
+
+@pytest.mark.parametrize("parser", ["html.parser", "lxml"])
+def test_parse_listing(parser):
+    if parser == "lxml":
+        pytest.importorskip("lxml")
+
+    results = parse_listing(LISTING, parser)
+    assert [r.link.rsplit("/", 1)[-1] for r in results] == [
+        "2305.00003",
+        "2305.00002",
+        "2305.00001",
+    ]
+    first = results[0]
+    assert first.title == "Graph Transformers at Scale"
+    assert first.pdf_url == "https://arxiv.org/pdf/2305.00003"
+    assert first.date == datetime.date(2023, 5, 3)
+    assert first.authors == ["Ada Lovelace", "Alan Turing"]
+    assert first.abstract == "We study graph transformers at scale in depth."
@@ -0,0 +1,88 @@
+import asyncio
+from pathlib import Path
+
+import aiohttp
+import feedparser
+from aiohttp import web
+
+from chat_research.provider.async_arxiv import AsyncClient, Result, Search
+from chat_research.provider.atom import AtomParser, parse_page
+
+FEED = Path("test/data/arxiv_feed.xml").read_bytes()
+
+
+def test_parse_page_matches_feedparser():
+    total, results = parse_page(FEED)
+    expected = [Result._from_feed_entry(e) for e in feedparser.parse(FEED).entries]
+
+    assert total == 3
+    assert len(results) == len(expected)
+    for result, other in zip(results, expected):
+        assert result.entry_id == other.entry_id
+        assert result.updated == other.updated
+        assert result.published == other.published
+        assert result.title == other.title
+        assert result.authors == other.authors
+        assert result.summary == other.summary
+        assert result.comment == other.comment
+        assert result.journal_ref == other.journal_ref
+        assert result.doi == other.doi
+        assert result.primary_category == other.primary_category
+        assert result.categories == other.categories
+        assert result.links == other.links
+        assert result.pdf_url == other.pdf_url
+        assert result._raw is None
+
+
+def test_atom_parser_chunks():
+    parser = AtomParser()
+    results = []
+    for start in range(0, len(FEED), 64):
+        results.extend(parser.feed(FEED[start : start + 64]))
+    results.extend(parser.close())
+
+    assert [r.get_short_id() for r in results] == [
+        "2305.00001v2",
+        "2304.12345v1",
+        "quant-ph/0201082v1",
+    ]
+
+
+async def stream_search(stalls=0, timeout=None):
+    async def query(request):
+        nonlocal stalls
+        response = web.StreamResponse(headers={"Content-Type": "application/atom+xml"})
+        await response.prepare(request)
+        if stalls:
+            stalls -= 1
+            await asyncio.sleep(1)
+        for start in range(0, len(FEED), 512):
+            await response.write(FEED[start : start + 512])
+        return response
+
+    app = web.Application()
+    app.router.add_get("/api/query", query)
+    runner = web.AppRunner(app)
+    await runner.setup()
+    site = web.TCPSite(runner, "127.0.0.1", 0)
+    await site.start()
+    port = site._server.sockets[0].getsockname()[1]
+    client = AsyncClient(delay_seconds=0)
+    client.query_url_format = f"http://127.0.0.1:{port}/api/query?{{}}"
+    try:
+        async with aiohttp.ClientSession(timeout=timeout) as session:
+            search = Search(query="all: x", max_results=3)
+            return [result async for result in client.aresults(search, session=session)]
+    finally:
+        await runner.cleanup()
+
+
+def test_client_parses_streamed_page():
+    results = asyncio.run(stream_search())
+    assert [r.entry_id for r in results] == [r.entry_id for r in parse_page(FEED)[1]]
+
+
+def test_client_retries_stalled_page():
+    timeout = aiohttp.ClientTimeout(total=0.5)
+    results = asyncio.run(stream_search(stalls=1, timeout=timeout))
+    assert [r.entry_id for r in results] == [r.entry_id for r in parse_page(FEED)[1]]
@@ -0,0 +1,44 @@
+import sqlite3
+import time
+
+import pytest
+
+from chat_research.provider.cache import PageCache
+
+
+def test_fresh_and_revalidate(tmp_path):
+    cache = PageCache(ttl_seconds=60, path=tmp_path / "pages.sqlite3")
+    url = "https://example.org/api?page=1"
+    assert cache.fresh(url) is None
+    assert cache.conditional_headers(url) == {}
+
+    cache.store(url, b"<feed/>", {"ETag": '"abc"', "Last-Modified": "yesterday"})
+    assert cache.fresh(url) == b"<feed/>"
+    assert cache.conditional_headers(url) == {
+        "If-None-Match": '"abc"',
+        "If-Modified-Since": "yesterday",
+    }
+
+    # a stale page needs revalidation, after which it is fresh again
+    cache.ttl_seconds = 0
+    assert cache.fresh(url) is None
+    cache.ttl_seconds = 60
+    with cache.conn:
+        cache.conn.execute("UPDATE pages SET fetched_at = ?", (time.time() - 120,))
+    assert cache.fresh(url) is None
+    assert cache.revalidated(url) == b"<feed/>"
+    assert cache.fresh(url) == b"<feed/>"
+
+
+def test_client_close_closes_cache(tmp_path):
+    from chat_research.provider.async_arxiv import AsyncClient
+
+    client = AsyncClient(cache=PageCache(ttl_seconds=60, path=tmp_path / "p.sqlite3"))
+    client.close()
+    with pytest.raises(sqlite3.ProgrammingError):
+        client.cache.fresh("https://example.org/api?page=1")
+
+    with PageCache(ttl_seconds=60, path=tmp_path / "p.sqlite3") as cache:
+        cache.store("https://example.org/api?page=1", b"<feed/>", {})
+    with pytest.raises(sqlite3.ProgrammingError):
+        cache.fresh("https://example.org/api?page=1")
@@ -0,0 +1,48 @@
+import asyncio
+import os
+
+import aiohttp
+from aiohttp import web
+
+from chat_research.provider.download import DownloadManager
+
+
+async def serve_and_download(source, target, min_chunk):
+    async def handler(request):
+        return web.FileResponse(source)
+
+    app = web.Application()
+    app.router.add_get("/paper.pdf", handler)
+    runner = web.AppRunner(app)
+    await runner.setup()
+    site = web.TCPSite(runner, "127.0.0.1", 0)
+    await site.start()
+    port = site._server.sockets[0].getsockname()[1]
+    try:
+        manager = DownloadManager(per_host=1, min_chunk=min_chunk)
+        async with aiohttp.ClientSession() as session:
+            url = f"http://127.0.0.1:{port}/paper.pdf"
+            await manager.download(session, url, target)
+            assert await manager.read(session, url) == source.read_bytes()
+        return manager
+    finally:
+        await runner.cleanup()
+
+
+def test_download_and_resume(tmp_path):
+    data = os.urandom(300_000)
+    source = tmp_path / "source.pdf"
+    source.write_bytes(data)
+
+    target = tmp_path / "paper.pdf"
+    manager = asyncio.run(serve_and_download(source, target, min_chunk=1024))
+    assert target.read_bytes() == data
+    assert manager.stats["127.0.0.1"].bytes == 2 * len(data)
+
+    # an interrupted download leaves a part file, which is resumed
+    target.unlink()
+    (tmp_path / "paper.pdf.part").write_bytes(data[:100_000])
+    manager = asyncio.run(serve_and_download(source, target, min_chunk=1024))
+    assert target.read_bytes() == data
+    assert manager.stats["127.0.0.1"].bytes == 2 * len(data) - 100_000
+    assert not (tmp_path / "paper.pdf.part").exists()
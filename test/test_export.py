@@ -0,0 +1,65 @@
+import asyncio
+import sys
+import time
+
+import fitz
+
+from chat_research.aexport import DigestEntry, ExportPool, adigest, merge_pdfs
+
+SLEEP = [sys.executable, "-c", "import time; time.sleep(0.3)"]
+
+
+async def run_jobs(pool, args, count):
+    return await asyncio.gather(*(pool.run(args) for _ in range(count)))
+
+
+def test_pool_bounds_concurrency():
+    pool = ExportPool(workers=2)
+    start = time.perf_counter()
+    assert asyncio.run(run_jobs(pool, SLEEP, 4)) == [True] * 4
+    # four jobs on two workers take two rounds
+    assert time.perf_counter() - start >= 0.6
+    assert pool.stats.jobs == 4
+    assert pool.stats.wait_seconds > 0
+
+
+def test_pool_timeout_and_failure():
+    pool = ExportPool(workers=1, timeout=0.1)
+    fail = [sys.executable, "-c", "raise SystemExit(1)"]
+    assert asyncio.run(run_jobs(pool, SLEEP, 1)) == [False]
+    # leave the interpreter time to start, so the job fails rather than times out
+    pool.timeout = 10
+    assert asyncio.run(run_jobs(pool, fail, 1)) == [False]
+    assert pool.stats.timeouts == 1
+    assert pool.stats.failures == 2
+
+
+def test_digest(tmp_path):
+    entries = []
+    for i in range(2):
+        path = tmp_path / f"paper-{i}.md"
+        path.write_text(f"## Paper:{i + 1}\n\nSummary {i}\n")
+        entries.append(DigestEntry(f"Paper [{i}]", path))
+
+    digest = tmp_path / "digest.md"
+    assert asyncio.run(adigest(entries, digest, "Digest"))
+    text = digest.read_text()
+    assert "- [1. Paper \\[0\\]](#1-paper-0)" in text
+    assert text.index("# 2. Paper [1]") > text.index("Summary 0")
+    assert text.endswith("Summary 1\n")
+
+
+def test_merge_pdfs(tmp_path):
+    entries = []
+    for i, pages in enumerate((2, 1)):
+        path = tmp_path / f"paper-{i}.pdf"
+        with fitz.open() as pdf:
+            for _ in range(pages):
+                pdf.new_page()
+            pdf.save(path)
+        entries.append(DigestEntry(f"Paper {i}", path))
+
+    merge_pdfs(entries, tmp_path / "digest.pdf")
+    with fitz.open(tmp_path / "digest.pdf") as digest:
+        assert digest.page_count == 3
+        assert digest.get_toc() == [[1, "1. Paper 0", 1], [1, "2. Paper 1", 3]]
@@ -0,0 +1,57 @@
+from chat_research.index import MetadataIndex, search_key
+from chat_research.provider.async_biorxiv import Result
+
+
+def make_result(index, date="2023-05-01", version="1"):
+    return Result.from_api_entry(
+        {
+            "doi": f"10.1101/2023.05.{index:05d}",
+            "title": f"Protein folding paper {index}",
+            "authors": "Doe, J.; Roe, R.",
+            "author_corresponding": "Doe",
+            "author_corresponding_institution": "X",
+            "date": date,
+            "version": version,
+            "category": "bioinformatics",
+            "jatsxml": "https://example.org/x.xml",
+            "abstract": "structure prediction" if index % 2 else "single-cell atlas",
+            "published": "NA",
+            "server": "biorxiv",
+        }
+    )
+
+
+def test_search(tmp_path):
+    with MetadataIndex(tmp_path / "index.sqlite3") as index:
+        index.add([make_result(i) for i in range(4)])
+        assert len(index) == 4
+        records = index.search("structure prediction")
+        assert sorted(r.paper_id for r in records) == [
+            "10.1101/2023.05.00001",
+            "10.1101/2023.05.00003",
+        ]
+        assert index.search('"unbalanced quote') == []
+        assert index.search("atlas", source="medrxiv") == []
+
+
+def test_sync_high_water_mark(tmp_path):
+    key = search_key("biorxiv", "bioinformatics")
+    with MetadataIndex(tmp_path / "index.sqlite3") as index:
+        first = [make_result(i) for i in range(3)]
+        assert index.sync(key, first) == first
+        assert index.high_water_mark(key).startswith("2023-05-01")
+
+        # same day, one unseen paper and one new version; plus one newer day
+        second = first + [
+            make_result(3),
+            make_result(0, version="2"),
+            make_result(4, date="2023-05-02"),
+        ]
+        new = index.sync(key, second)
+        assert [(r.doi[-5:], r.version) for r in new] == [
+            ("00003", "1"),
+            ("00000", "2"),
+            ("00004", "1"),
+        ]
+        assert index.high_water_mark(key).startswith("2023-05-02")
+        assert index.sync(key, second) == []
@@ -0,0 +1,84 @@
+import asyncio
+import functools
+from pathlib import Path
+
+from chat_research.commands import chat_async_paper
+from chat_research.commands.chat_async_paper import Reader, read_ids
+from chat_research.commands.chat_ingest import SnapshotFilter, ingest, read_snapshot
+from chat_research.index import MetadataIndex
+from chat_research.provider.async_arxiv import Result
+
+SNAPSHOT = Path(__file__).parent / "data" / "arxiv_snapshot.jsonl"
+
+
+def test_from_snapshot_entry():
+    entry = next(read_snapshot(SNAPSHOT))
+    result = Result.from_snapshot_entry(entry)
+    assert result.get_short_id() == "0704.0001v2"
+    assert result.title.startswith("Calculation of prompt diphoton production")
+    assert [str(a) for a in result.authors][:2] == ["C. Balázs", "E. L. Berger"]
+    assert result.primary_category == "hep-ph"
+    assert result.pdf_url == "http://arxiv.org/pdf/0704.0001v2"
+    assert result.published.year == 2007 and result.updated.month == 7
+
+
+def test_ingest_filters(tmp_path):
+    accept = SnapshotFilter(["cs"], "2023-01-01:2023-12-31", ["single-cell"])
+    with MetadataIndex(tmp_path / "index.sqlite3") as index:
+        read, indexed = ingest(SNAPSHOT, index, accept, batch_size=1)
+        assert (read, indexed) == (3, 1)
+        assert [r.paper_id for r in index.search("graph")] == ["2305.00001"]
+
+
+def test_lookup_from_record(tmp_path):
+    result = Result.from_snapshot_entry(next(read_snapshot(SNAPSHOT)))
+    with MetadataIndex(tmp_path / "index.sqlite3") as index:
+        index.add([result])
+        assert index.lookup("arxiv", "0704.0001", "1") is None
+        record = index.lookup("arxiv", "0704.0001")
+
+    restored = Result.from_record(record)
+    assert restored.get_short_id() == "0704.0001v2"
+    assert restored.pdf_url == result.pdf_url
+    assert restored.updated == result.updated
+    assert [str(a) for a in restored.authors] == [str(a) for a in result.authors]
+
+
+def test_read_ids(tmp_path):
+    path = tmp_path / "ids.txt"
+    path.write_text(
+        "# reading list\n2305.00001\narXiv:2305.00002v3\n\n"
+        "https://arxiv.org/abs/hep-th/9901001v1\n2305.00001v2  # again\n"
+    )
+    assert read_ids(path) == [
+        ("2305.00001", None),
+        ("2305.00002", "3"),
+        ("hep-th/9901001", "1"),
+    ]
+
+
+def test_fetch_ids_skips_index_for_unversioned(tmp_path, monkeypatch):
+    result = Result.from_snapshot_entry(next(read_snapshot(SNAPSHOT)))
+    path = tmp_path / "index.sqlite3"
+    with MetadataIndex(path) as index:
+        index.add([result])
+    monkeypatch.setattr(
+        chat_async_paper, "MetadataIndex", functools.partial(MetadataIndex, path)
+    )
+
+    requested = []
+
+    async def fetch_id_chunks(ids, chunk_size, session):
+        requested.extend(ids)
+        return [result]
+
+    reader = Reader.__new__(Reader)
+    monkeypatch.setattr(reader, "_fetch_id_chunks", fetch_id_chunks)
+
+    # a versioned ID is served from the index
+    results = asyncio.run(reader._fetch_ids([("0704.0001", "2")], session=None))
+    assert requested == [] and results[0].get_short_id() == "0704.0001v2"
+
+    # an unversioned ID may have a newer version than the indexed one
+    asyncio.run(reader._fetch_ids([("0704.0001", None)], session=None))
+    assert requested == ["0704.0001"]
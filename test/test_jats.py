@@ -0,0 +1,46 @@
+import asyncio
+from pathlib import Path
+from types import SimpleNamespace
+
+from chat_research.areader import AsyncBaseReader
+from chat_research.jats import JatsPaper, JatsParser
+from chat_research.provider.download import DownloadManager
+
+JATS = Path(__file__).parent / "data" / "biorxiv_jats.xml"
+
+
+def test_incremental_parse():
+    parser = JatsParser()
+    data = JATS.read_bytes()
+    for start in range(0, len(data), 97):
+        parser.feed(data[start : start + 97])
+    document = parser.close()
+
+    assert document.title == "Single-cell atlas of Mus musculus liver"
+    assert document.abstract == "We map every cell of the liver."
+    assert document.authors == ["Jane Doe", "Richard Roe"]
+    assert document.affiliations == ["Institute of Cells, Cambridge, UK"]
+    assert list(document.sections) == [
+        "Introduction",
+        "Methods",
+        "Results",
+        "Conclusion",
+    ]
+    assert document.sections["Introduction"] == "Livers are large ."
+    assert document.sections["Methods"] == "We sequenced cells.\nLeiden was used."
+
+    paper = JatsPaper("paper.xml", document)
+    assert list(paper.sections.sections())[0].text == document.abstract
+    assert paper.sections.get_method()[0].name == "Methods"
+    assert paper.sections.get_conclusion()[0].text == "More atlases."
+    assert "Institute of Cells" in paper.sections["paper_info"].text
+
+
+def test_read_jats_falls_back_on_timeout(monkeypatch):
+    async def timeout(self, session, url, headers=None):
+        raise asyncio.TimeoutError()
+        yield b""
+
+    monkeypatch.setattr(DownloadManager, "stream", timeout)
+    result = SimpleNamespace(jats_xml_path="https://www.biorxiv.org/paper.xml")
+    assert asyncio.run(AsyncBaseReader.read_jats(result, None)) is None
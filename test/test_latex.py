@@ -0,0 +1,82 @@
+import asyncio
+import gzip
+import io
+import tarfile
+
+from chat_research.areader import AsyncBaseReader
+from chat_research.latex import LatexPaper, extract_tex
+from chat_research.provider.async_arxiv import Link, Result
+from chat_research.provider.download import DownloadManager
+
+MAIN = r"""
+\documentclass{article}
+\title{Graph Networks\\ for Cells}
+\author{A. Author}
+\begin{document}
+\maketitle
+\begin{abstract}
+We study cells. % a comment
+\end{abstract}
+\section{Introduction}
+Cells matter \cite{x}.
+\input{sections/method}
+\section*{Conclusion}
+It works.
+\bibliography{refs}
+\end{document}
+"""
+
+METHOD = r"""
+\section[Method]{Methods}
+\label{sec:method}
+We propagate messages.
+\begin{figure}\includegraphics{fig}\end{figure}
+\subsection{Training}
+With Adam.
+"""
+
+
+def make_tarball(files):
+    buffer = io.BytesIO()
+    with tarfile.open(fileobj=buffer, mode="w:gz") as tar:
+        for name, text in files.items():
+            data = text.encode()
+            info = tarfile.TarInfo(name)
+            info.size = len(data)
+            tar.addfile(info, io.BytesIO(data))
+    return buffer.getvalue()
+
+
+def test_latex_paper_sections():
+    files = extract_tex(
+        make_tarball({"main.tex": MAIN, "sections/method.tex": METHOD, "x.bib": ""})
+    )
+    assert sorted(files) == ["main.tex", "sections/method.tex"]
+
+    paper = LatexPaper("paper.tex", files)
+    assert paper.title == "Graph Networks for Cells"
+    assert paper.section_names == ["Abstract", "Introduction", "Methods", "Conclusion"]
+    assert paper.sections["Abstract"].text == "We study cells."
+    assert paper.sections["Introduction"].text == "Cells matter ."
+    method = paper.sections.get_method()[0].text
+    assert "We propagate messages." in method and "With Adam." in method
+    assert "includegraphics" not in method and "label" not in method
+    assert paper.sections.get_conclusion()[0].text == "It works."
+    assert "A. Author" in paper.sections["paper_info"].text
+
+
+def test_extract_single_file_and_pdf():
+    assert extract_tex(gzip.compress(MAIN.encode())) == {"main.tex": MAIN}
+    assert extract_tex(b"%PDF-1.5 not a source") is None
+
+
+def test_read_latex_falls_back_on_timeout(monkeypatch):
+    async def timeout(self, session, url, headers=None):
+        raise asyncio.TimeoutError()
+
+    monkeypatch.setattr(DownloadManager, "read", timeout)
+    result = Result(
+        entry_id="http://arxiv.org/abs/2305.00001v1",
+        links=[Link("http://arxiv.org/pdf/2305.00001v1", title="pdf")],
+    )
+    assert asyncio.run(AsyncBaseReader.read_latex(result, None)) is None
@@ -0,0 +1,30 @@
+import asyncio
+import time
+
+from chat_research.pipeline import Pipeline, Stage
+
+
+def test_stages_overlap_and_drop_failures():
+    async def slow_double(x):
+        await asyncio.sleep(0.05)
+        return x * 2
+
+    async def fail_on_six(x):
+        if x == 6:
+            raise ValueError("six")
+        await asyncio.sleep(0.05)
+        return x + 1
+
+    async def numbers():
+        for x in range(6):
+            yield x
+
+    pipeline = Pipeline([Stage("double", slow_double, 2), Stage("inc", fail_on_six)])
+    start = time.perf_counter()
+    outputs = asyncio.run(pipeline.run(numbers()))
+    elapsed = time.perf_counter() - start
+
+    assert sorted(outputs) == [1, 3, 5, 9, 11]
+    assert pipeline.stats["inc"].failures == 1
+    # run one after the other the stages would take 0.15s + 0.25s
+    assert elapsed < 0.35
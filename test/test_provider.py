@@ -0,0 +1,122 @@
+import asyncio
+from types import SimpleNamespace
+
+from chat_research.commands import chat_multi
+from chat_research.provider import async_biorxiv as biorxiv
+from chat_research.provider.base import (
+    ArxivProvider,
+    LocalProvider,
+    PaperMetadata,
+    Provider,
+    dedupe_key,
+    multi_search,
+)
+
+
+class FakeProvider:
+    def __init__(self, name, papers, delay=0.0):
+        self.name = name
+        self.papers = papers
+        self.delay = delay
+
+    async def search(self, query, max_results, session):
+        for title, doi in self.papers[:max_results]:
+            await asyncio.sleep(self.delay)
+            yield (title, doi)
+
+    async def resolve_pdf(self, result, session):
+        return ""
+
+    async def download(self, result, session, dirpath, filename):
+        return dirpath / filename
+
+    def metadata(self, result):
+        title, doi = result
+        return PaperMetadata(self.name, title, title, "", "", [], None, doi)
+
+
+def test_protocol():
+    assert isinstance(ArxivProvider(), Provider)
+    assert isinstance(LocalProvider("."), Provider)
+
+
+def test_dedupe_key():
+    first = PaperMetadata("arxiv", "1", "Graph Nets: A Survey", "", "", [], None, None)
+    second = first._replace(source="biorxiv", title="graph nets - a survey")
+    assert dedupe_key(first) == dedupe_key(second)
+    assert dedupe_key(first._replace(doi="10.1101/X")) == "doi:10.1101/x"
+
+
+def test_multi_search_merges_and_dedupes():
+    arxiv = FakeProvider("arxiv", [("Graph Nets", None), ("Protein Folding", "10.1/a")])
+    biorxiv = FakeProvider(
+        "biorxiv", [("protein folding!", "10.1/A"), ("Cell Atlas", "10.1/b")], 0.01
+    )
+
+    async def collect():
+        return [
+            (provider.name, result[0])
+            async for provider, result in multi_search([arxiv, biorxiv], "q", 10, None)
+        ]
+
+    merged = asyncio.run(collect())
+    assert sorted(merged) == [
+        ("arxiv", "Graph Nets"),
+        ("arxiv", "Protein Folding"),
+        ("biorxiv", "Cell Atlas"),
+    ]
+
+
+def test_multi_reader_summarizes_merged_stream(tmp_path):
+    arxiv = FakeProvider("arxiv", [("Graph Nets", None), ("Protein Folding", "10.1/a")])
+    biorxiv = FakeProvider("biorxiv", [("protein folding!", "10.1/A")], 0.01)
+
+    reader = chat_multi.Reader.__new__(chat_multi.Reader)
+    reader.root_path = tmp_path
+    reader.query = "proteins"
+    reader.providers = [arxiv, biorxiv]
+    reader.top_k = None
+    reader.max_concurrency = 2
+    reader.digest = None
+    reader.exported = []
+
+    async def load_paper(provider, result, path, session):
+        return lambda: SimpleNamespace(source=provider.name, title=result[0])
+
+    async def summarize_paper(paper, paper_index, key_words):
+        return key_words
+
+    async def export_summary(paper, content):
+        pass
+
+    reader.load_paper = load_paper
+    reader.summarize_paper = summarize_paper
+    reader.export_summary = export_summary
+
+    papers = reader.fetch_and_summarize(max_results=10)
+    assert sorted((paper.source, paper.title) for paper in papers) == [
+        ("arxiv", "Graph Nets"),
+        ("arxiv", "Protein Folding"),
+    ]
+
+
+def test_biorxiv_result_hash():
+    def result(version):
+        return biorxiv.Result(
+            doi="10.1101/2023.05.01.538900",
+            title="t",
+            authors="a",
+            author_corresponding="a",
+            author_corresponding_institution="i",
+            version=version,
+            category="bioinformatics",
+            jats_xml_path="https://www.biorxiv.org/paper.xml",
+            abstract="",
+            published="NA",
+            server="biorxiv",
+            date="2023-05-01",
+        )
+
+    assert result(1) == result(1) and hash(result(1)) == hash(result(1))
+    assert result(1) != result(2)
+    assert len({result(1), result(1), result(2)}) == 2
@@ -0,0 +1,49 @@
+from chat_research.ranker import BM25Ranker, rank_results, tokenize
+
+
+def test_tokenize():
+    assert tokenize("Single-cell RNA-seq, GPT-4!") == [
+        "single-cell",
+        "rna-seq",
+        "gpt-4",
+    ]
+
+
+def test_bm25_rank():
+    documents = [
+        "deep learning for protein structure",
+        "reinforcement learning robot control",
+        "robot grasping with reinforcement learning and vision",
+        "a survey of graph databases",
+    ]
+    ranker = BM25Ranker().fit(documents)
+    ranked = ranker.rank("reinforcement learning robot")
+
+    assert [index for index, _ in ranked][:2] == [1, 2]
+    assert 3 not in [index for index, _ in ranked]
+    assert ranker.rank("reinforcement learning robot", top_k=1)[0][0] == 1
+    assert ranker.rank("unseen words") == []
+
+
+def test_rank_results_cutoff():
+    results = ["a", "b", "c"]
+    documents = ["gene expression", "gene regulatory network", "galaxy survey"]
+
+    assert rank_results(results, documents, "gene network") == ["b", "a"]
+    assert rank_results(results, documents, "gene network", min_score=10.0) == []
+    assert rank_results(results, documents, "", top_k=2) == ["a", "b"]
+
+
+def test_rank_results_required_keys():
+    results = ["a", "b", "c"]
+    documents = ["gene expression", "gene regulatory network", "galaxy survey"]
+
+    # every key must match, a single matching term is not enough
+    assert rank_results(results, documents, "gene network", required=["Gene"]) == [
+        "b",
+        "a",
+    ]
+    assert rank_results(
+        results, documents, "gene network", required=["gene", "network"]
+    ) == ["b"]
+    assert rank_results(results, documents, "", required=["galaxy"]) == ["c"]
@@ -0,0 +1,76 @@
+import asyncio
+
+import aiohttp
+from aiohttp import web
+
+from chat_research.provider import resolver as resolver_module
+from chat_research.provider.resolver import PdfUrlResolver
+
+
+def test_pattern_url():
+    url = PdfUrlResolver.pattern_url("bioRxiv", "10.1101/2023.05.01.538900", "2")
+    assert url == "https://www.biorxiv.org/content/10.1101/2023.05.01.538900v2.full.pdf"
+    assert PdfUrlResolver.pattern_url("unknown", "10.1101/x", "1") is None
+
+
+def test_cache_roundtrip(tmp_path):
+    resolver = PdfUrlResolver(tmp_path / "urls.sqlite3")
+    assert resolver.cached("10.1101/x", 1) is None
+    resolver.store("10.1101/x", 1, "https://example.org/x.pdf")
+    resolver.close()
+
+    reopened = PdfUrlResolver(tmp_path / "urls.sqlite3")
+    assert reopened.cached("10.1101/x", "1") == "https://example.org/x.pdf"
+    # cached URLs are served without touching the session
+    url = asyncio.run(reopened.resolve(None, "unknown", "10.1101/x", 1))
+    assert url == "https://example.org/x.pdf"
+
+
+async def resolve_with_fallback(tmp_path, monkeypatch):
+    async def content(request):
+        version = request.match_info["version"]
+        return web.Response(status=200 if version == "1" else 404)
+
+    async def doi(request):
+        raise web.HTTPFound("/landing")
+
+    async def landing(request):
+        return web.Response(
+            text='<html><head><meta name="citation_pdf_url" '
+            'content="https://example.org/moved.pdf"></head></html>',
+            content_type="text/html",
+        )
+
+    app = web.Application()
+    app.router.add_route("HEAD", "/content/{doi:.+}v{version}.full.pdf", content)
+    app.router.add_get("/doi/{doi:.+}", doi)
+    app.router.add_get("/landing", landing)
+    runner = web.AppRunner(app)
+    await runner.setup()
+    site = web.TCPSite(runner, "127.0.0.1", 0)
+    await site.start()
+    base = f"http://127.0.0.1:{site._server.sockets[0].getsockname()[1]}"
+    monkeypatch.setitem(
+        resolver_module.CONTENT_URLS,
+        "biorxiv",
+        base + "/content/{doi}v{version}.full.pdf",
+    )
+    monkeypatch.setattr(resolver_module, "DOI_BASE", base + "/doi")
+
+    resolver = PdfUrlResolver(tmp_path / "urls.sqlite3")
+    try:
+        async with aiohttp.ClientSession() as session:
+            found = await resolver.resolve(session, "biorxiv", "10.1101/x", 1)
+            moved = await resolver.resolve(session, "biorxiv", "10.1101/x", 2)
+        return base, found, moved, resolver.cached("10.1101/x", 2)
+    finally:
+        await runner.cleanup()
+
+
+def test_pattern_404_falls_back_to_landing_page(tmp_path, monkeypatch):
+    base, found, moved, cached = asyncio.run(
+        resolve_with_fallback(tmp_path, monkeypatch)
+    )
+    assert found == base + "/content/10.1101/xv1.full.pdf"
+    assert moved == "https://example.org/moved.pdf"
+    assert cached == moved
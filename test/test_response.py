@@ -0,0 +1,52 @@
+from pathlib import Path
+
+from chat_research.commands.chat_response import (
+    renumber_concerns,
+    split_concerns,
+    split_reviewers,
+)
+
+
+class WordEncoding:
+    @staticmethod
+    def encode(text):
+        return text.split()
+
+
+def test_split_reviewers():
+    comments = Path("test/data/review_comments.txt").read_text()
+    reviewers = split_reviewers(comments)
+
+    assert [index for index, _ in reviewers] == [1, 2, 3]
+    assert reviewers[0][1].startswith("Overall Review:")
+    assert split_reviewers("just one comment") == [(1, "just one comment")]
+
+
+def test_split_reviewers_keeps_numbers():
+    comments = (
+        "Reviewer 2\nToo short.\n\nReviewer #3\n\n"
+        "Referee 4\nNeeds more data.\nReviewer:\nTypos."
+    )
+
+    assert split_reviewers(comments) == [
+        (2, "Too short."),
+        (4, "Needs more data."),
+        (5, "Typos."),
+    ]
+
+
+def test_split_concerns():
+    text = "one two three\n\nfour five\n\nsix seven eight nine"
+
+    assert split_concerns(text, WordEncoding(), 5) == [
+        "one two three\n\nfour five",
+        "six seven eight nine",
+    ]
+
+
+def test_renumber_concerns():
+    responses = ["Concern #1: a\nConcern #2: b", "Concern #1: c"]
+
+    assert renumber_concerns(responses) == (
+        "Concern #1: a\nConcern #2: b\n\nConcern #3: c"
+    )
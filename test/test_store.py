@@ -0,0 +1,73 @@
+import asyncio
+import os
+
+from chat_research.provider.base import PaperMetadata
+from chat_research.provider.store import PdfStore, split_version
+
+
+class FakeProvider:
+    name = "arxiv"
+
+    def __init__(self):
+        self.downloads = 0
+
+    def metadata(self, result):
+        return PaperMetadata("arxiv", result, "", "", "", [], None, None)
+
+    async def download(self, result, session, dirpath, filename):
+        self.downloads += 1
+        path = dirpath / filename
+        path.write_bytes(b"%PDF " + result.encode() * 100)
+        return path
+
+
+def test_split_version():
+    assert split_version("2305.00001v2") == ("2305.00001", "2")
+    assert split_version("10.1101/2023.05.01.538900v1") == (
+        "10.1101/2023.05.01.538900",
+        "1",
+    )
+    assert split_version("hep-th/9901001") == ("hep-th/9901001", "")
+
+
+def test_fetch_reuses_stored_version(tmp_path):
+    store = PdfStore(tmp_path / "store", max_bytes=10**6)
+    provider = FakeProvider()
+    runs = [tmp_path / "run1", tmp_path / "run2"]
+    for run in runs:
+        run.mkdir()
+        path = asyncio.run(store.fetch(provider, "2305.00001v1", None, run, "a.pdf"))
+        assert path == run / "a.pdf"
+    assert provider.downloads == 1
+    assert (
+        runs[0].joinpath("a.pdf").read_bytes() == runs[1].joinpath("a.pdf").read_bytes()
+    )
+
+    # a new version is downloaded again
+    asyncio.run(store.fetch(provider, "2305.00001v2", None, runs[1], "b.pdf"))
+    assert provider.downloads == 2
+
+    size = store.size()
+    assert store.gc(max_bytes=size - 1) > 0
+    assert store.lookup("arxiv", "2305.00001", "1") is None
+    assert store.lookup("arxiv", "2305.00001", "2") is not None
+    # links in run folders keep their data
+    assert runs[0].joinpath("a.pdf").exists()
+
+
+def test_link_copies_across_file_systems(tmp_path, monkeypatch):
+    store = PdfStore(tmp_path / "store", max_bytes=10**6)
+    source = tmp_path / "paper.pdf"
+    source.write_bytes(b"%PDF data")
+    stored = store.add("arxiv", "2305.00001", "1", source)
+
+    def cross_device(src, dst):
+        raise OSError(18, "Invalid cross-device link")
+
+    monkeypatch.setattr(os, "link", cross_device)
+    path = store.link(stored, tmp_path / "a.pdf")
+    assert not path.is_symlink()
+
+    store.gc(max_bytes=0)
+    assert not store.object_path(stored.sha256).exists()
+    assert path.read_bytes() == b"%PDF data"
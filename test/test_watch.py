@@ -0,0 +1,77 @@
+import asyncio
+from pathlib import Path
+
+from chat_research.areader import AsyncBaseReader
+from chat_research.commands.chat_watch import Watcher
+from chat_research.index import MetadataIndex
+from chat_research.jats import JatsParser
+from chat_research.provider import async_biorxiv as biorxiv
+from chat_research.provider.base import BiorxivProvider
+
+JATS = Path(__file__).parent / "data" / "biorxiv_jats.xml"
+
+
+class JatsReader:
+    """
+    Stands in for a bioRxiv reader whose papers are all read from JATS XML.
+    """
+
+    provider = BiorxivProvider()
+
+    def __init__(self, path):
+        self.path = path
+        self.summarized = 0
+
+    def rank(self, results):
+        return results
+
+    def pdf_path(self):
+        return self.path
+
+    async def summarize_results(self, provider, results, path, session, key_words):
+        parser = JatsParser()
+        parser.feed(JATS.read_bytes())
+        document = parser.close()
+        self.summarized += len(results)
+        return [
+            AsyncBaseReader.create_jats_paper(provider, result, path, document)
+            for result in results
+        ]
+
+
+class Job:
+    def __init__(self, reader, results):
+        self.reader = reader
+        self.results = results
+        self.key_words = "genomics"
+
+    async def fetch(self, session):
+        return self.results
+
+
+def test_jats_papers_are_marked_processed(tmp_path):
+    result = biorxiv.Result(
+        doi="10.1101/2023.05.01.538900",
+        title="Single-cell atlas of Mus musculus liver",
+        authors="Jane Doe; Richard Roe",
+        author_corresponding="Jane Doe",
+        author_corresponding_institution="Institute of Cells",
+        version=1,
+        category=biorxiv.Category.Genomics,
+        jats_xml_path="https://www.biorxiv.org/paper.xml",
+        abstract="We map every cell of the liver.",
+        published="NA",
+        server="biorxiv",
+        date="2023-05-01",
+    )
+    assert result.entry_id is None
+
+    reader = JatsReader(tmp_path)
+    job = Job(reader, [result])
+    with MetadataIndex(tmp_path / "index.sqlite3") as index:
+        watcher = Watcher([job], 60, index)
+        assert asyncio.run(watcher.run_job(job, session=None)) == 1
+        assert index.is_processed(result)
+        # the next poll finds nothing new
+        assert asyncio.run(watcher.run_job(job, session=None)) == 0
+    assert reader.summarized == 1